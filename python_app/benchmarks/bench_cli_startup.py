@@ -0,0 +1,64 @@
+"""Cold-start benchmark: how long the headless CLI takes to do a trivial job.
+
+Run from python_app/:  python benchmarks/bench_cli_startup.py [--repeat N]
+
+Times `json_cli.py validate` on a tiny file in fresh interpreters, next to
+a bare interpreter and a bare `import json_editor` (the GUI's import cost),
+and checks that the CLI never loads a GUI toolkit.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUI_MODULES = ("tkinter", "_tkinter", "customtkinter")
+
+
+def run_times(args, repeat):
+    """Wall-clock seconds of each of repeat runs of a fresh interpreter with args"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable] + args, cwd=APP_DIR, capture_output=True)
+        times.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            return None, result.stderr.decode(errors="replace").strip().splitlines()[-1:]
+    return times, None
+
+
+def report(label, times, error):
+    if times is None:
+        print(f"{label:<28} failed: {' '.join(error)}")
+    else:
+        print(f"{label:<28} median {statistics.median(times) * 1000:7.1f} ms   best {min(times) * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=15, help="runs per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tiny.json")
+        with open(path, "w") as f:
+            json.dump([{"id": i, "name": f"item {i}"} for i in range(10)], f, indent=2)
+
+        subprocess.run([sys.executable, "-c", "import json_cli"], cwd=APP_DIR)  # write .pyc files first
+        report("python -c pass", *run_times(["-c", "pass"], args.repeat))
+        report("json_cli.py validate", *run_times(["json_cli.py", "validate", path], args.repeat))
+        report("import json_editor (GUI)", *run_times(["-c", "import json_editor"], args.repeat))
+
+    probe = ("import sys, json_cli; "
+             f"print(','.join(m for m in {GUI_MODULES!r} if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, "-c", probe], cwd=APP_DIR, capture_output=True, text=True).stdout.strip()
+    print(f"GUI modules loaded by json_cli: {loaded or 'none'}")
+    return 1 if loaded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Throughput of each installed JSON backend behind json_codec, per dataset shape.
+
+Run from python_app/:  python benchmarks/bench_codec.py [--records N] [--shapes mixed,flat] [--repeat N]
+
+For every backend json_codec can use here, measures decoding records
+(as RecordStore does for each record it reads), indented encoding (as a
+save or the preview does) and compact encoding, in MB/s of JSON text.
+Rates are followed by the speedup over the standard library. Output of
+every backend is checked against json.dumps first; a mismatch is
+reported and makes the exit status 1.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import json_codec
+from datagen import SHAPES, generate
+
+
+def best_seconds(function, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+    return min(runs)
+
+
+def mismatches(records):
+    """How many records the selected backend encodes differently from json.dumps"""
+    count = 0
+    for obj in records:
+        for indent in (None, 2):
+            if json_codec.dumps(obj, indent=indent) != json.dumps(obj, indent=indent):
+                count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--shapes", default=",".join(SHAPES), help=f"comma-separated, from {', '.join(SHAPES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is reported")
+    args = parser.parse_args()
+    shapes = [shape.strip() for shape in args.shapes.split(",")]
+    if not set(shapes) <= set(SHAPES):
+        parser.error(f"unknown shape in {args.shapes!r}")
+
+    backends = json_codec.available()
+    print(f"backends: {', '.join(backends)} (default {json_codec.backend})")
+    print(f"{'shape':<8} {'backend':<8} {'loads MB/s':>11} {'dumps indent MB/s':>18} {'dumps compact MB/s':>19}")
+    failed = False
+    for shape in shapes:
+        records = list(generate(args.records, shape))
+        compact = [json.dumps(obj).encode('utf-8') for obj in records]
+        compact_mb = sum(map(len, compact)) / 1e6
+        indented_mb = sum(len(json.dumps(obj, indent=2)) for obj in records) / 1e6
+        rates = {}
+        for backend in backends:
+            json_codec.select(backend)
+            wrong = mismatches(records)
+            if wrong:
+                failed = True
+                print(f"{shape:<8} {backend:<8} OUTPUT DIFFERS from json.dumps for {wrong} records")
+            loads, dumps = json_codec.loads, json_codec.dumps
+            rates[backend] = (
+                compact_mb / best_seconds(lambda: [loads(text) for text in compact], args.repeat),
+                indented_mb / best_seconds(lambda: [dumps(obj, indent=2) for obj in records], args.repeat),
+                compact_mb / best_seconds(lambda: [dumps(obj) for obj in records], args.repeat),
+            )
+        for backend, row in rates.items():
+            cells = [f"{rate:6.1f} x{rate / base:4.1f}" for rate, base in zip(row, rates["json"])]
+            print(f"{shape:<8} {backend:<8} {cells[0]:>11} {cells[1]:>18} {cells[2]:>19}")
+    json_codec.select()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""Micro-benchmark: per-character preview highlighter vs. the batched one.
+
+Run from python_app/:  python benchmarks/bench_highlighter.py [--lines N]
+
+Times both highlighters against a recording stand-in for the Text widget
+(pure Python cost) and, when a display is available, against a real
+tk.Text (what the editor actually pays). Also checks both produce the
+same tag ranges.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_preview import highlight_ranges
+
+
+def legacy_highlight(text_widget, json_text):
+    """The original per-character highlighter, kept as the baseline"""
+    
+    # Remove all existing tags
+    for tag in text_widget.tag_names():
+        text_widget.tag_remove(tag, "1.0", "end")
+    
+    depth = 0
+    i = 0
+    line = 1
+    col = 0
+    
+    while i < len(json_text):
+        char = json_text[i]
+        
+        # Track line and column for tag placement
+        if char == '\n':
+            line += 1
+            col = 0
+            i += 1
+            continue
+        
+        # Handle strings (keys and values)
+        if char == '"':
+            string_start = i
+            i += 1
+            while i < len(json_text) and json_text[i] != '"':
+                if json_text[i] == '\\':
+                    i += 1  # Skip escaped character
+                i += 1
+            i += 1  # Include closing quote
+            
+            # Check if it's a key (followed by colon)
+            j = i
+            while j < len(json_text) and json_text[j] in ' \t':
+                j += 1
+            
+            start_pos = f"{line}.{col}"
+            end_pos = f"{line}.{col + (i - string_start)}"
+            
+            if j < len(json_text) and json_text[j] == ':':
+                # Property key - use nested color
+                tag = f"key_{depth % 3}"
+                text_widget.tag_add(tag, start_pos, end_pos)
+            else:
+                # String value
+                text_widget.tag_add("string", start_pos, end_pos)
+            
+            col += i - string_start
+            continue
+        
+        # Handle opening brackets
+        if char in '{[':
+            start_pos = f"{line}.{col}"
+            end_pos = f"{line}.{col + 1}"
+            tag = f"bracket_{depth % 3}"
+            text_widget.tag_add(tag, start_pos, end_pos)
+            depth += 1
+            col += 1
+            i += 1
+            continue
+        
+        # Handle closing brackets
+        if char in '}]':
+            depth -= 1
+            start_pos = f"{line}.{col}"
+            end_pos = f"{line}.{col + 1}"
+            tag = f"bracket_{depth % 3}"
+            text_widget.tag_add(tag, start_pos, end_pos)
+            col += 1
+            i += 1
+            continue
+        
+        # Handle numbers
+        if char.isdigit() or (char == '-' and i + 1 < len(json_text) and json_text[i + 1].isdigit()):
+            num_start = i
+            if char == '-':
+                i += 1
+                col += 1
+            while i < len(json_text) and (json_text[i].isdigit() or json_text[i] in '.eE+-'):
+                i += 1
+                col += 1
+            
+            start_pos = f"{line}.{col - (i - num_start)}"
+            end_pos = f"{line}.{col}"
+            text_widget.tag_add("number", start_pos, end_pos)
+            continue
+        
+        # Handle booleans and null
+        if json_text[i:i+4] == 'true' or json_text[i:i+5] == 'false':
+            length = 4 if json_text[i:i+4] == 'true' else 5
+            start_pos = f"{line}.{col}"
+            end_pos = f"{line}.{col + length}"
+            text_widget.tag_add("boolean", start_pos, end_pos)
+            i += length
+            col += length
+            continue
+        
+        if json_text[i:i+4] == 'null':
+            start_pos = f"{line}.{col}"
+            end_pos = f"{line}.{col + 4}"
+            text_widget.tag_add("null", start_pos, end_pos)
+            i += 4
+            col += 4
+            continue
+        
+        # Move to next character
+        col += 1
+        i += 1
+
+
+
+def batched_highlight(text_widget, json_text):
+    """What JSONEditor._apply_json_syntax_highlighting does now"""
+    for tag in text_widget.tag_names():
+        text_widget.tag_remove(tag, "1.0", "end")
+    for tag, indices in highlight_ranges(json_text).items():
+        text_widget.tag_add(tag, *indices)
+
+
+class RecordingText:
+    """Just enough of tk.Text to collect the ranges each highlighter adds"""
+
+    def __init__(self):
+        self.ranges = {}
+        self.calls = 0
+
+    def tag_names(self):
+        return list(self.ranges)
+
+    def tag_remove(self, tag, start, end):
+        self.ranges.pop(tag, None)
+
+    def tag_add(self, tag, *indices):
+        self.calls += 1
+        self.ranges.setdefault(tag, []).extend(indices)
+
+
+def make_document(lines):
+    """A record shaped like the editor's data, dumped to roughly `lines` lines"""
+    rng = random.Random(1)
+    obj = {}
+    i = 0
+    while len(obj) * 20 < lines:
+        obj[f"item_{i}"] = {
+            "name": f"Name \"{i}\"",
+            "count": rng.randint(-1000, 1000),
+            "ratio": rng.random(),
+            "active": rng.random() < 0.5,
+            "parent": None,
+            "tags": ["a", "b"],
+            "meta": {"nested": [1, 2.5, {"deep": "x"}]},
+        }
+        i += 1
+    return json.dumps(obj, indent=2)
+
+
+def timed(func, widget_factory, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        widget = widget_factory()
+        start = time.perf_counter()
+        func(widget, text)
+        best = min(best, time.perf_counter() - start)
+    return best, widget
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=50000, help="approximate preview size")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = parser.parse_args()
+
+    text = make_document(args.lines)
+    print(f"document: {text.count(chr(10)) + 1} lines, {len(text)} chars")
+
+    legacy_time, legacy = timed(legacy_highlight, RecordingText, text, args.repeat)
+    batched_time, batched = timed(batched_highlight, RecordingText, text, args.repeat)
+    same = {t: sorted(v) for t, v in legacy.ranges.items()} == {t: sorted(v) for t, v in batched.ranges.items()}
+    print(f"ranges identical: {same}")
+    print(f"recording widget  legacy {legacy_time * 1000:8.1f} ms ({legacy.calls} tag_add calls)"
+          f"  batched {batched_time * 1000:8.1f} ms ({batched.calls} tag_add calls)")
+
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        print(f"tk.Text: skipped ({e})")
+        return 0 if same else 1
+    root.withdraw()
+
+    def real_text():
+        widget = tk.Text(root)
+        widget.insert("1.0", text)
+        return widget
+
+    legacy_time, _ = timed(legacy_highlight, real_text, text, args.repeat)
+    batched_time, _ = timed(batched_highlight, real_text, text, args.repeat)
+    print(f"tk.Text           legacy {legacy_time * 1000:8.1f} ms"
+          f"  batched {batched_time * 1000:8.1f} ms")
+    root.destroy()
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
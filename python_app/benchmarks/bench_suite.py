@@ -0,0 +1,316 @@
+"""Benchmark suite for the editor's hot paths, with JSON results compared to a baseline.
+
+Run from python_app/:
+  python benchmarks/bench_suite.py [--sizes 1000,10000] [--shapes mixed,flat]
+                                   [--output results.json] [--baseline FILE] [--save-baseline]
+
+Data-layer benchmarks (load, validation, field sync, preview text and
+highlighting, navigation, search index, filter, save) need no display.
+Tk-layer benchmarks drive a real JSONEditor window: they run when a
+display is available, starting Xvfb for one if it is installed, and are
+skipped otherwise. Datasets come from datagen.py.
+
+Each result is the median of --repeat runs in seconds, keyed by
+"benchmark/shape/records". With a baseline (benchmarks/baseline.json by
+default, written by --save-baseline) results slower by more than
+--threshold are reported and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from coercion import coerce_value, same_value
+from datagen import SHAPES, write_dataset
+from edit_log import remove_log
+from json_preview import dumps_with_spans, highlight_ranges
+from record_filter import RecordFilter
+from record_store import RecordStore, validate_records
+from search_index import SearchIndex
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+SAMPLE = 200  # records used by the per-record benchmarks
+NAVIGATE_STEPS = 50
+NOISE_SECONDS = 0.005  # differences smaller than this are never regressions
+LAZY_HIGHLIGHT_LINES = 2000  # as in json_editor; not imported to keep the data layer GUI-free
+
+
+def timed(function, repeat, setup=None):
+    """Seconds taken by each of repeat calls of function(setup())"""
+    runs = []
+    for _ in range(repeat):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        function(argument)
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def _leaves(obj, path=()):
+    for key, value in obj.items():
+        if isinstance(value, dict):
+            yield from _leaves(value, path + (key,))
+        else:
+            yield path + (key,), value
+
+
+def sync_fields(objects):
+    """The per-field work of _update_memory_from_ui: coerce each field's text and compare"""
+    for obj in objects:
+        for path, value in _leaves(obj):
+            typed = coerce_value(str(value), type(value), True)
+            same_value(value, typed)
+
+
+def data_benchmarks(path, records, repeat):
+    """(name, runs) for the data layer on the dataset at path"""
+    results = []
+    store = RecordStore.open(path)
+    step = max(records // SAMPLE, 1)
+    sample = [store[i] for i in range(0, records, step)]
+    texts = [dumps_with_spans(obj)[0] for obj in sample]
+    filter_expression = f"id >= {records // 2}"
+
+    results.append(("load", timed(lambda _: RecordStore.open(path).close(), repeat)))
+    results.append(("validate", timed(lambda fresh: (validate_records(fresh), fresh.close()), repeat,
+                                      setup=lambda: RecordStore.open(path))))
+    results.append(("sync", timed(lambda _: sync_fields(sample), repeat)))
+    results.append(("preview", timed(lambda _: [dumps_with_spans(obj) for obj in sample], repeat)))
+    results.append(("highlight", timed(lambda _: [highlight_ranges(text) for text in texts], repeat)))
+
+    def navigate(fresh):
+        # What showing a record costs before Tk: decode it, dump the preview, highlight
+        for i in range(min(NAVIGATE_STEPS, records)):
+            text, spans = dumps_with_spans(fresh[i])
+            if text.count("\n") + 1 <= LAZY_HIGHLIGHT_LINES:
+                highlight_ranges(text)
+        fresh.close()
+    results.append(("navigate", timed(navigate, repeat, setup=lambda: RecordStore.open(path))))
+    results.append(("search_index", timed(lambda _: SearchIndex.build(store.snapshot()), repeat)))
+    results.append(("filter", timed(lambda _: RecordFilter(filter_expression).run(store), repeat)))
+
+    directory = tempfile.mkdtemp(prefix="bench-save-")
+    try:
+        def edited_copy():
+            copy_path = os.path.join(directory, "copy.json")
+            shutil.copyfile(path, copy_path)
+            copy = RecordStore.open(copy_path)
+            for i in range(0, records, 100):  # 1% of the records
+                copy[i]["id"] = -i
+                copy.mark_dirty(i)
+            return copy
+
+        def save(copy):
+            copy.save()
+            copy.close()
+        results.append(("save", timed(save, repeat, setup=edited_copy)))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    store.close()
+    return results
+
+
+def start_display():
+    """Make sure Tk has a display: (available, Xvfb process to stop or None)"""
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        return True, None
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        return False, None
+    for number in range(99, 120):
+        if os.path.exists(f"/tmp/.X{number}-lock"):
+            continue
+        process = subprocess.Popen([xvfb, f":{number}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(50):
+            if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+                os.environ["DISPLAY"] = f":{number}"
+                return True, process
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+        process.kill()
+    return False, None
+
+
+def tk_benchmarks(path, records, repeat):
+    """(name, runs) for the window's own methods; needs a display.
+
+    The editor's config file and schema cache go next to the dataset, and
+    are removed afterwards with the edit log, so the user's own are untouched.
+    """
+    import json_editor  # GUI toolkit, only loaded when there is a display
+    import schema
+
+    # Confirmation dialogs would block: answer them as a user saving would
+    json_editor.messagebox.askyesno = lambda *args, **kwargs: True
+    json_editor.messagebox.showinfo = lambda *args, **kwargs: None
+    directory = os.path.dirname(os.path.abspath(path))
+    saved = json_editor.CONFIG_FILE, schema.CACHE_DIR
+    json_editor.CONFIG_FILE = os.path.join(directory, "json_editor_config.json")
+    schema.CACHE_DIR = os.path.join(directory, "schema-cache")
+    try:
+        return _run_tk_benchmarks(json_editor, path, records, repeat)
+    finally:
+        json_editor.CONFIG_FILE, schema.CACHE_DIR = saved
+        remove_log(path)
+        shutil.rmtree(os.path.join(directory, "schema-cache"), ignore_errors=True)
+        try:
+            os.remove(os.path.join(directory, "json_editor_config.json"))
+        except FileNotFoundError:
+            pass
+
+
+def _run_tk_benchmarks(json_editor, path, records, repeat):
+    app = json_editor.JSONEditor()
+    for job in app.tk.call("after", "info"):
+        app.after_cancel(job)  # the startup file dialog
+    app.update()
+
+    def pump_until(condition, timeout=600):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            app.update()
+            time.sleep(0.005)
+
+    def load(_):
+        app.filepath = None
+        app.load_specific_file(path)
+        pump_until(lambda: app.filepath == path)
+        app.update_idletasks()
+
+    results = [("tk.load", timed(load, repeat))]
+    results.append(("tk.validate", timed(lambda _: app.validate_json(app.data), repeat)))
+
+    def display(_):
+        app.display_current_object()
+        app.update_idletasks()
+    results.append(("tk.display", timed(display, repeat)))
+
+    def navigate(_):
+        app.current_index = 0
+        app.display_current_object()
+        for _ in range(min(NAVIGATE_STEPS, records - 1)):
+            app.navigate_next()
+            app.update()
+    results.append(("tk.navigate", timed(navigate, repeat)))
+
+    results.append(("tk.sync", timed(lambda _: app._update_memory_from_ui(), repeat)))
+    results.append(("tk.preview", timed(lambda _: (app.update_json_preview(), app.update_idletasks()), repeat)))
+    text = app.txt_preview.get("1.0", "end-1c")
+    results.append(("tk.highlight", timed(lambda _: app._apply_json_syntax_highlighting(text), repeat)))
+
+    def save(_):
+        app.data.mark_dirty(app.current_index, app.data[app.current_index])
+        app.save_changes()
+        pump_until(lambda: app._save_job is None)
+    results.append(("tk.save", timed(save, repeat)))
+
+    app.on_closing()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print each result next to its baseline; returns the keys that regressed"""
+    regressions = []
+    for key, result in results.items():
+        seconds = result["seconds"]
+        old = baseline.get(key, {}).get("seconds")
+        if old is None:
+            print(f"{key:<36} {seconds * 1000:10.2f} ms", file=sys.stderr)
+            continue
+        ratio = seconds / old if old else float("inf")
+        flag = ""
+        if ratio > threshold and seconds - old > NOISE_SECONDS:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<36} {seconds * 1000:10.2f} ms  baseline {old * 1000:10.2f} ms  x{ratio:5.2f}{flag}",
+              file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma-separated record counts (up to 1000000)")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help=f"comma-separated, from {', '.join(SHAPES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the median is reported")
+    parser.add_argument("--tk", choices=("auto", "never"), default="auto",
+                        help="run the Tk-layer benchmarks when a display (or Xvfb) is available")
+    parser.add_argument("--tk-max-records", type=int, default=100000,
+                        help="largest dataset the Tk-layer benchmarks run on")
+    parser.add_argument("--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="results JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    shapes = [shape.strip() for shape in args.shapes.split(",")]
+    if not set(shapes) <= set(SHAPES):
+        parser.error(f"unknown shape in {args.shapes!r}")
+
+    display, xvfb = start_display() if args.tk == "auto" else (False, None)
+    if args.tk == "auto" and not display:
+        print("Tk benchmarks skipped: no display and no Xvfb", file=sys.stderr)
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="bench-suite-")
+    try:
+        for shape in shapes:
+            for records in sizes:
+                path = os.path.join(workdir, f"{shape}-{records}.json")
+                size = write_dataset(path, records, shape)
+                print(f"{shape} x {records}: {size / 1e6:.1f} MB", file=sys.stderr)
+                suites = [data_benchmarks]
+                if display and records <= args.tk_max_records:
+                    suites.append(tk_benchmarks)
+                for suite in suites:
+                    for name, runs in suite(path, records, args.repeat):
+                        results[f"{name}/{shape}/{records}"] = {"seconds": statistics.median(runs), "runs": runs}
+                os.remove(path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if xvfb is not None:
+            xvfb.terminate()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline, args.threshold)
+
+    document = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+            "tk": bool(display),
+        },
+        "results": results,
+        "regressions": regressions,
+    }
+    text = json.dumps(document, indent=2) + "\n"
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    elif not args.save_baseline:
+        sys.stdout.write(text)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Synthetic JSON arrays of objects for benchmarking.
+
+Run from python_app/:  python benchmarks/datagen.py OUT.json [--records N] [--shape SHAPE]
+
+Shapes:
+  flat     wide objects of 40 scalar properties
+  deep     nested sections 6 levels down
+  strings  a few properties holding long text
+  mixed    realistic export rows: ints, floats, bools, nulls, enums, tags, sections
+
+Output is deterministic for a seed and written record by record, so
+millions of records don't need to fit in memory.
+"""
+import argparse
+import json
+import random
+import sys
+
+SHAPES = ("flat", "deep", "strings", "mixed")
+_WORDS = ("alpha beta gamma delta epsilon zeta eta theta iota kappa lambda sigma "
+          "omega north south east west red green blue amber cloud river stone").split()
+_STATUSES = ("active", "inactive", "pending", "failed", "archived")
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def _flat(rng, i):
+    obj = {"id": i}
+    for n in range(13):
+        obj[f"int_{n}"] = rng.randrange(100000)
+        obj[f"str_{n}"] = _sentence(rng, 2)
+        obj[f"num_{n}"] = round(rng.random() * 1000, 3)
+    obj["enabled"] = rng.random() < 0.5
+    obj["status"] = rng.choice(_STATUSES)
+    return obj
+
+
+def _deep(rng, i, depth=6):
+    def section(level):
+        node = {"name": _sentence(rng, 1), "weight": rng.randrange(100), "enabled": rng.random() < 0.5}
+        if level < depth:
+            node["child"] = section(level + 1)
+            if level % 2 == 0:
+                node["sibling"] = section(level + 2) if level + 2 <= depth else {"leaf": True}
+        return node
+    return {"id": i, "root": section(1)}
+
+
+def _strings(rng, i):
+    return {
+        "id": i,
+        "title": _sentence(rng, 8),
+        "summary": _sentence(rng, 60),
+        "body": _sentence(rng, 400),
+        "notes": _sentence(rng, 120),
+    }
+
+
+def _mixed(rng, i):
+    return {
+        "id": i,
+        "name": f"{rng.choice(_WORDS)}-{rng.randrange(10000)}",
+        "status": rng.choice(_STATUSES),
+        "score": None if rng.random() < 0.1 else round(rng.random() * 100, 2),
+        "count": rng.randrange(1000),
+        "verified": rng.random() < 0.7,
+        "tags": rng.sample(_WORDS, rng.randrange(4)),
+        "description": _sentence(rng, rng.randrange(3, 30)),
+        "meta": {
+            "retries": rng.randrange(5),
+            "owner": rng.choice(_WORDS),
+            "created": f"2024-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+            "limits": {"cpu": rng.choice((0.5, 1, 2, 4)), "memory": rng.choice((256, 512, 1024))},
+        },
+    }
+
+
+_GENERATORS = {"flat": _flat, "deep": _deep, "strings": _strings, "mixed": _mixed}
+
+
+def generate(count, shape="mixed", seed=0):
+    """Yield count records of a shape"""
+    rng = random.Random(seed)
+    make = _GENERATORS[shape]
+    for i in range(count):
+        yield make(rng, i)
+
+
+def write_dataset(path, count, shape="mixed", seed=0):
+    """Write a dataset formatted the way the editor saves (indent 2); returns its size in bytes"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[\n")
+        for i, obj in enumerate(generate(count, shape, seed)):
+            if i:
+                f.write(",\n")
+            text = json.dumps(obj, indent=2, ensure_ascii=False)
+            f.write("  " + text.replace("\n", "\n  "))
+        f.write("\n]\n")
+        return f.tell()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output")
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--shape", choices=SHAPES, default="mixed")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    size = write_dataset(args.output, args.records, args.shape, args.seed)
+    print(f"{args.output}: {args.records} {args.shape} records, {size / 1e6:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
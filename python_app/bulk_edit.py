@@ -0,0 +1,126 @@
+import math
+
+import json_codec
+from coercion import coerce_value, same_value
+from patches import ABSENT, get_path
+
+OPERATIONS = ("Set", "Rename", "Delete", "Transform")
+_PROGRESS_EVERY = 5000
+
+# What a transform expression can use besides `value`
+_TRANSFORM_GLOBALS = {
+    "__builtins__": {},
+    "true": True, "false": False, "null": None,
+    "str": str, "int": int, "float": float, "bool": bool, "len": len,
+    "abs": abs, "round": round, "min": min, "max": max, "sorted": sorted,
+    "math": math,
+}
+
+
+class BulkEditError(ValueError):
+    pass
+
+
+def _missing_prefix(obj, path):
+    """Length of the shortest prefix of path that is absent from obj, or None if a parent is not an object"""
+    for depth, key in enumerate(path, 1):
+        if key not in obj:
+            return depth
+        obj = obj[key]
+        if depth < len(path) and not isinstance(obj, dict):
+            return None
+    return len(path)
+
+
+def compile_transform(expression):
+    """A function value -> new value for a Python expression over `value`, e.g. value.upper()"""
+    try:
+        code = compile(expression, "<transform>", "eval")
+    except SyntaxError as e:
+        raise BulkEditError(f"Invalid expression: {e.msg}") from None
+    return lambda value: eval(code, _TRANSFORM_GLOBALS, {"value": value})
+
+
+def plan_bulk_edit(records, operation, path, argument, indices=None, progress=None, cancelled=None):
+    """The changes (see patches.py) that apply one bulk edit, without modifying records.
+
+    operation is one of OPERATIONS and path a key tuple. argument is the
+    value text for Set (coerced to each record's existing type the way the
+    form does), the new key for Rename and the expression for Transform.
+    Only records[i] for i in indices are visited if indices is given.
+    Returns (changes, skipped), or None if cancelled; skipped counts records
+    the edit couldn't apply to, e.g. a Transform that raised.
+    """
+    if not path:
+        raise BulkEditError("Enter the path of the field to edit")
+    transform = compile_transform(argument) if operation == "Transform" else None
+    if operation == "Rename" and not argument:
+        raise BulkEditError("Enter the new property name")
+
+    if indices is None:
+        items = enumerate(records)
+        total = len(records)
+    else:
+        items = ((i, records[i]) for i in indices)
+        total = len(indices)
+    changes = []
+    skipped = 0
+    for done, (i, obj) in enumerate(items, 1):
+        if done % _PROGRESS_EVERY == 0:
+            if cancelled is not None and cancelled():
+                return None
+            if progress is not None:
+                progress(done, total)
+
+        old = get_path(obj, path)
+        # Delete and Rename replace the parent object with a rebuilt one,
+        # so undoing them puts the property back in its original position
+        if operation == "Delete":
+            if old is not ABSENT:
+                parent = get_path(obj, path[:-1])
+                changes.append((i, path[:-1], parent, {key: value for key, value in parent.items() if key != path[-1]}))
+            continue
+        if operation == "Rename":
+            if old is ABSENT or argument == path[-1]:
+                continue
+            parent = get_path(obj, path[:-1])
+            if argument in parent:
+                skipped += 1 # Would overwrite another property
+                continue
+            renamed = {(argument if key == path[-1] else key): value for key, value in parent.items()}
+            changes.append((i, path[:-1], parent, renamed))
+            continue
+
+        if isinstance(old, dict):
+            skipped += 1 # Sections aren't edited as a value
+            continue
+        if operation == "Set":
+            if old is ABSENT:
+                depth = _missing_prefix(obj, path)
+                if depth is None:
+                    skipped += 1 # A parent on the path is not an object
+                    continue
+                # New properties are parsed like in the Add Property dialog
+                try:
+                    new = json_codec.loads(argument)
+                except ValueError:
+                    new = argument
+                # Missing parents are created as part of the same change
+                for key in reversed(path[depth:]):
+                    new = {key: new}
+                changes.append((i, path[:depth], ABSENT, new))
+                continue
+            else:
+                new = coerce_value(argument, type(old))
+        else:
+            if old is ABSENT:
+                continue
+            try:
+                new = transform(old)
+                json_codec.dumps(new)
+            except Exception:
+                skipped += 1
+                continue
+        if old is ABSENT or not same_value(old, new):
+            changes.append((i, path, old, new))
+    return changes, skipped
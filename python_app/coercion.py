@@ -0,0 +1,64 @@
+import ast
+
+import json_codec
+
+
+def field_text(value):
+    """The text a form field shows for value; coerce_value() reads it back unchanged"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return json_codec.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _parse_list(raw_value):
+    """A list typed as JSON or, as the form used to show lists, as a Python literal"""
+    try:
+        return json_codec.loads(raw_value)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(raw_value)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return raw_value
+
+
+def coerce_value(raw_value, original_type, silent=False):
+    """Convert the text of a form field back to the type the field originally had"""
+    # Type preservation
+    try:
+        if original_type is bool:
+            if raw_value.lower() == 'true': return True
+            elif raw_value.lower() == 'false': return False
+            else: return bool(raw_value)
+        elif original_type is int:
+            try:
+                return int(raw_value)
+            except ValueError:
+                 return 0 if silent else int(raw_value) # Fallback during typing
+        elif original_type is float:
+            try:
+                 return float(raw_value)
+            except ValueError:
+                 return 0.0 if silent else float(raw_value)
+        elif original_type is list:
+            value = _parse_list(raw_value)
+            return value if isinstance(value, list) else raw_value # Fallback
+        elif original_type is type(None):
+            if raw_value.strip().lower() in ('null', 'none'): return None
+            else: return raw_value
+        else:
+            return raw_value
+    except ValueError:
+        # If silent (e.g. typing "12" but curr "1"), don't crash.
+        # For live preview we want to see what we type, so anything that
+        # doesn't convert is kept as the string.
+        return raw_value
+
+
+def same_value(a, b):
+    """Equality that also tells 1, 1.0 and True apart"""
+    return type(a) is type(b) and a == b
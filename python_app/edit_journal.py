@@ -0,0 +1,98 @@
+import sys
+import time
+from collections import deque
+
+from patches import ABSENT, inverse
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+COALESCE_SECONDS = 1.0  # edits to one field closer together than this are one undo step
+
+
+def approx_size(value):
+    """Rough bytes held by a JSON value, cheap enough to run on every edit"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(len(key) + 49 + approx_size(child) for key, child in value.items())
+    if isinstance(value, list):
+        return sys.getsizeof(value) + sum(approx_size(child) for child in value)
+    if value is ABSENT:
+        return 0
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("label", "changes", "size", "time", "key")
+
+    def __init__(self, label, changes, key):
+        self.label = label
+        self.changes = changes
+        self.key = key
+        self.time = time.monotonic()
+        self.size = sum(approx_size(old) + approx_size(new) + 100 for _, _, old, new in changes)
+
+
+class EditJournal:
+    """Undo/redo history of edits, one step per user action.
+
+    A step is a list of changes (see patches.py); undo hands back their
+    inverse for the caller to apply, redo the changes themselves. Only the
+    changed values are kept, never whole snapshots, and once the steps add
+    up to more than max_bytes the oldest are forgotten.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._undo = deque()
+        self._redo = []
+        self._bytes = 0
+
+    @property
+    def size_bytes(self):
+        """Approximate memory held by the undo and redo steps"""
+        return self._bytes
+
+    def clear(self):
+        self._undo = deque()
+        self._redo = []
+        self._bytes = 0
+
+    def record(self, changes, label, coalesce_key=None):
+        """Add a step; with a coalesce_key, a quick repeat of the last step's key extends it instead.
+
+        Coalesced steps must be single changes to the same record and path
+        (e.g. keystrokes in one field): the first old and the latest new
+        value are kept.
+        """
+        if not changes:
+            return
+        self._bytes -= sum(entry.size for entry in self._redo)
+        self._redo = []
+        last = self._undo[-1] if self._undo else None
+        if (coalesce_key is not None and last is not None and last.key == coalesce_key
+                and time.monotonic() - last.time < COALESCE_SECONDS):
+            record, path, old, _ = last.changes[0]
+            self._bytes -= last.size
+            merged = _Entry(last.label, [(record, path, old, changes[-1][3])], coalesce_key)
+            self._undo[-1] = merged
+            self._bytes += merged.size
+        else:
+            entry = _Entry(label, changes, coalesce_key)
+            self._undo.append(entry)
+            self._bytes += entry.size
+        while self._bytes > self.max_bytes and len(self._undo) > 1:
+            self._bytes -= self._undo.popleft().size
+
+    def undo(self):
+        """(label, changes to apply) for the last step, or None"""
+        if not self._undo:
+            return None
+        entry = self._undo.pop()
+        entry.key = None # An undone step is never extended again
+        self._redo.append(entry)
+        return entry.label, inverse(entry.changes)
+
+    def redo(self):
+        if not self._redo:
+            return None
+        entry = self._redo.pop()
+        self._undo.append(entry)
+        return entry.label, entry.changes
@@ -0,0 +1,342 @@
+import copy
+import os
+import queue
+import re
+import threading
+import time
+
+import json_codec
+from patches import ABSENT, apply_changes, get_path, inverse
+
+LOG_VERSION = 1
+BATCH_SECONDS = 0.2  # operations arriving within this window share one write and fsync
+_NOTHING = object()
+_ARRAY_INDEX = re.compile(r"0|[1-9][0-9]*")
+
+
+class PatchError(ValueError):
+    """A JSON Patch operation that doesn't fit the records it is applied to"""
+
+
+def log_path(path):
+    """The sidecar log next to the JSON file at path"""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{name}.edits")
+
+
+def remove_log(path):
+    try:
+        os.remove(log_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _escape(key):
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def to_operation(change):
+    """The JSON Patch (RFC 6902) operation for a change (see patches.py), as a dict"""
+    record, path, old, new = change
+    pointer = "/" + "/".join(_escape(key) for key in (record,) + path)
+    if new is ABSENT:
+        return {"op": "remove", "path": pointer}
+    return {"op": "add" if old is ABSENT else "replace", "path": pointer, "value": new}
+
+
+def read_log(path):
+    """(header, operations) logged for the JSON file at path, or None if there is no log.
+
+    operations are (op, record, path tuple, value) with value ABSENT for
+    removals. A line cut short by a crash is skipped.
+    """
+    try:
+        with open(log_path(path), 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return None
+    try:
+        header = json_codec.loads(lines[0])
+    except (IndexError, ValueError):
+        return None
+    if header.get("edit_log") != LOG_VERSION:
+        return None
+    operations = []
+    for line in lines[1:]:
+        try:
+            operations.append(parse_operation(json_codec.loads(line)))
+        except ValueError:
+            continue
+    return header, operations
+
+
+def _split_operation(operation):
+    """(op, pointer tokens, value) of a JSON Patch operation dict, value ABSENT if it has none"""
+    try:
+        pointer = operation["path"]
+        if pointer and not pointer.startswith("/"):
+            raise ValueError(pointer)
+        tokens = [_unescape(token) for token in pointer.split("/")[1:]]
+        return operation["op"], tokens, operation.get("value", ABSENT)
+    except (KeyError, AttributeError, TypeError, ValueError):
+        raise PatchError(f"Invalid patch operation: {json_codec.dumps(operation)[:200]}") from None
+
+
+def parse_operation(operation):
+    """(op, record, path tuple, value) for a JSON Patch operation dict on the records array"""
+    op, tokens, value = _split_operation(operation)
+    try:
+        return op, int(tokens[0]), tuple(tokens[1:]), value
+    except (IndexError, ValueError):
+        raise PatchError(f"Invalid patch operation: {json_codec.dumps(operation)[:200]}") from None
+
+
+def matches_base(header, path):
+    """Whether the file at path is still the one the log was started on"""
+    try:
+        stamp = _stamp(path)
+    except OSError:
+        return False
+    return header.get("size") == stamp["size"] and header.get("mtime_ns") == stamp["mtime_ns"]
+
+
+def replay(data, operations):
+    """Apply logged operations to a RecordStore; returns them as changes, for the undo journal.
+
+    If an operation doesn't fit the records (e.g. the file changed since),
+    the ones already applied are rolled back and the error re-raised.
+    """
+    changes = []
+    try:
+        for op, record, path, value in operations:
+            if path:
+                old = get_path(data[record], path)
+            elif op == "add":
+                old = ABSENT
+            else:
+                old = data[record]
+            if op not in ("add", "replace", "remove"):
+                raise ValueError(f"Unsupported operation {op!r}")
+            change = (record, path, old, ABSENT if op == "remove" else value)
+            apply_changes(data, [change])
+            changes.append(change)
+    except Exception:
+        apply_changes(data, inverse(changes))
+        raise
+    return changes
+
+
+
+def _array_index(token, items, op):
+    """The list position token names in items: '-' (for add) is the end, as RFC 6901 has it"""
+    if op == "add" and token == "-":
+        return len(items)
+    if not _ARRAY_INDEX.fullmatch(token):
+        raise PatchError(f"{token!r} is not an array index")
+    index = int(token)
+    if index > len(items) or (index == len(items) and op != "add"):
+        raise PatchError(f"array index {index} is out of range")
+    return index
+
+
+def _apply_strict(obj, tokens, op, value):
+    """Apply op at tokens within obj in place, as RFC 6902 requires: the parent must exist,
+    and the target too unless adding"""
+    for token in tokens[:-1]:
+        if isinstance(obj, dict):
+            if token not in obj:
+                raise PatchError(f"no member {token!r}")
+            obj = obj[token]
+        elif isinstance(obj, list):
+            obj = obj[_array_index(token, obj, "replace")]
+        else:
+            raise PatchError(f"can't look up {token!r} in a {type(obj).__name__} value")
+    last = tokens[-1]
+    if isinstance(obj, dict):
+        if op != "add" and last not in obj:
+            raise PatchError(f"no member {last!r} to {op}")
+        if op == "remove":
+            del obj[last]
+        else:
+            obj[last] = value
+    elif isinstance(obj, list):
+        index = _array_index(last, obj, op)
+        if op == "add":
+            obj.insert(index, value)
+        elif op == "remove":
+            del obj[index]
+        else:
+            obj[index] = value
+    else:
+        raise PatchError(f"can't look up {last!r} in a {type(obj).__name__} value")
+
+
+def apply_patch(data, operations):
+    """Apply JSON Patch operation dicts to a RecordStore strictly; returns them as changes.
+
+    Unlike replay(), which repairs its way through the editor's own log,
+    every operation must fit the records exactly: replace and remove need
+    an existing target, add an existing parent, array indices must be in
+    range ('-' appends). The first that doesn't raises PatchError, after
+    the ones already applied are rolled back.
+    """
+    changes = []
+    try:
+        for number, operation in enumerate(operations, 1):
+            op, tokens, value = _split_operation(operation)
+            if op not in ("add", "replace", "remove"):
+                raise PatchError(f"operation {number}: unsupported op {op!r}")
+            if op != "remove" and value is ABSENT:
+                raise PatchError(f"operation {number}: {op} needs a value")
+            try:
+                if not tokens:
+                    raise PatchError("the records array itself can't be patched")
+                record = _array_index(tokens[0], range(len(data)), op)
+                if len(tokens) == 1:
+                    if op != "remove" and not isinstance(value, dict):
+                        raise PatchError("records must be objects")
+                    change = (record, (), ABSENT if op == "add" else data[record],
+                              ABSENT if op == "remove" else value)
+                else:
+                    if record == len(data):
+                        raise PatchError(f"array index {record} is out of range")
+                    updated = copy.deepcopy(data[record])
+                    _apply_strict(updated, tokens[1:], op, value)
+                    change = (record, (), data[record], updated)
+            except PatchError as e:
+                raise PatchError(f"operation {number} ({op} {operation['path']}): {e}") from None
+            apply_changes(data, [change])
+            changes.append(change)
+    except Exception:
+        apply_changes(data, inverse(changes))
+        raise
+    return changes
+
+
+class EditLog:
+    """Append-only sidecar log of the edits made to one file since it was last saved.
+
+    append() serializes changes as JSON Patch operations on the UI thread,
+    one per line; a worker thread writes them out and fsyncs in batches, so
+    the cost of protecting unsaved work scales with the edits, not the file.
+    The first line records the size and mtime of the file the operations
+    apply to. After a save, rebase() drops the operations the save covered.
+    """
+
+    def __init__(self, path, logged=0):
+        self.path = path
+        self.log_path = log_path(path)
+        self.error = None  # last write error, if any
+        self._stamp = _stamp(path)
+        self._appended = logged  # operations handed to append(), including those already in the log
+        self._queue = queue.Queue()
+        self._thread = None
+        # Worker state: the open log, operations written through it so far
+        # and how many of those came before the log's first line
+        self._file = None
+        self._written = logged
+        self._first = 0
+
+    def append(self, changes):
+        lines = [json_codec.dumps(to_operation(change), ensure_ascii=False) + "\n" for change in changes]
+        if not lines:
+            return
+        self._appended += len(lines)
+        self._put(("ops", lines))
+
+    def checkpoint(self):
+        """A mark for rebase(): the number of operations appended so far"""
+        return self._appended
+
+    def rebase(self, mark):
+        """The file was saved with everything appended before mark; keep only the operations after it"""
+        self._put(("rebase", mark))
+
+    def close(self):
+        """Write out what is queued and stop the worker; the log file stays"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _put(self, item):
+        self._queue.put(item)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work, daemon=True)
+            self._thread.start()
+
+    def _work(self):
+        item = self._queue.get()
+        while item is not None:
+            kind, payload = item
+            after = _NOTHING  # item taken off the queue while collecting a batch
+            try:
+                if kind == "ops":
+                    lines = payload
+                    deadline = time.monotonic() + BATCH_SECONDS
+                    while True:
+                        try:
+                            after = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                        except queue.Empty:
+                            break
+                        if after is None or after[0] != "ops":
+                            break
+                        lines.extend(after[1])
+                        after = _NOTHING
+                    if self._file is None:
+                        self._file = self._open()
+                    self._file.write("".join(lines).encode('utf-8'))
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                    self._written += len(lines)
+                else:
+                    if self._file is not None:
+                        self._file.close()
+                        self._file = None
+                    self._rewrite(payload - self._first, self._written - payload)
+                    self._first = payload
+            except OSError as e:
+                self.error = e
+            item = self._queue.get() if after is _NOTHING else after
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self):
+        """The log opened for appending, started with a header if it is new"""
+        f = open(self.log_path, 'ab+')
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            f.write((json_codec.dumps({"edit_log": LOG_VERSION, **self._stamp}) + "\n").encode('utf-8'))
+        else:
+            f.seek(max(size - 65536, 0))
+            tail = f.read()
+            if not tail.endswith(b"\n"):
+                # Drop a line cut short by a crash rather than continue it
+                f.truncate(size - len(tail) + tail.rfind(b"\n") + 1)
+        return f
+
+    def _rewrite(self, drop, keep):
+        """Drop the first drop operations of the log, re-stamped against the file as saved"""
+        self._stamp = _stamp(self.path)
+        if keep <= 0:
+            remove_log(self.path)
+            return
+        with open(self.log_path, 'rb') as f:
+            lines = f.readlines()[1 + drop:]
+        tmp_path = self.log_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write((json_codec.dumps({"edit_log": LOG_VERSION, **self._stamp}) + "\n").encode('utf-8'))
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
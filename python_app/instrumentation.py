@@ -0,0 +1,117 @@
+import json
+import os
+import platform
+import sys
+import time
+from array import array
+
+RING_SIZE = 512  # latest samples kept per phase
+
+
+def process_memory():
+    """Resident memory of this process in bytes, or None where it can't be read cheaply"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak rather than current
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _Ring:
+    __slots__ = ("samples", "next", "total")
+
+    def __init__(self, size):
+        self.samples = array('d', bytes(8 * size))
+        self.next = 0
+        self.total = 0  # samples ever recorded
+
+    def add(self, value):
+        self.samples[self.next] = value
+        self.next = (self.next + 1) % len(self.samples)
+        self.total += 1
+
+    def values(self):
+        return self.samples[:min(self.total, len(self.samples))]
+
+
+class Profiler:
+    """Latency of named phases (display, form, preview, ...) and gauges like widget count.
+
+    Each phase keeps its latest RING_SIZE samples, so percentiles describe
+    recent behaviour and memory stays fixed however long the session runs.
+    instrument() times existing methods of an object by wrapping them on
+    that instance only; nothing is paid when no Profiler is attached.
+    """
+
+    def __init__(self, ring_size=RING_SIZE):
+        self.ring_size = ring_size
+        self._rings = {}  # phase -> _Ring of seconds
+        self._active = {}  # phase -> nesting depth of calls being timed
+        self.gauges = {}
+
+    def record(self, phase, seconds):
+        ring = self._rings.get(phase)
+        if ring is None:
+            ring = self._rings[phase] = _Ring(self.ring_size)
+        ring.add(seconds)
+
+    def instrument(self, obj, phases):
+        """Time obj's methods as phases ({method name: phase}); calls nested in one of the same phase count once"""
+        for name, phase in phases.items():
+            setattr(obj, name, self._timed(getattr(obj, name), phase))
+
+    def _timed(self, method, phase):
+        active = self._active
+
+        def timed(*args, **kwargs):
+            depth = active.get(phase, 0)
+            if depth:
+                return method(*args, **kwargs)
+            active[phase] = 1
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(phase, time.perf_counter() - start)
+                active[phase] = 0
+        return timed
+
+    def percentiles(self, phase):
+        """{"count", "p50", "p95", "p99", "max"} in milliseconds for a phase, or None if it never ran"""
+        ring = self._rings.get(phase)
+        if ring is None:
+            return None
+        values = sorted(ring.values())
+        last = len(values) - 1
+        stats = {"count": ring.total}
+        for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            stats[name] = round(values[min(round(q * last), last)] * 1000, 3)
+        stats["max"] = round(values[-1] * 1000, 3)
+        return stats
+
+    def phases(self):
+        return list(self._rings)
+
+    def summary(self):
+        return {"phases": {phase: self.percentiles(phase) for phase in self._rings},
+                "gauges": dict(self.gauges)}
+
+    def dump(self, path, **context):
+        """Write summary() and raw samples to path as JSON, with context (e.g. the file being edited)"""
+        document = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **context,
+            **self.summary(),
+            "samples_ms": {phase: [round(value * 1000, 3) for value in ring.values()]
+                           for phase, ring in self._rings.items()},
+        }
+        with open(path, 'w') as f:
+            json.dump(document, f, indent=2)
@@ -0,0 +1,219 @@
+"""Edit JSON arrays of objects (or JSON Lines) from scripts, with the editor's load, edit and save code.
+
+  python json_cli.py validate data.json
+  python json_cli.py query data.json 'status == "active" and meta.retries > 3' --count
+  python json_cli.py bulk data.json set meta.retries 0 --where 'status == "failed"'
+  python json_cli.py patch data.json changes.json
+  python json_cli.py gui [data.json]
+
+Files are edited in place the way the editor saves them: only changed
+records are re-serialized and the result is renamed over the original.
+Nothing here imports the GUI toolkit unless the window is opened.
+"""
+import argparse
+import json
+import sys
+
+import json_codec
+from bulk_edit import OPERATIONS, plan_bulk_edit
+from edit_log import PatchError, apply_patch
+from patches import apply_changes
+from record_filter import RecordFilter
+from record_store import FileChangedError, RecordStore, validate_records
+
+
+class CommandError(Exception):
+    pass
+
+
+def open_records(path):
+    """A RecordStore for path, refused unless it is a non-empty array of objects"""
+    try:
+        data = RecordStore.open(path)
+    except json.JSONDecodeError as e:
+        raise CommandError(f"{path}: not valid JSON ({e.msg} at byte {e.pos})") from None
+    except OSError as e:
+        raise CommandError(f"{path}: {e.strerror}") from None
+    try:
+        error = validate_records(data)
+    except json.JSONDecodeError:
+        error = _decode_error(data)
+    if error:
+        data.close()
+        raise CommandError(f"{path}: {error}")
+    return data
+
+
+def _byte_offset(e):
+    """Bytes into the decoded text where a JSONDecodeError occurred (e.pos counts characters)"""
+    return len(e.doc[:e.pos].encode('utf-8'))
+
+
+def _decode_error(data):
+    """Which record of data isn't valid JSON, and where in the file"""
+    for index in range(len(data)):
+        try:
+            data[index]
+        except json.JSONDecodeError as e:
+            offset = data.source_offset(index) + _byte_offset(e)
+            return f"record {index + 1} is not valid JSON ({e.msg} at byte {offset})"
+    return None
+
+
+def _parse_path(text):
+    return tuple(key for key in text.strip().split(".") if key)
+
+
+def _select(data, where):
+    """Indices of the records matching a filter expression, or None for all"""
+    if where is None:
+        return None
+    return RecordFilter(where).run(data)
+
+
+def _finish(data, changes, dry_run, what):
+    if changes and not dry_run:
+        apply_changes(data, changes)
+        data.save()
+    verb = "would change" if dry_run else "changed"
+    print(f"{what}: {verb} {len({change[0] for change in changes})} records", file=sys.stderr)
+
+
+def cmd_validate(args):
+    for path in args.files:
+        data = open_records(path)
+        print(f"{path}: {len(data)} objects")
+        data.close()
+
+
+def cmd_query(args):
+    data = open_records(args.file)
+    matches = RecordFilter(args.expression).run(data)
+    if args.count:
+        print(len(matches))
+    elif args.indices:
+        for i in matches:
+            print(i)
+    else:
+        out = sys.stdout
+        for i in matches:
+            out.write(json_codec.dumps(data[i], ensure_ascii=False) + "\n")
+    data.close()
+
+
+def cmd_bulk(args):
+    operation = args.operation.capitalize()
+    data = open_records(args.file)
+    try:
+        changes, skipped = plan_bulk_edit(data, operation, _parse_path(args.path), args.argument or "",
+                                          indices=_select(data, args.where))
+        _finish(data, changes, args.dry_run, f"{operation} {args.path}")
+        if skipped:
+            print(f"skipped {skipped} records", file=sys.stderr)
+    finally:
+        data.close()
+
+
+def cmd_patch(args):
+    """Apply a JSON Patch document (an array of operations) or one operation per line"""
+    try:
+        with open(args.patch, 'r', encoding='utf-8', newline='') as f:  # newline='' keeps byte offsets
+            text = f.read()
+    except OSError as e:
+        raise CommandError(f"{args.patch}: {e.strerror}") from None
+    try:
+        document = json_codec.loads(text)
+        operations = document if isinstance(document, list) else [document]
+    except json.JSONDecodeError as e:
+        operations = _patch_lines(args.patch, text, e)
+    data = open_records(args.file)
+    try:
+        # apply_patch() applies as it goes and rolls back on error; nothing reaches the file until save()
+        try:
+            changes = apply_patch(data, operations)
+        except PatchError as e:
+            raise CommandError(f"{args.patch} doesn't apply to {args.file}: {e}") from None
+        if changes and not args.dry_run:
+            data.save()
+        verb = "would change" if args.dry_run else "changed"
+        print(f"{len(operations)} operations: {verb} {len({change[0] for change in changes})} records",
+              file=sys.stderr)
+    finally:
+        data.close()
+
+
+def _patch_lines(path, text, document_error):
+    """The operations of a patch with one per line; document_error is why it didn't parse as a whole"""
+    operations = []
+    pos = 0
+    for number, line in enumerate(text.splitlines(keepends=True), 1):
+        if line.strip():
+            try:
+                operations.append(json_codec.loads(line))
+            except json.JSONDecodeError as e:
+                if not operations:
+                    e = document_error  # not one operation per line either: say what's wrong with the whole
+                    raise CommandError(f"{path}: not valid JSON ({e.msg} at byte {_byte_offset(e)})") from None
+                raise CommandError(
+                    f"{path}: line {number} is not valid JSON ({e.msg} at byte {pos + _byte_offset(e)})") from None
+        pos += len(line.encode('utf-8'))
+    return operations
+
+
+def cmd_gui(args):
+    from json_editor import main  # The GUI toolkit loads only here
+    main(args.file)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    validate = commands.add_parser("validate", help="check files are arrays of objects or JSON Lines")
+    validate.add_argument("files", nargs="+")
+    validate.set_defaults(run=cmd_validate)
+
+    query = commands.add_parser("query", help="print the records matching a filter expression")
+    query.add_argument("file")
+    query.add_argument("expression", help='e.g. status == "active" and meta.retries > 3')
+    output = query.add_mutually_exclusive_group()
+    output.add_argument("--count", action="store_true", help="print only the number of matches")
+    output.add_argument("--indices", action="store_true", help="print record indices, one per line")
+    query.set_defaults(run=cmd_query)
+
+    bulk = commands.add_parser("bulk", help="set, rename, delete or transform one field across records")
+    bulk.add_argument("file")
+    bulk.add_argument("operation", choices=[operation.lower() for operation in OPERATIONS])
+    bulk.add_argument("path", help="dotted path of the field, e.g. meta.retries")
+    bulk.add_argument("argument", nargs="?",
+                      help="value for set, new name for rename, expression over `value` for transform")
+    bulk.add_argument("--where", help="only edit records matching this filter expression")
+    bulk.add_argument("--dry-run", action="store_true", help="report what would change without saving")
+    bulk.set_defaults(run=cmd_bulk)
+
+    patch = commands.add_parser("patch", help="apply JSON Patch add/replace/remove operations")
+    patch.add_argument("file")
+    patch.add_argument("patch", help="JSON array of operations, or one operation per line")
+    patch.add_argument("--dry-run", action="store_true", help="check the patch applies without saving")
+    patch.set_defaults(run=cmd_patch)
+
+    gui = commands.add_parser("gui", help="open the editor window")
+    gui.add_argument("file", nargs="?")
+    gui.set_defaults(run=cmd_gui)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.run(args)
+    except (CommandError, ValueError, FileChangedError) as e:  # FilterError and BulkEditError are ValueErrors
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        return 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
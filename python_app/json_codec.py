@@ -0,0 +1,157 @@
+"""The JSON encoder/decoder every load, save and preview goes through.
+
+The fastest installed backend is used (orjson, else the standard
+library); set JSON_EDITOR_CODEC=json to force the standard library.
+Whatever the backend, output is exactly what json.dumps produces, so
+files saved and previews shown don't depend on what is installed:
+
+- Indented output comes from orjson only for documents it renders the
+  same way. Floats outside [1e-4, 1e16), NaN and infinities are spelled
+  differently by orjson, so documents holding them go to json, as does
+  anything orjson refuses (huge integers, non-string keys, other types).
+  Non-ASCII text is escaped afterwards, as ensure_ascii does.
+- Compact output always comes from json: its C encoder is already fast,
+  and orjson can't write json's ", " and ": " separators.
+- Whatever orjson can't decode (NaN, BOMs, malformed input) is decoded
+  again by json, so values and error messages are json's too. orjson
+  reads integers beyond 64 bits as floats, so results holding a float
+  that large are decoded again by json as well.
+"""
+import json
+import os
+import re
+
+BACKENDS = ("orjson", "json")  # in order of preference
+
+_NON_ASCII = re.compile('[\x7f-\U0010ffff]')
+_INT64_LIMIT = 2.0 ** 63  # orjson turns integers at least this large into floats
+
+
+def _json_codec():
+    def loads(data):
+        return json.loads(data)
+
+    def dumps(obj, indent, ensure_ascii):
+        return json.dumps(obj, indent=indent, ensure_ascii=ensure_ascii)
+    return loads, dumps
+
+
+def _escape(match):
+    code = ord(match.group())
+    if code < 0x10000:
+        return f"\\u{code:04x}"
+    code -= 0x10000
+    return f"\\u{0xd800 | code >> 10:04x}\\u{0xdc00 | code & 0x3ff:04x}"
+
+
+def _renders_alike(value):
+    """Whether orjson's indented output for value can match json's, ignoring ensure_ascii"""
+    cls = value.__class__
+    if cls is dict:
+        for item in value.values():
+            if not _renders_alike(item):
+                return False
+        return True
+    if cls is list:
+        for item in value:
+            if not _renders_alike(item):
+                return False
+        return True
+    if cls is float:
+        return value == 0.0 or 1e-4 <= abs(value) < 1e16
+    return cls is str or cls is int or cls is bool or value is None
+
+
+def _has_huge_float(value):
+    cls = value.__class__
+    if cls is dict:
+        for item in value.values():
+            if _has_huge_float(item):
+                return True
+        return False
+    if cls is list:
+        for item in value:
+            if _has_huge_float(item):
+                return True
+        return False
+    return cls is float and abs(value) >= _INT64_LIMIT
+
+
+def _orjson_codec():
+    import orjson
+
+    decode_error = orjson.JSONDecodeError
+    indented = orjson.OPT_INDENT_2
+    std_loads, std_dumps = _json_codec()
+
+    def loads(data):
+        try:
+            obj = orjson.loads(data)
+        except decode_error:
+            return std_loads(data)
+        return std_loads(data) if _has_huge_float(obj) else obj
+
+    def dumps(obj, indent, ensure_ascii):
+        if indent != 2 or not _renders_alike(obj):
+            return std_dumps(obj, indent, ensure_ascii)
+        try:
+            text = orjson.dumps(obj, option=indented).decode('utf-8')
+        except TypeError:  # orjson.JSONEncodeError
+            return std_dumps(obj, indent, ensure_ascii)
+        if ensure_ascii and (not text.isascii() or '\x7f' in text):
+            text = _NON_ASCII.sub(_escape, text)
+        return text
+    return loads, dumps
+
+
+_FACTORIES = {"orjson": _orjson_codec, "json": _json_codec}
+backend = None  # name of the backend in use
+_loads = _dumps = None
+
+
+def select(name=None):
+    """Use backend name, or the first of BACKENDS that is installed; returns the name in use.
+
+    Raises ValueError for an unknown name and ImportError if it isn't installed.
+    """
+    global backend, _loads, _dumps
+    if name is not None and name not in _FACTORIES:
+        raise ValueError(f"Unknown JSON backend {name!r}; expected one of {', '.join(BACKENDS)}")
+    for candidate in [name] if name is not None else BACKENDS:
+        try:
+            _loads, _dumps = _FACTORIES[candidate]()
+        except ImportError:
+            if name is not None:
+                raise
+            continue
+        backend = candidate
+        break
+    return backend
+
+
+def available():
+    """Names of the installed backends, fastest first"""
+    names = []
+    for name in BACKENDS:
+        try:
+            _FACTORIES[name]()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def loads(data):
+    """json.loads for str or bytes; raises json.JSONDecodeError"""
+    return _loads(data)
+
+
+def dumps(obj, indent=None, ensure_ascii=True):
+    """json.dumps(obj, indent=indent, ensure_ascii=ensure_ascii), character for character"""
+    return _dumps(obj, indent, ensure_ascii)
+
+
+try:
+    select(os.environ.get("JSON_EDITOR_CODEC") or None)
+except (ImportError, ValueError):
+    select()
@@ -3,50 +3,199 @@ from tkinter import filedialog, messagebox
 import json
 import os
 import sys
+import bisect
+import threading
+import time
+from array import array
+
+from bulk_edit import OPERATIONS, BulkEditError, plan_bulk_edit
+from coercion import coerce_value, field_text, same_value
+from edit_journal import EditJournal
+from edit_log import EditLog, matches_base, read_log, remove_log, replay
+from instrumentation import Profiler, process_memory
+import json_codec
+from json_preview import HighlightedLines, dumps_value, dumps_with_spans, highlight_ranges, line_depths
+from patches import ABSENT, apply_changes, get_path, is_structural
+from prefetch import RecordPrefetcher
+from record_store import (LAZY_LOAD_THRESHOLD, FileChangedError, RecordStore, SaveCancelled, file_stamp,
+                          match_records, validate_records)
+from record_filter import FilterError, RecordFilter
+from schema import SAMPLE_RECORDS, Schema, file_digest, load_cached, store_cached
+from search_index import SearchIndex
 
 CONFIG_FILE = "json_editor_config.json"
 
-# Set appearance and color theme
-ctk.set_appearance_mode("dark")  # Modes: "System" (default), "Dark", "Light"
-ctk.set_default_color_theme("blue")  # Themes: "blue" (default), "green", "dark-blue"
+# VS Code bracket pair colorization colors (light_theme_color, dark_theme_color)
+INDENT_COLORS = [
+    ("#0431FA", "#FFD700"),  # Blue / Gold
+    ("#319331", "#DA70D6"),  # Green / Magenta
+    ("#9E5300", "#00BFFF"),  # Brown / Deep Sky Blue
+    ("#7B3814", "#FFA500"),  # Dark Brown / Orange
+    ("#B52E31", "#00FA9A"),  # Red / Medium Spring Green
+    ("#7F3E96", "#FF1493")   # Purple / Deep Pink
+]
+
+# Objects with more form rows than this are rendered virtually: widgets exist
+# only for the rows in view (plus VIRTUAL_OVERSCAN above and below)
+VIRTUAL_FORM_THRESHOLD = 200
+VIRTUAL_OVERSCAN = 8
+FIELD_ROW_HEIGHT = 44  # 42px row + 1px pady on each side
+SECTION_ROW_HEIGHT = 38  # 32px header + (4, 2) pady
+
+SYNC_DELAY_MS = 16  # keystrokes within one frame are synced to the data together
+
+# Previews longer than this are highlighted lazily: only the lines in view
+# (plus HIGHLIGHT_MARGIN_LINES above and below), extended as the view scrolls
+LAZY_HIGHLIGHT_LINES = 2000
+HIGHLIGHT_MARGIN_LINES = 100
+
+# Methods timed when instrumentation is on ("instrumentation": true in the
+# config, or JSON_EDITOR_PROFILE=1), and the phase each is reported as
+PROFILED_METHODS = {
+    "display_current_object": "display",
+    "_build_form_recursive": "form",
+    "_render_virtual_form": "form",
+    "update_json_preview": "preview",
+    "_apply_json_syntax_highlighting": "highlight",
+    "_update_memory_from_ui": "sync",
+    "_flush_pending_sync": "sync",
+    "load_specific_file": "load",
+    "_finish_load": "load.finish",
+}
+PROFILE_REFRESH_MS = 1000
+
+# The open file's size and mtime are checked this often; records that changed
+# on disk are merged in (set "watch_file": false in the config to turn it off)
+WATCH_INTERVAL_MS = 1000
+# Above this many records changed on disk, the search index and schema are
+# rebuilt rather than updated record by record
+INCREMENTAL_RELOAD_LIMIT = 10000
+
+class FormRow:
+    """Widgets making up one row of the form, kept between renders for reuse"""
+
+    def __init__(self, container, grid_pady, var=None, btn_expand=None, label=None,
+                 entry=None, btn_add=None):
+        self.container = container
+        self.grid_pady = grid_pady
+        self.var = var
+        self.btn_expand = btn_expand
+        self.label = label
+        self.entry = entry
+        self.btn_add = btn_add
+        self.grid_row = None
+        self.pool_key = None  # (kind, depth) when pooled by the virtual form
+
+    def show(self, row_index):
+        if self.grid_row != row_index:
+            self.container.grid(row=row_index, column=0, columnspan=2, sticky="ew", pady=self.grid_pady)
+            self.grid_row = row_index
+
+    def hide(self):
+        if self.grid_row is not None:
+            self.container.grid_remove()
+            self.grid_row = None
+
 
 class JSONEditor(ctk.CTk):
-    def __init__(self):
+    def __init__(self, filename=None):
         super().__init__()
         
         self.title("JSON Editor Pro")
         self.geometry("1200x800")
         
         # Configure grid weight for responsive layout
-        self.grid_rowconfigure(1, weight=1)
+        self.grid_rowconfigure(2, weight=1)
         self.grid_columnconfigure(0, weight=1)
         
         # Data state
         self.filepath = None
         self.data = []
         self.current_index = 0
+        self.current_obj = None  # The displayed object; edits are written into it
+        self.displayed_index = 0  # Index current_obj was loaded from
         self.entry_map = {} # Maps path tuple to (entry_widget_var, original_type)
         self.collapsed_sections = set()  # Track which sections are collapsed
+        self._save_job = None  # SaveJob being written by the background saver
+        self._save_worker = None  # (thread, state) writing _save_job
+        self.form_frame = None
+        self._form_rows = {}  # (kind, path tuple) -> FormRow currently in the form
+        self._stale_rows = {}  # rows of the previous render not reused (yet)
+        self._syncing_form = False  # True while rows are refilled from data
+        self.virtual_frame = None
+        self._row_model = []  # flat (kind, path, key, value, depth) rows in virtual mode
+        self._row_offsets = []  # y of each row in the row model, plus the total height
+        self._virtual_top = 0  # pixels of the row model scrolled above virtual_frame
+        self._virtual_height = 1  # height of virtual_frame, the rows' viewport
+        self._field_vars = {}  # path -> StringVar kept for every leaf in virtual mode
+        self._virtual_rows = {}  # row index -> FormRow placed in virtual_frame
+        self._free_rows = {}  # (kind, depth) -> FormRows ready to be reused
+        self._virtual_render_pending = False
+        self._pending_sync = set()  # paths typed into since the last sync
+        self._sync_job = None
+        self._parent_refs = {}  # parent path -> container in the current object
+        self._preview_obj = None  # object currently rendered in txt_preview
+        self._preview_spans = None  # leaf path -> [start_line, start_col, end_line, end_col]
+        self._lazy_highlight = False  # txt_preview is highlighted viewport-only
+        self._preview_depths = None  # bracket depth at the start of each preview line
+        self._highlighted_lines = HighlightedLines()
+        self._highlight_pending = False
+        self._prefetcher = RecordPrefetcher(self._prepare_record)
+        self._nav_direction = 1  # +1 / -1: which neighbours to prepare first
+        self._display_pending = False
+        self._search_index = None  # SearchIndex over all records, once built
+        self._search_build = 0  # bumped to abandon a running index build
+        self._search_backlog = None  # edits made while the index is being built
+        self._search_matches = []  # record indices matching the last search
+        self._filter_matches = None  # array of record indices Prev/Next are limited to
+        self._filter_run = 0  # bumped to abandon a running filter
+        self.journal = EditJournal()  # undo/redo history
+        self._schema = None  # Schema inferred from all records, once ready
+        self._schema_build = 0  # bumped to abandon a running inference
+        self._schema_backlog = None  # edits made while the schema is being inferred
+        self._field_problem = None  # path of the field whose problem the status bar shows
+        self._edit_log = None  # EditLog of filepath's unsaved edits
+        self._save_log_mark = 0  # edit log position the running save covers
+        self._disk_stamp = None  # file_stamp() of filepath when loaded, saved or last merged
+        self._pending_stamp = None  # a changed stamp seen once, merged if it holds until the next check
+        self._record_hashes = None  # record_hashes() of the file at _disk_stamp, once computed
+        self._hash_build = 0  # bumped to abandon a running hash pass or disk merge
+        self._disk_merging = False
+        self._conflicts = set()  # record indices whose unsaved edits kept out a change on disk
         
         # Load config
+        self.config = {}
         self.last_opened = self.load_config()
+        if "undo_memory_mb" in self.config:
+            self.journal.max_bytes = int(self.config["undo_memory_mb"] * 1024 * 1024)
+        self.profiler = None  # Profiler, when instrumentation is on
+        self._save_started = 0.0
+        if self.config.get("instrumentation") or os.environ.get("JSON_EDITOR_PROFILE"):
+            self.profiler = Profiler()
+            self.profiler.instrument(self, PROFILED_METHODS)
 
         # Configure UI
         self._setup_ui()
         self._bind_shortcuts()
         
         # Defer file loading slightly to allow window to appear
-        # If we have a last opened file, try to load it
-        if self.last_opened and os.path.exists(self.last_opened):
+        # Open the file we were started with, else try the last opened one
+        if filename:
+            self.after(100, lambda: self.load_specific_file(filename))
+        elif self.last_opened and os.path.exists(self.last_opened):
             self.after(100, lambda: self.load_specific_file(self.last_opened))
         else:
             self.after(100, self.load_file)
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        if self.config.get("watch_file", True):
+            self.after(WATCH_INTERVAL_MS, self._watch_file)
 
     def load_config(self):
         if os.path.exists(CONFIG_FILE):
             try:
                 with open(CONFIG_FILE, 'r') as f:
                     cfg = json.load(f)
+                    self.config = cfg # Other settings, e.g. "undo_memory_mb", are kept on save
                     return cfg.get("last_opened_file")
             except:
                 return None
@@ -55,7 +204,7 @@ class JSONEditor(ctk.CTk):
     def save_config(self, path):
         try:
             with open(CONFIG_FILE, 'w') as f:
-                json.dump({"last_opened_file": path}, f)
+                json.dump({**self.config, "last_opened_file": path}, f)
         except:
             pass # Ignore config save errors
 
@@ -98,6 +247,18 @@ class JSONEditor(ctk.CTk):
         )
         self.theme_selector.pack(side="left")
         
+        # Latency overlay (F12 with instrumentation on)
+        self.lbl_profile = ctk.CTkLabel(self.nav_frame, text="", font=("Consolas", 10), justify="left")
+        
+        # Background save progress (only shown while a save is running)
+        self.save_progress_frame = ctk.CTkFrame(self.nav_frame, fg_color="transparent")
+        self.save_progress = ctk.CTkProgressBar(self.save_progress_frame, width=140, height=10)
+        self.save_progress.pack(side="left", padx=(0, 8))
+        self.btn_cancel_save = ctk.CTkButton(self.save_progress_frame, text="Cancel", command=self.cancel_save,
+                                             width=60, height=24, corner_radius=6,
+                                             fg_color=("#6B6B6B", "#4A4A4A"), hover_color=("#5A5A5A", "#5A5A5A"))
+        self.btn_cancel_save.pack(side="left")
+        
         # Right section: Action Buttons
         self.nav_right = ctk.CTkFrame(self.nav_frame, fg_color="transparent")
         self.nav_right.pack(side="right", padx=15, pady=12)
@@ -122,19 +283,75 @@ class JSONEditor(ctk.CTk):
                                             fg_color=("#6B4C9A", "#9370DB"), hover_color=("#553D7F", "#7B68EE"))
         self.btn_copy_last.pack(side="left", padx=3)
         
+        self.btn_bulk_edit = ctk.CTkButton(self.nav_right, text="🛠 Bulk Edit", command=self.open_bulk_edit,
+                                           width=100, height=32, corner_radius=6,
+                                           fg_color=("#6B6B6B", "#4A4A4A"), hover_color=("#5A5A5A", "#5A5A5A"))
+        self.btn_bulk_edit.pack(side="left", padx=3)
+        
         self.btn_save = ctk.CTkButton(self.nav_right, text="💾 Save", command=self.save_changes, 
                                        width=90, height=32, corner_radius=6,
                                        fg_color=("#107C10", "#0F7B0F"), hover_color=("#0D5E0D", "#0E6A0E"))
         self.btn_save.pack(side="left", padx=3)
         
-        self.btn_exit = ctk.CTkButton(self.nav_right, text="✕", command=self.quit, 
+        self.btn_exit = ctk.CTkButton(self.nav_right, text="✕", command=self.on_closing, 
                                        width=40, height=32, corner_radius=6,
                                        fg_color=("#E81123", "#C42B1C"), hover_color=("#C50F1F", "#A21025"))
         self.btn_exit.pack(side="left", padx=(3, 0))
 
+        # Search bar (shown with Ctrl+F)
+        self.search_frame = ctk.CTkFrame(self, corner_radius=0, fg_color=("#F0F0F0", "#222222"))
+        search_row = ctk.CTkFrame(self.search_frame, fg_color="transparent")
+        search_row.pack(fill="x")
+        
+        self.search_path = ctk.CTkEntry(search_row, width=180, height=28, corner_radius=6,
+                                        placeholder_text="Field path (any)")
+        self.search_path.pack(side="left", padx=(15, 5), pady=8)
+        
+        self.search_value = ctk.CTkEntry(search_row, width=260, height=28, corner_radius=6,
+                                         placeholder_text="Value")
+        self.search_value.pack(side="left", padx=5, pady=8)
+        for entry in (self.search_path, self.search_value):
+            entry.bind("<Return>", lambda e: self.run_search())
+        
+        self.search_mode = ctk.StringVar(value="Exact")
+        ctk.CTkSegmentedButton(search_row, values=["Exact", "Prefix", "Contains"],
+                               variable=self.search_mode, height=28, corner_radius=6).pack(side="left", padx=5)
+        
+        ctk.CTkButton(search_row, text="Find", command=self.run_search,
+                      width=60, height=28, corner_radius=6).pack(side="left", padx=5)
+        ctk.CTkButton(search_row, text="◄", command=self.previous_match,
+                      width=32, height=28, corner_radius=6).pack(side="left", padx=(5, 2))
+        ctk.CTkButton(search_row, text="►", command=self.next_match,
+                      width=32, height=28, corner_radius=6).pack(side="left", padx=(2, 5))
+        
+        self.lbl_search_status = ctk.CTkLabel(search_row, text="", font=("Segoe UI", 11))
+        self.lbl_search_status.pack(side="left", padx=10)
+        
+        ctk.CTkButton(search_row, text="✕", command=self.toggle_search_panel,
+                      width=28, height=28, corner_radius=6,
+                      fg_color=("#6B6B6B", "#4A4A4A"), hover_color=("#5A5A5A", "#5A5A5A")).pack(side="right", padx=15)
+        
+        # Filter: Prev/Next only visit records matching an expression
+        filter_row = ctk.CTkFrame(self.search_frame, fg_color="transparent")
+        filter_row.pack(fill="x")
+        
+        self.filter_entry = ctk.CTkEntry(filter_row, width=520, height=28, corner_radius=6,
+                                         placeholder_text='Filter, e.g. status == "active" and meta.retries > 3')
+        self.filter_entry.pack(side="left", padx=(15, 5), pady=(0, 8))
+        self.filter_entry.bind("<Return>", lambda e: self.apply_filter())
+        
+        ctk.CTkButton(filter_row, text="Apply", command=self.apply_filter,
+                      width=60, height=28, corner_radius=6).pack(side="left", padx=5, pady=(0, 8))
+        ctk.CTkButton(filter_row, text="Clear", command=self.clear_filter,
+                      width=60, height=28, corner_radius=6,
+                      fg_color=("#6B6B6B", "#4A4A4A"), hover_color=("#5A5A5A", "#5A5A5A")).pack(side="left", padx=5, pady=(0, 8))
+        
+        self.lbl_filter_status = ctk.CTkLabel(filter_row, text="", font=("Segoe UI", 11))
+        self.lbl_filter_status.pack(side="left", padx=10, pady=(0, 8))
+
         # Main Content Frame with padding
         self.main_container = ctk.CTkFrame(self, corner_radius=0, fg_color="transparent")
-        self.main_container.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
+        self.main_container.grid(row=2, column=0, sticky="nsew", padx=10, pady=10)
         self.main_container.grid_columnconfigure(0, weight=1)
         self.main_container.grid_columnconfigure(1, weight=1)
         self.main_container.grid_rowconfigure(0, weight=1)
@@ -155,6 +372,11 @@ class JSONEditor(ctk.CTk):
                                                         fg_color="transparent")
         self.scrollable_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
         self.scrollable_frame.grid_columnconfigure(0, weight=1)
+        self.scrollable_frame._parent_canvas.configure(yscrollcommand=self._on_form_yview)
+        # A virtualized form scrolls its row model rather than the canvas (see _render_virtual_form)
+        self.scrollable_frame._parent_canvas.bind("<Configure>", self._on_form_resize, add="+")
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.bind_all(sequence, self._on_virtual_wheel, add="+")
 
         # RIGHT PANE: JSON Preview with modern card design
         self.right_pane = ctk.CTkFrame(self.main_container, corner_radius=12)
@@ -173,6 +395,11 @@ class JSONEditor(ctk.CTk):
                                            corner_radius=8,
                                            border_width=0)
         self.txt_preview.grid(row=1, column=0, sticky="nsew", padx=15, pady=(0, 15))
+        # Typing into the preview moves text around, so the next update must be a full one
+        for sequence in ("<Key>", "<<Paste>>", "<<Cut>>"):
+            self.txt_preview.bind(sequence, self._invalidate_preview_spans, add="+")
+        # Highlight lines as they scroll into view when the preview is long
+        self.txt_preview._textbox.configure(yscrollcommand=self._on_preview_yview)
         
         # Configure syntax highlighting tags
         self._setup_syntax_highlighting()
@@ -210,81 +437,320 @@ class JSONEditor(ctk.CTk):
 
     def _bind_shortcuts(self):
         self.bind("<Control-s>", lambda e: self.save_changes())
+        self.bind("<Control-f>", lambda e: self.toggle_search_panel())
+        self.bind("<Control-z>", lambda e: self.undo())
+        self.bind("<Control-y>", lambda e: self.redo())
+        self.bind("<F3>", lambda e: self.next_match())
+        self.bind("<Shift-F3>", lambda e: self.previous_match())
         self.bind("<Left>", lambda e: self.navigate_previous())
         self.bind("<Right>", lambda e: self.navigate_next())
+        if self.profiler is not None:
+            self.bind("<F12>", lambda e: self.toggle_profile_overlay())
+            self.bind("<Shift-F12>", lambda e: self.dump_profile())
 
     def change_theme(self, choice):
         """Switch between light and dark themes"""
         ctk.set_appearance_mode(choice.lower())
-        # Force refresh of the current display to update colors
-        if self.data:
-            self.display_current_object()
+        # CTk widgets switch to their light/dark color pairs by themselves;
+        # only the preview's tag colors are picked per mode
+        self._setup_syntax_highlighting()
 
     def load_file(self):
         filename = filedialog.askopenfilename(
             title="Select JSON File",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=[("JSON files", "*.json"), ("JSON Lines", "*.jsonl *.ndjson"), ("All files", "*.*")]
         )
         if filename:
             self.load_specific_file(filename)
         elif not self.data:
              self.lbl_status.configure(text="No file selected")
 
-    def load_specific_file(self, filename):
+    def load_specific_file(self, filename, reload=False):
+        if self._save_job is not None:
+            messagebox.showwarning("Save in Progress", "Please wait for the current save to finish.")
+            return
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
+            if os.path.getsize(filename) >= LAZY_LOAD_THRESHOLD:
+                self._load_lazy(filename, reload)
+                return
+
+            try:
+                data = RecordStore.open(filename)
+            except json.JSONDecodeError:
+                raise
+            except ValueError as e:
+                # Not an array of records, e.g. an object or an empty array, as in _load_lazy
+                self._report_invalid(filename, str(e))
+                return
             error = self.validate_json(data)
             if error:
-                messagebox.showerror("Invalid JSON", error)
-                if filename == self.last_opened: # If auto-load failed, ask for new file
-                     self.load_file()
+                data.close()
+                self._report_invalid(filename, error)
                 return
                 
-            self.filepath = filename
-            self.data = data
-            self.current_index = 0
-            self.title(f"JSON Editor Pro - {os.path.basename(filename)}")
-            
-            self.save_config(filename)
-            self.display_current_object()
+            self._finish_load(filename, data, reload)
             
         except json.JSONDecodeError:
             messagebox.showerror("Error", "File is not valid JSON.")
         except Exception as e:
             messagebox.showerror("Error", f"Could not load file: {str(e)}")
 
+    def _report_invalid(self, filename, error):
+        messagebox.showerror("Invalid JSON", error)
+        if filename == self.last_opened: # If auto-load failed, ask for new file
+             self.load_file()
+
+    def _finish_load(self, filename, data, reload=False):
+        if isinstance(self.data, RecordStore):
+            self.data.close()
+        if self._edit_log is not None:
+            self._edit_log.close() # Its edits stay on disk for the next time the file is opened
+            self._edit_log = None
+        self.filepath = filename
+        self.data = data
+        self.journal.clear()
+        self._conflicts = set()
+        self._start_watching()
+        if reload:
+            remove_log(filename) # Reloading throws away the unsaved edits
+        self._start_schema()
+        self._edit_log = EditLog(filename, self._restore_session(filename))
+        self._prefetcher.clear()
+        self._start_search_index()
+        self.clear_filter()
+        self.current_index = min(self.current_index, len(data) - 1) if reload else 0
+        self.title(f"JSON Editor Pro - {os.path.basename(filename)}")
+        
+        self.save_config(filename)
+        self.display_current_object()
+        if reload:
+            messagebox.showinfo("Reloaded", "File reloaded from disk.")
+
+    def _restore_session(self, filename):
+        """Offer to replay edits logged for filename by a session that ended unsaved; returns how many the log keeps"""
+        logged = read_log(filename)
+        if logged is None:
+            return 0
+        header, operations = logged
+        if not operations:
+            remove_log(filename)
+            return 0
+        if matches_base(header, filename):
+            question = f"Restore {len(operations)} unsaved edits from your last session?"
+        else:
+            question = (f"The file changed on disk after {len(operations)} unsaved edits were made "
+                        "to it. Apply those edits anyway?")
+        if not messagebox.askyesno("Restore Unsaved Edits", question):
+            remove_log(filename)
+            return 0
+        try:
+            changes = replay(self.data, operations)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not restore the unsaved edits: {str(e)}")
+            remove_log(filename)
+            return 0
+        self.journal.record(changes, "Restore unsaved edits")
+        for change in changes:
+            self._schema_change(*change)
+        return len(operations)
+
+    def _load_lazy(self, filename, reload=False):
+        """Index a large array on a worker thread; objects are decoded only when shown"""
+        name = os.path.basename(filename)
+        state = {"done": 0, "total": 1, "store": None, "error": None}
+
+        def on_progress(done, total):
+            state["done"], state["total"] = done, total
+
+        def work():
+            try:
+                start = time.perf_counter()
+                state["store"] = RecordStore.open(filename, progress=on_progress)
+                state["seconds"] = time.perf_counter() - start
+            except Exception as e:
+                state["error"] = e
+
+        worker = threading.Thread(target=work, daemon=True)
+        worker.start()
+
+        def poll():
+            if worker.is_alive():
+                percent = 100 * state["done"] // max(state["total"], 1)
+                self.lbl_status.configure(text=f"Indexing {name}... {percent}%")
+                self.after(100, poll)
+                return
+            error = state["error"]
+            if isinstance(error, json.JSONDecodeError):
+                messagebox.showerror("Error", "File is not valid JSON.")
+            elif isinstance(error, ValueError):
+                self._report_invalid(filename, str(error))
+            elif error:
+                messagebox.showerror("Error", f"Could not load file: {str(error)}")
+            else:
+                if self.profiler is not None:
+                    self.profiler.record("load.index", state["seconds"])
+                self._finish_load(filename, state["store"], reload)
+
+        self.lbl_status.configure(text=f"Indexing {name}...")
+        self.after(100, poll)
+
     def validate_json(self, data):
-        if not isinstance(data, list):
-            return "Root element must be an array (list) of objects."
-        if not data:
-            return "JSON array is empty."
-        for idx, item in enumerate(data):
-            if not isinstance(item, dict):
-                return f"Item at index {idx} is not an object."
-        return None
+        return validate_records(data)
 
     def display_current_object(self):
-        # Clear existing fields
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        self.entry_map = {}
-        
         if not self.data:
             return
 
-        obj = self.data[self.current_index]
+        # Commit keystrokes still waiting for their sync before the form is refilled
+        self._flush_pending_sync(refresh_preview=False)
+        self._display_pending = False
+        self._parent_refs = {}
+        prepared = self._take_prepared(self.current_index)
+        if prepared is not None:
+            obj = prepared.obj
+        else:
+            obj = self._decode_record(self.current_index)
+        self.current_obj = obj
+        self.displayed_index = self.current_index
+        
+        if self.form_frame is None:
+            self._create_form_container()
+        header = f"Object {self.current_index + 1}"
+        if obj is None:
+            header += "  ⚠ can't be read: it can't be shown or edited"
+        elif self.current_index in self._conflicts:
+            header += "  ⚠ also changed on disk: showing your unsaved edits"
+        self.lbl_object_header.configure(text=header)
+        
+        rows = None
+        if prepared is not None and prepared.collapsed == frozenset(self.collapsed_sections):
+            rows = prepared.rows
+        self._render_form(obj if obj is not None else {}, rows=rows)
+        
+        # Update Nav Controls
+        self._refresh_status()
         
+        # Enable/disable navigation buttons
+        self._refresh_nav_buttons()
+
+        if obj is None:
+            self._show_unreadable_record(self.current_index)
+            return
+
+        # Initial preview update
+        self.update_json_preview(prepared=prepared)
+
+        # Prepare the neighbouring objects while the UI is idle
+        self.after_idle(self._prefetch_neighbours)
+
+    def _take_prepared(self, index):
+        """The prefetched record for index, if it is still what the store holds there"""
+        prepared = self._prefetcher.take(index)
+        try:
+            if prepared is None or self.data.adopt(index, prepared.record_id, prepared.obj) is not prepared.obj:
+                return None
+        except json.JSONDecodeError:
+            return None  # decoded on demand, which reports it
+        return prepared
+
+    def _decode_record(self, index):
+        """self.data[index], or None (saying why in the status bar) if it can't be read from the file"""
+        try:
+            return self.data[index]
+        except json.JSONDecodeError as e:
+            self.lbl_status.configure(text=f"Object {index + 1} is not valid JSON ({e.msg} at column {e.colno})")
+        except FileChangedError:
+            # Rewritten in place by another program: the watcher merges it in shortly
+            self.lbl_status.configure(
+                text=f"Object {index + 1} can't be read: {os.path.basename(self.filepath)} changed on disk")
+        return None
+
+    def _show_unreadable_record(self, index):
+        """Preview the raw text of a record that can't be decoded, and say why in the status bar"""
+        try:
+            _, source = self.data.peek(index)
+        except FileChangedError:
+            source = b''
+        self._decode_record(index)
+        self._preview_obj = self._preview_spans = None
+        self._preview_depths = None
+        self._lazy_highlight = False
+        self._highlighted_lines.clear()
+        for tag in self.txt_preview.tag_names():
+            self.txt_preview.tag_remove(tag, "1.0", "end")
+        self.txt_preview.delete("1.0", "end")
+        self.txt_preview.insert("1.0", source.decode('utf-8', 'replace'))
+
+    def _prefetch_neighbours(self):
+        if not self.data or self._display_pending:
+            return
+        step = self._nav_direction
+        wanted = [self._step_index(step), self._step_index(-step)]
+        if self._filter_matches is None:
+            wanted.append(self.current_index + 2 * step)
+        wanted = [i for i in wanted if i is not None and 0 <= i < len(self.data)]
+        self._prefetcher.retain(wanted)
+        collapsed = frozenset(self.collapsed_sections)
+        for i in wanted:
+            try:
+                record_id, source = self.data.peek(i)
+            except FileChangedError:
+                return  # read again once the change on disk is merged
+            self._prefetcher.request(i, record_id, source, collapsed)
+
+    def _prepare_record(self, obj, collapsed):
+        """Preview text, highlighting and row model for obj; runs on the prefetch thread"""
+        text, spans = dumps_with_spans(obj)
+        ranges = None
+        if text.count("\n") + 1 <= LAZY_HIGHLIGHT_LINES:
+            ranges = highlight_ranges(text)
+        rows = self._flatten_rows(obj, collapsed=collapsed)
+        return text, spans, ranges, rows
+
+    def _render_form(self, obj, relayout=False, rows=None):
+        """Fill the form with obj's rows.
+
+        With relayout=True obj is already shown and only collapse states
+        changed: existing rows are kept as they are and just shown or hidden.
+        rows is obj's row model if it was already built by the prefetcher.
+        """
+        if rows is None:
+            rows = self._flatten_rows(obj)
+        if len(rows) > VIRTUAL_FORM_THRESHOLD:
+            self._render_virtual_form(rows)
+            return
+        if self._row_model:
+            self._leave_virtual_form()
+            relayout = False
+        # Build form with recursion using Grid, reusing the previous object's
+        # rows wherever the key layout matches
+        if not relayout:
+            self.entry_map = {}
+            self._stale_rows, self._form_rows = self._form_rows, {}
+        self._syncing_form = True
+        try:
+            self._build_form_recursive(obj, row_index=0)
+        finally:
+            self._syncing_form = False
+        for row in self._stale_rows.values():
+            row.container.destroy()
+        self._stale_rows = {}
+
+    def _refresh_nav_buttons(self):
+        self.btn_prev.configure(state="disabled" if self._step_index(-1) is None else "normal")
+        self.btn_next.configure(state="disabled" if self._step_index(1) is None else "normal")
+
+    def _create_form_container(self):
         # Header with Add button for root level
         header_container = ctk.CTkFrame(self.scrollable_frame, fg_color="transparent", height=40)
         header_container.pack(fill="x", padx=10, pady=(5, 10))
         
-        ctk.CTkLabel(
+        self.lbl_object_header = ctk.CTkLabel(
             header_container,
-            text=f"Object {self.current_index + 1}",
+            text="",
             font=("Segoe UI", 14, "bold")
-        ).pack(side="left")
+        )
+        self.lbl_object_header.pack(side="left")
         
         ctk.CTkButton(
             header_container,
@@ -297,150 +763,403 @@ class JSONEditor(ctk.CTk):
             command=lambda: self.add_property_to_object([])
         ).pack(side="left", padx=15)
         
+        ctk.CTkButton(
+            header_container,
+            text="🗑 Delete Object",
+            width=110,
+            height=28,
+            fg_color=("#E81123", "#C42B1C"),
+            hover_color=("#C50F1F", "#A21025"),
+            font=("Segoe UI", 10),
+            command=self.delete_current_object
+        ).pack(side="left")
+        
+        ctk.CTkButton(
+            header_container,
+            text="Collapse All",
+            width=90,
+            height=28,
+            fg_color=("#6B6B6B", "#4A4A4A"),
+            hover_color=("#5A5A5A", "#5A5A5A"),
+            font=("Segoe UI", 10),
+            command=lambda: self.collapse_at_depth(0)
+        ).pack(side="right")
+        
+        ctk.CTkButton(
+            header_container,
+            text="Expand All",
+            width=90,
+            height=28,
+            fg_color=("#6B6B6B", "#4A4A4A"),
+            hover_color=("#5A5A5A", "#5A5A5A"),
+            font=("Segoe UI", 10),
+            command=self.expand_all
+        ).pack(side="right", padx=5)
+        
         # Container for the grid form
         self.form_frame = ctk.CTkFrame(self.scrollable_frame, fg_color="transparent")
         self.form_frame.pack(fill="both", expand=True, padx=10, pady=5)
         self.form_frame.grid_columnconfigure(1, weight=1)  # Make entry column expandable
-        
-        # Build form with recursion using Grid
-        self._build_form_recursive(obj, row_index=0)
-        
-        # Update Nav Controls
-        self.lbl_status.configure(text=f"Object {self.current_index + 1} of {len(self.data)}")
-        
-        # Enable/disable navigation buttons
-        if self.current_index <= 0:
-            self.btn_prev.configure(state="disabled")
-        else:
-            self.btn_prev.configure(state="normal")
-            
-        if self.current_index >= len(self.data) - 1:
-            self.btn_next.configure(state="disabled")
-        else:
-            self.btn_next.configure(state="normal")
 
-        # Initial preview update
-        self.update_json_preview()
+    def _refresh_status(self):
+        if self.data:
+            matches = self._filter_matches
+            if matches is None:
+                self.lbl_status.configure(text=f"Object {self.current_index + 1} of {len(self.data)}")
+            else:
+                position = bisect.bisect_left(matches, self.current_index)
+                if position < len(matches) and matches[position] == self.current_index:
+                    self.lbl_status.configure(text=f"Object {position + 1} of {len(matches)} (filtered)")
+                else:
+                    self.lbl_status.configure(text=f"Object {self.current_index + 1} of {len(self.data)} (not in filter)")
+        if self._search_matches:
+            self._refresh_search_status()
+
+    def _build_form_recursive(self, current_data, path_ids=None, depth=0, row_index=0, visible=True):
+        """Lay out the rows of current_data, returning the next free grid row.
 
-    def _build_form_recursive(self, current_data, path_ids=None, depth=0, row_index=0):
+        Every row owns a grid row whether or not it is shown, so collapsing or
+        expanding a section only hides or shows its own rows. Rows under a
+        collapsed section are not created until it is first expanded.
+        """
         if path_ids is None:
             path_ids = []
         
-        # VS Code bracket pair colorization colors
-        # (light_theme_color, dark_theme_color)
-        indent_colors = [
-            ("#0431FA", "#FFD700"),  # Blue / Gold
-            ("#319331", "#DA70D6"),  # Green / Magenta
-            ("#9E5300", "#00BFFF"),  # Brown / Deep Sky Blue
-            ("#7B3814", "#FFA500"),  # Dark Brown / Orange
-            ("#B52E31", "#00FA9A"),  # Red / Medium Spring Green
-            ("#7F3E96", "#FF1493")   # Purple / Deep Pink
-        ]
-        
         for key, value in current_data.items():
             current_path = path_ids + [key]
-            path_str = ".".join(str(p) for p in current_path)
             indent_px = depth * 30
             
             if isinstance(value, dict):
+                path_str = ".".join(str(p) for p in current_path)
                 # Check if this section is collapsed
                 is_collapsed = path_str in self.collapsed_sections
-                
-                # Create header frame with expand/collapse button
-                header_container = ctk.CTkFrame(self.form_frame, fg_color="transparent", height=32)
-                header_container.grid(row=row_index, column=0, columnspan=2, sticky="ew", pady=(4, 2))
-                header_container.grid_propagate(False)  # Prevent container from resizing
-                
-                # Draw vertical indent guides for all parent levels
-                for parent_depth in range(depth):
-                    color_idx = parent_depth % len(indent_colors)
-                    line_x = parent_depth * 30 + 15
-                    guide = ctk.CTkFrame(header_container, 
-                                        fg_color=indent_colors[color_idx],
-                                        width=2, height=32)
-                    guide.place(x=line_x, y=0)
-                
-                # Expand/collapse button
                 arrow = "▶" if is_collapsed else "▼"
-                btn_expand = ctk.CTkButton(
-                    header_container,
-                    text=arrow,
-                    width=20,
-                    height=24,
-                    fg_color="transparent",
-                    text_color=("#555555", "#AAAAAA"),
-                    hover_color=("#DDDDDD", "#333333"),
-                    font=("Segoe UI", 10),
-                    command=lambda p=path_str: self.toggle_collapse(p)
-                )
-                btn_expand.place(x=indent_px, y=4)
-                
-                # Header label with colored text
-                color_idx = depth % len(indent_colors)
-                header_label = ctk.CTkLabel(
-                    header_container,
-                    text=f"📦 {key}",
-                    font=("Segoe UI", 11, "bold"),
-                    text_color=indent_colors[color_idx],
-                    anchor="w"
-                )
-                header_label.place(x=indent_px + 28, y=6)
                 
-                # Add property button for nested objects
-                btn_add_prop = ctk.CTkButton(
-                    header_container,
-                    text="+",
-                    width=20,
-                    height=24,
-                    fg_color=("#107C10", "#0F7B0F"),
-                    hover_color=("#0D5E0D", "#0E6A0E"),
-                    font=("Segoe UI", 12, "bold"),
-                    command=lambda cp=current_path: self.add_property_to_object(cp)
-                )
-                btn_add_prop.place(x=indent_px + 28 + len(key) * 8 + 30, y=4)
+                row_key = ("section", tuple(current_path))
+                row = self._stale_rows.pop(row_key, None) or self._form_rows.get(row_key)
+                if row is None and visible:
+                    row = self._create_section_header(key, current_path, path_str, depth)
+                if row is not None:
+                    if row.btn_expand.cget("text") != arrow:
+                        row.btn_expand.configure(text=arrow)
+                    if visible:
+                        row.show(row_index)
+                    else:
+                        row.hide()
+                    self._form_rows[row_key] = row
                 
                 row_index += 1
                 
                 # Only show nested content if not collapsed
-                if not is_collapsed:
-                    row_index = self._build_form_recursive(value, current_path, depth + 1, row_index)
+                row_index = self._build_form_recursive(value, current_path, depth + 1, row_index,
+                                                       visible and not is_collapsed)
             else:
-                self._create_field_v2(key, value, current_path, indent_px, row_index, depth)
+                row_key = ("field", tuple(current_path))
+                row = self._stale_rows.pop(row_key, None)
+                if row is not None:
+                    # Row of the previous object; rebind it to this value
+                    if row.var.get() != field_text(value):
+                        row.var.set(field_text(value))
+                else:
+                    # Already showing this object's value (and possibly unsynced typing)
+                    row = self._form_rows.get(row_key)
+                if row is None and visible:
+                    row = self._create_field_v2(key, value, current_path, indent_px, row_index, depth)
+                if row is not None:
+                    if visible:
+                        row.show(row_index)
+                    else:
+                        row.hide()
+                    self._form_rows[row_key] = row
+                    self.entry_map[row_key[1]] = (row.var, type(value))
                 row_index += 1
         return row_index
+
+    def _create_section_header(self, key, current_path, path_str, depth, parent=None):
+        indent_px = depth * 30
+        
+        # Create header frame with expand/collapse button
+        header_container = ctk.CTkFrame(parent or self.form_frame, fg_color="transparent", height=32)
+        header_container.grid_propagate(False)  # Prevent container from resizing
+        
+        # Draw vertical indent guides for all parent levels
+        for parent_depth in range(depth):
+            color_idx = parent_depth % len(INDENT_COLORS)
+            line_x = parent_depth * 30 + 15
+            guide = ctk.CTkFrame(header_container, 
+                                fg_color=INDENT_COLORS[color_idx],
+                                width=2, height=32)
+            guide.place(x=line_x, y=0)
+        
+        # Expand/collapse button
+        btn_expand = ctk.CTkButton(
+            header_container,
+            text="▼",
+            width=20,
+            height=24,
+            fg_color="transparent",
+            text_color=("#555555", "#AAAAAA"),
+            hover_color=("#DDDDDD", "#333333"),
+            font=("Segoe UI", 10),
+            command=lambda p=path_str: self.toggle_collapse(p)
+        )
+        btn_expand.place(x=indent_px, y=4)
+        
+        # Header label with colored text
+        color_idx = depth % len(INDENT_COLORS)
+        header_label = ctk.CTkLabel(
+            header_container,
+            text=f"📦 {key}",
+            font=("Segoe UI", 11, "bold"),
+            text_color=INDENT_COLORS[color_idx],
+            anchor="w"
+        )
+        header_label.place(x=indent_px + 28, y=6)
+        
+        # Add property button for nested objects
+        btn_add_prop = ctk.CTkButton(
+            header_container,
+            text="+",
+            width=20,
+            height=24,
+            fg_color=("#107C10", "#0F7B0F"),
+            hover_color=("#0D5E0D", "#0E6A0E"),
+            font=("Segoe UI", 12, "bold"),
+            command=lambda cp=current_path: self.add_property_to_object(cp)
+        )
+        btn_add_prop.place(x=indent_px + 28 + len(key) * 8 + 30, y=4)
+        
+        return FormRow(header_container, (4, 2), btn_expand=btn_expand,
+                       label=header_label, btn_add=btn_add_prop)
     
+    def _flatten_rows(self, current_data, path_ids=(), depth=0, rows=None, collapsed=None):
+        """Flat row model of the form: one (kind, path, key, value, depth) per visible row"""
+        if rows is None:
+            rows = []
+        if collapsed is None:
+            collapsed = self.collapsed_sections
+        for key, value in current_data.items():
+            current_path = path_ids + (key,)
+            if isinstance(value, dict):
+                rows.append(("section", current_path, key, value, depth))
+                if ".".join(str(p) for p in current_path) not in collapsed:
+                    self._flatten_rows(value, current_path, depth + 1, rows, collapsed)
+            else:
+                rows.append(("field", current_path, key, value, depth))
+        return rows
+
+    def _render_virtual_form(self, rows):
+        """Show a big object by placing widgets only for the rows in view.
+
+        virtual_frame is only as tall as the pane and the scrollbar is driven
+        from the row model: a frame as tall as all the rows would pass the
+        16-bit coordinate limit of X11 (32767px) at around 750 rows.
+        """
+        for row in self._form_rows.values():
+            row.container.destroy()
+        self._form_rows = {}
+        if self.virtual_frame is None:
+            self.virtual_frame = ctk.CTkFrame(self.form_frame, fg_color="transparent", height=1)
+        if not self._row_model:
+            self.scrollable_frame._parent_canvas.yview_moveto(0)
+            self.scrollable_frame._scrollbar.configure(command=self._virtual_yview)
+        self.virtual_frame.grid(row=0, column=0, columnspan=2, sticky="ew")
+
+        # Every leaf keeps a StringVar so entry_map covers the whole object,
+        # whether or not its row currently has widgets
+        offsets = []
+        y = 0
+        self.entry_map = {}
+        field_vars, self._field_vars = self._field_vars, {}
+        self._syncing_form = True
+        try:
+            for kind, path, key, value, depth in rows:
+                offsets.append(y)
+                if kind == "section":
+                    y += SECTION_ROW_HEIGHT
+                    continue
+                y += FIELD_ROW_HEIGHT
+                var = field_vars.pop(path, None)
+                if var is None:
+                    var = self._create_field_var(path, value)
+                elif var.get() != field_text(value):
+                    var.set(field_text(value))
+                self._field_vars[path] = var
+                self.entry_map[path] = (var, type(value))
+        finally:
+            self._syncing_form = False
+        offsets.append(y)
+
+        self._row_model = rows
+        self._row_offsets = offsets
+        for index in list(self._virtual_rows):
+            self._release_virtual_row(index)
+        self._fit_virtual_frame()
+        self.after_idle(self._on_form_resize) # Again once the header above has its final size
+
+    def _leave_virtual_form(self):
+        if not self._row_model:
+            return
+        for index in list(self._virtual_rows):
+            self._release_virtual_row(index)
+        for pool in self._free_rows.values():
+            for row in pool:
+                row.container.destroy()
+        self._free_rows = {}
+        self._field_vars = {}
+        self._row_model = []
+        self._row_offsets = []
+        self.virtual_frame.grid_remove()
+        canvas = self.scrollable_frame._parent_canvas
+        self.scrollable_frame._scrollbar.configure(command=canvas.yview)
+        self.scrollable_frame._scrollbar.set(*canvas.yview())
+
+    def _on_form_yview(self, first, last):
+        if not self._row_model:  # otherwise the scrollbar shows the row model's position
+            self.scrollable_frame._scrollbar.set(first, last)
+
+    def _on_form_resize(self, event=None):
+        if self._row_model:
+            self._fit_virtual_frame()
+
+    def _fit_virtual_frame(self):
+        """Size virtual_frame to the part of the pane below the object header, and re-place the rows"""
+        canvas = self.scrollable_frame._parent_canvas
+        # The form frame's 5px bottom padding keeps the canvas from scrolling
+        height = canvas.winfo_height() - self.form_frame.winfo_y() - self.virtual_frame.winfo_y() - 5
+        self._virtual_height = max(height, FIELD_ROW_HEIGHT)
+        self.virtual_frame.configure(height=self._virtual_height)
+        self._scroll_virtual_form(self._virtual_top)
+
+    def _virtual_yview(self, action, amount, unit=None):
+        """Scrollbar command in virtual mode, taking the arguments Tk passes to yview()"""
+        if action == "moveto":
+            top = float(amount) * self._row_offsets[-1]
+        else:
+            step = self._virtual_height if unit == "pages" else FIELD_ROW_HEIGHT
+            top = self._virtual_top + int(amount) * step
+        self._scroll_virtual_form(top)
+
+    def _on_virtual_wheel(self, event):
+        if not self._row_model or not self.scrollable_frame._check_if_valid_scroll(event.widget):
+            return
+        self._virtual_yview("scroll", -1 if event.num == 4 or event.delta > 0 else 1, "units")
+
+    def _scroll_virtual_form(self, top):
+        """Show the rows from pixel top of the row model on, and move the scrollbar to match"""
+        total = self._row_offsets[-1]
+        self._virtual_top = max(0, min(int(top), total - self._virtual_height))
+        self.scrollable_frame._scrollbar.set(self._virtual_top / total,
+                                             min((self._virtual_top + self._virtual_height) / total, 1.0))
+        if not self._virtual_render_pending:
+            self._virtual_render_pending = True
+            self.after_idle(self._render_visible_rows)
+
+    def _render_visible_rows(self):
+        self._virtual_render_pending = False
+        if not self._row_model:
+            return
+        top = self._virtual_top
+        bottom = top + self._virtual_height
+        offsets = self._row_offsets
+        first = max(bisect.bisect_right(offsets, top) - 1 - VIRTUAL_OVERSCAN, 0)
+        last = min(bisect.bisect_left(offsets, bottom) + VIRTUAL_OVERSCAN, len(self._row_model))
+        
+        for index in list(self._virtual_rows):
+            if not first <= index < last:
+                self._release_virtual_row(index)
+        # Rows sit at their offset relative to the viewport, so y stays small however big the object
+        for index in range(first, last):
+            row = self._virtual_rows.get(index)
+            if row is None:
+                row = self._acquire_virtual_row(self._row_model[index])
+                self._virtual_rows[index] = row
+            row.container.place(x=0, y=offsets[index] - top, relwidth=1.0)
+
+    def _release_virtual_row(self, index):
+        row = self._virtual_rows.pop(index)
+        if row.entry is not None and self.focus_get() is row.entry._entry:
+            self.scrollable_frame.focus_set() # Don't keep typing into a row about to be rebound
+        row.container.place_forget()
+        self._free_rows.setdefault(row.pool_key, []).append(row)
+
+    def _acquire_virtual_row(self, spec):
+        """Reuse a pooled row of the same kind and depth, rebinding it to this spec"""
+        kind, path, key, value, depth = spec
+        path_str = ".".join(str(p) for p in path)
+        pool = self._free_rows.get((kind, depth))
+        if kind == "section":
+            arrow = "▶" if path_str in self.collapsed_sections else "▼"
+            if pool:
+                row = pool.pop()
+                row.label.configure(text=f"📦 {key}")
+                row.btn_expand.configure(command=lambda p=path_str: self.toggle_collapse(p))
+                row.btn_add.configure(command=lambda cp=list(path): self.add_property_to_object(cp))
+                row.btn_add.place(x=depth * 30 + 28 + len(key) * 8 + 30, y=4)
+            else:
+                row = self._create_section_header(key, list(path), path_str, depth, parent=self.virtual_frame)
+            if row.btn_expand.cget("text") != arrow:
+                row.btn_expand.configure(text=arrow)
+        else:
+            var = self._field_vars[path]
+            if pool:
+                row = pool.pop()
+                row.label.configure(text=key)
+                row.entry.configure(textvariable=var)
+                row.var = var
+            else:
+                row = self._create_field_v2(key, value, list(path), depth * 30, None, depth,
+                                            parent=self.virtual_frame, var=var)
+        row.pool_key = (kind, depth)
+        return row
+
     def toggle_collapse(self, path_str):
         """Toggle collapse/expand state of a section"""
         if path_str in self.collapsed_sections:
             self.collapsed_sections.remove(path_str)
         else:
             self.collapsed_sections.add(path_str)
-        # Refresh the display
-        self.display_current_object()
+        self._relayout_form()
+
+    def collapse_at_depth(self, depth):
+        """Collapse every section depth levels down (0 = top level), expanding the ones above"""
+        if self.current_obj is None:
+            return
+        def walk(obj, path, level):
+            for key, value in obj.items():
+                if isinstance(value, dict):
+                    path_str = ".".join(str(p) for p in path + (key,))
+                    if level < depth:
+                        self.collapsed_sections.discard(path_str)
+                        walk(value, path + (key,), level + 1)
+                    else:
+                        self.collapsed_sections.add(path_str)
+        walk(self.current_obj, (), 0)
+        self._relayout_form()
+
+    def expand_all(self):
+        self.collapsed_sections.clear()
+        self._relayout_form()
+
+    def _relayout_form(self):
+        """Apply changed collapse states to the form in one pass; the data and preview are untouched"""
+        if self.current_obj is None or self.form_frame is None:
+            return
+        self._flush_pending_sync()
+        self._render_form(self.current_obj, relayout=True)
     
-    def _create_field_v2(self, key, value, path_keys, indent_px, row_index, depth=0):
-        # VS Code bracket pair colorization colors (light_theme_color, dark_theme_color)
-        indent_colors = [
-            ("#0431FA", "#FFD700"),  # Blue / Gold
-            ("#319331", "#DA70D6"),  # Green / Magenta
-            ("#9E5300", "#00BFFF"),  # Brown / Deep Sky Blue
-            ("#7B3814", "#FFA500"),  # Dark Brown / Orange
-            ("#B52E31", "#00FA9A"),  # Red / Medium Spring Green
-            ("#7F3E96", "#FF1493")   # Purple / Deep Pink
-        ]
-        
+    def _create_field_v2(self, key, value, path_keys, indent_px, row_index, depth=0, parent=None, var=None):
         # Create a container frame for the field row
-        field_container = ctk.CTkFrame(self.form_frame, fg_color="transparent", height=42)
-        field_container.grid(row=row_index, column=0, columnspan=2, sticky="ew", pady=1)
+        field_container = ctk.CTkFrame(parent or self.form_frame, fg_color="transparent", height=42)
         field_container.grid_propagate(False)  # Prevent container from expanding
         field_container.grid_columnconfigure(1, weight=1)
         
         # Draw vertical indent guides for all parent levels
         for parent_depth in range(depth):
-            color_idx = parent_depth % len(indent_colors)
+            color_idx = parent_depth % len(INDENT_COLORS)
             line_x = parent_depth * 30 + 15
             guide = ctk.CTkFrame(field_container, 
-                                fg_color=indent_colors[color_idx],
+                                fg_color=INDENT_COLORS[color_idx],
                                 width=2, height=42)
             guide.place(x=line_x, y=0)
         
@@ -450,10 +1169,8 @@ class JSONEditor(ctk.CTk):
                             text_color=("#555555", "#CCCCCC"))
         lbl.grid(row=0, column=0, sticky="w", padx=(indent_px + 10, 15), pady=5)
         
-        var = ctk.StringVar(value=str(value))  # Convert all to string for Entry
-        
-        # Add trace for live updates
-        var.trace_add("write", lambda *args: self.on_field_change())
+        if var is None:
+            var = self._create_field_var(path_keys, value)
         
         # Modern entry field with rounded corners
         entry = ctk.CTkEntry(field_container, textvariable=var, 
@@ -462,227 +1179,1074 @@ class JSONEditor(ctk.CTk):
                               font=("Segoe UI", 11))
         entry.grid(row=0, column=1, sticky="ew", padx=(0, 10), pady=5)
         
-        self.entry_map[tuple(path_keys)] = (var, type(value))
+        return FormRow(field_container, 1, var=var, label=lbl, entry=entry)
+
+    def _create_field_var(self, path_keys, value):
+        var = ctk.StringVar(value=field_text(value))  # Convert all to string for Entry
+        
+        # Add trace for live updates
+        var.trace_add("write", lambda *args, p=tuple(path_keys): self.on_field_change(p))
+        return var
 
-    def on_field_change(self):
-        # When user types, update underlying data object and refresh preview
-        if self._update_memory_from_ui(silent=True):
-             self.update_json_preview()
+    def on_field_change(self, path_keys):
+        if self._syncing_form:
+            return # Value was set by the form itself, not typed
+        # When user types, update underlying data object and refresh preview.
+        # Keystrokes are batched so fast typing costs one sync per frame.
+        self._pending_sync.add(path_keys)
+        if self._sync_job is None:
+            self._sync_job = self.after(SYNC_DELAY_MS, self._flush_pending_sync)
 
-    def update_json_preview(self):
-        obj = self.data[self.current_index]
-        json_text = json.dumps(obj, indent=2)
+    def _flush_pending_sync(self, refresh_preview=True):
+        if self._sync_job is not None:
+            self.after_cancel(self._sync_job) # No-op when called from the job itself
+            self._sync_job = None
+        paths, self._pending_sync = self._pending_sync, set()
+        changed = [path_keys for path_keys in paths
+                   if path_keys in self.entry_map and self._sync_field(path_keys, silent=True)]
+        if changed:
+            # current_index may already point elsewhere if a new object is about to be shown
+            self.data.mark_dirty(self.displayed_index, self.current_obj)
+            if refresh_preview:
+                self.update_json_preview(changed)
+
+    def _cancel_pending_sync(self):
+        if self._sync_job is not None:
+            self.after_cancel(self._sync_job)
+            self._sync_job = None
+        self._pending_sync = set()
+
+    def update_json_preview(self, changed_paths=None, prepared=None):
+        # Edits to existing fields only replace those values' text in place
+        if changed_paths and self._patch_json_preview(changed_paths):
+            return
+
+        obj = self.current_obj
+        if prepared is not None:
+            json_text, self._preview_spans = prepared.text, prepared.spans
+        else:
+            json_text, self._preview_spans = dumps_with_spans(obj)
+        
+        # Keep the scroll position when the same object is re-rendered
+        same_object = self._preview_obj is obj
+        scroll_top = self.txt_preview.yview()[0]
+        self._preview_obj = obj
         
         self.txt_preview.delete("1.0", "end")
         self.txt_preview.insert("1.0", json_text)
+        if same_object:
+            self.txt_preview.yview_moveto(scroll_top)
         
         # Apply syntax highlighting
-        self._apply_json_syntax_highlighting(json_text)
+        self._highlighted_lines.clear()
+        line_count = json_text.count("\n") + 1
+        self._lazy_highlight = line_count > LAZY_HIGHLIGHT_LINES
+        if self._lazy_highlight:
+            self._preview_depths = line_depths(json_text)
+            for tag in self.txt_preview.tag_names():
+                self.txt_preview.tag_remove(tag, "1.0", "end")
+            self._highlight_visible_lines()
+        elif prepared is not None and prepared.ranges is not None:
+            self._preview_depths = None
+            for tag in self.txt_preview.tag_names():
+                self.txt_preview.tag_remove(tag, "1.0", "end")
+            self._add_highlight_ranges(prepared.ranges)
+        else:
+            self._preview_depths = None
+            self._apply_json_syntax_highlighting(json_text)
+
+    def _invalidate_preview_spans(self, event=None):
+        self._preview_spans = None
+        if self._lazy_highlight:
+            # Line numbers may have moved; start the viewport cache over
+            self._preview_depths = None
+            self._highlighted_lines.clear()
+
+    def _on_preview_yview(self, first, last):
+        self.txt_preview._y_scrollbar.set(first, last)
+        if self._lazy_highlight and not self._highlight_pending:
+            self._highlight_pending = True
+            self.after_idle(self._highlight_visible_lines)
+
+    def _highlight_visible_lines(self):
+        """Highlight whatever part of the visible lines (plus margin) isn't highlighted yet"""
+        self._highlight_pending = False
+        if not self._lazy_highlight:
+            return
+        textbox = self.txt_preview._textbox
+        if self._preview_depths is None:
+            self._preview_depths = line_depths(textbox.get("1.0", "end-1c"))
+        line_count = len(self._preview_depths)
+        top = int(textbox.index("@0,0").split(".")[0])
+        bottom = int(textbox.index(f"@0,{textbox.winfo_height()}").split(".")[0])
+        first = max(top - HIGHLIGHT_MARGIN_LINES, 1)
+        last = min(bottom + HIGHLIGHT_MARGIN_LINES, line_count)
+        for gap_first, gap_last in self._highlighted_lines.missing(first, last):
+            text = textbox.get(f"{gap_first}.0", f"{gap_last}.end")
+            self._apply_json_syntax_highlighting(text, gap_first, 0, self._preview_depths[gap_first - 1])
+        self._highlighted_lines.add(first, last)
+
+    def _patch_json_preview(self, changed_paths):
+        """Re-serialize just the changed leaves; returns False when a full rebuild is needed"""
+        spans = self._preview_spans
+        if spans is None or self._preview_obj is not self.current_obj:
+            return False
+        if any(path not in spans for path in changed_paths):
+            return False
+        
+        for path in changed_paths:
+            value = self.current_obj
+            for key in path:
+                value = value[key]
+            text = dumps_value(value, len(path))
+            span = spans[path]
+            start_line, start_col, end_line, end_col = span
+            
+            start = f"{start_line}.{start_col}"
+            self.txt_preview.delete(start, f"{end_line}.{end_col}")
+            self.txt_preview.insert(start, text)
+            
+            # Record the new extent and shift everything below if the line count changed
+            added_lines = text.count("\n")
+            span[2] = start_line + added_lines
+            span[3] = len(text) - text.rfind("\n") - 1 if added_lines else start_col + len(text)
+            line_delta = span[2] - end_line
+            if line_delta:
+                for other in spans.values():
+                    if other[0] > end_line:
+                        other[0] += line_delta
+                        other[2] += line_delta
+            
+            self._apply_json_syntax_highlighting(text, start_line, start_col, depth=len(path))
+            if self._lazy_highlight:
+                self._highlighted_lines.replace(start_line, end_line, line_delta)
+                if self._preview_depths is not None:
+                    self._preview_depths[start_line:end_line] = line_depths(text)[1:]
+        return True
     
-    def _apply_json_syntax_highlighting(self, json_text):
-        """Apply VS Code-style syntax highlighting to JSON text"""
-        import re
-        
-        # Remove all existing tags
+    def _apply_json_syntax_highlighting(self, json_text, start_line=1, start_col=0, depth=0):
+        """Apply VS Code-style syntax highlighting to JSON text.
+
+        json_text may be a fragment of the preview starting at start_line.start_col,
+        opened at bracket nesting level depth; only that range is re-tagged.
+        """
+        # Remove existing tags over the range being highlighted
+        start = f"{start_line}.{start_col}"
+        end = f"{start}+{len(json_text)}c"
         for tag in self.txt_preview.tag_names():
-            self.txt_preview.tag_remove(tag, "1.0", "end")
+            self.txt_preview.tag_remove(tag, start, end)
         
-        depth = 0
-        i = 0
-        line = 1
-        col = 0
+        self._add_highlight_ranges(highlight_ranges(json_text, start_line, start_col, depth))
+
+    def _add_highlight_ranges(self, ranges):
+        # One tag_add per tag for the whole range. CTkTextbox.tag_add only
+        # forwards a single range, so go to the underlying tk.Text.
+        for tag, indices in ranges.items():
+            self.txt_preview._textbox.tag_add(tag, *indices)
+
+    def toggle_search_panel(self):
+        if self.search_frame.winfo_ismapped():
+            self.search_frame.grid_remove()
+            return
+        self.search_frame.grid(row=1, column=0, sticky="ew")
+        self.search_value.focus_set()
+        self._refresh_search_status()
+
+    def _start_search_index(self):
+        """(Re)build the search index over all records on a worker thread"""
+        self._search_build += 1
+        build = self._search_build
+        self._search_index = None
+        self._search_backlog = []
+        self._search_matches = []
+        records = self.data.snapshot()
+        state = {"done": 0, "index": None, "error": None}
+        
+        def work():
+            try:
+                state["index"] = SearchIndex.build(
+                    records,
+                    progress=lambda done: state.update(done=done),
+                    cancelled=lambda: build != self._search_build)
+            except Exception as e:
+                state["error"] = e
+            state["finished"] = True
         
-        while i < len(json_text):
-            char = json_text[i]
-            
-            # Track line and column for tag placement
-            if char == '\n':
-                line += 1
-                col = 0
-                i += 1
-                continue
-            
-            # Handle strings (keys and values)
-            if char == '"':
-                string_start = i
-                i += 1
-                while i < len(json_text) and json_text[i] != '"':
-                    if json_text[i] == '\\':
-                        i += 1  # Skip escaped character
-                    i += 1
-                i += 1  # Include closing quote
-                
-                # Check if it's a key (followed by colon)
-                j = i
-                while j < len(json_text) and json_text[j] in ' \t':
-                    j += 1
-                
-                start_pos = f"{line}.{col}"
-                end_pos = f"{line}.{col + (i - string_start)}"
-                
-                if j < len(json_text) and json_text[j] == ':':
-                    # Property key - use nested color
-                    tag = f"key_{depth % 3}"
-                    self.txt_preview.tag_add(tag, start_pos, end_pos)
+        def poll():
+            if build != self._search_build:
+                return
+            if not state.get("finished"):
+                self._refresh_search_status(f"Indexing {state['done'] * 100 // max(len(records), 1)}%")
+                self.after(200, poll)
+                return
+            if state["index"] is None:
+                self._search_backlog = None
+                self._refresh_search_status(f"Search index failed: {state['error']}")
+                return
+            # Replay the edits made while the snapshot was being indexed
+            index = state["index"]
+            for change in self._search_backlog:
+                self._apply_index_change(index, *change)
+            self._search_index, self._search_backlog = index, None
+            self._refresh_search_status()
+        
+        threading.Thread(target=work, daemon=True).start()
+        self.after(200, poll)
+
+    def _index_change(self, record, path_keys, old, new):
+        """Keep the search index and schema in step with a change (see patches.py)"""
+        self._schema_change(record, path_keys, old, new)
+        if self._search_index is not None:
+            self._apply_index_change(self._search_index, record, path_keys, old, new)
+        elif self._search_backlog is not None:
+            self._search_backlog.append((record, tuple(path_keys), old, new))
+
+    @staticmethod
+    def _apply_index_change(index, record, path_keys, old, new):
+        if old is not ABSENT:
+            index.remove(record, old, path_keys)
+        if new is not ABSENT:
+            index.add(record, new, path_keys)
+
+    def _start_schema(self):
+        """Load the schema cached for the file's content, or infer it on a worker thread"""
+        self._schema_build += 1
+        build = self._schema_build
+        self._schema = None
+        self._schema_backlog = []
+        path = self.filepath
+        records = self.data.snapshot()
+        sample = self.config.get("schema_sample_records", SAMPLE_RECORDS)
+        state = {}
+
+        def work():
+            try:
+                digest = file_digest(path)
+                schema = load_cached(digest)
+                if schema is None:
+                    schema = Schema.build(records, sample, cancelled=lambda: build != self._schema_build)
+                    if schema is not None:
+                        store_cached(digest, schema.to_json())
+                state["schema"] = schema
+            except Exception:
+                pass # Without a schema fields are coerced by their own type
+            state["finished"] = True
+
+        def poll():
+            if build != self._schema_build:
+                return
+            if not state.get("finished"):
+                self.after(200, poll)
+                return
+            schema = state.get("schema")
+            if schema is not None:
+                for change in self._schema_backlog:
+                    schema.apply_change(*change)
+            self._schema, self._schema_backlog = schema, None
+
+        threading.Thread(target=work, daemon=True).start()
+        self.after(200, poll)
+
+    def _schema_change(self, record, path_keys, old, new):
+        if self._schema is not None:
+            self._schema.apply_change(record, path_keys, old, new)
+        elif self._schema_backlog is not None:
+            self._schema_backlog.append((record, tuple(path_keys), old, new))
+
+    def _store_schema(self):
+        """Cache the schema under the content the file was just saved with"""
+        if self._schema is None:
+            return
+        path, data = self.filepath, self._schema.to_json()
+        threading.Thread(target=lambda: store_cached(file_digest(path), data), daemon=True).start()
+
+    def _show_field_problem(self, path_keys, problem):
+        """Point out a typed value that doesn't fit what the field holds in other records"""
+        if problem:
+            self._field_problem = path_keys
+            self.lbl_status.configure(text=f"⚠ {'.'.join(str(k) for k in path_keys)}: {problem}")
+        elif self._field_problem == path_keys:
+            self._field_problem = None
+            self._refresh_status()
+
+    def _refresh_search_status(self, text=None):
+        if text is None:
+            if self._search_index is None:
+                text = "" if self._search_backlog is None else "Indexing…"
+            elif self._search_matches:
+                position = bisect.bisect_left(self._search_matches, self.current_index)
+                if position < len(self._search_matches) and self._search_matches[position] == self.current_index:
+                    text = f"{position + 1} of {len(self._search_matches)} matches"
                 else:
-                    # String value
-                    self.txt_preview.tag_add("string", start_pos, end_pos)
-                
-                col += i - string_start
-                continue
-            
-            # Handle opening brackets
-            if char in '{[':
-                start_pos = f"{line}.{col}"
-                end_pos = f"{line}.{col + 1}"
-                tag = f"bracket_{depth % 3}"
-                self.txt_preview.tag_add(tag, start_pos, end_pos)
-                depth += 1
-                col += 1
-                i += 1
-                continue
-            
-            # Handle closing brackets
-            if char in '}]':
-                depth -= 1
-                start_pos = f"{line}.{col}"
-                end_pos = f"{line}.{col + 1}"
-                tag = f"bracket_{depth % 3}"
-                self.txt_preview.tag_add(tag, start_pos, end_pos)
-                col += 1
-                i += 1
+                    text = f"{len(self._search_matches)} matches"
+            else:
+                text = ""
+        self.lbl_search_status.configure(text=text)
+
+    def run_search(self):
+        if self._search_index is None:
+            self._refresh_search_status("Indexing… try again shortly" if self._search_backlog is not None
+                                        else "Load a file to search")
+            return
+        text = self.search_value.get()
+        path = self.search_path.get().strip() or None
+        self._search_matches = self._search_index.lookup(text, path, self.search_mode.get().lower())
+        if not self._search_matches:
+            self._refresh_search_status("No matches")
+            return
+        if self.current_index in self._search_matches:
+            self._refresh_search_status()
+        else:
+            self.next_match()
+
+    def next_match(self):
+        if self._search_matches:
+            position = bisect.bisect_right(self._search_matches, self.current_index)
+            self._go_to_index(self._search_matches[position % len(self._search_matches)])
+
+    def previous_match(self):
+        if self._search_matches:
+            position = bisect.bisect_left(self._search_matches, self.current_index) - 1
+            self._go_to_index(self._search_matches[position % len(self._search_matches)])
+
+    def _go_to_index(self, index):
+        if self._update_memory_from_ui():
+            self._nav_direction = 1 if index >= self.current_index else -1
+            self.current_index = index
+            self._request_display()
+            self._refresh_search_status()
+
+    def apply_filter(self):
+        """Limit Prev/Next to the records matching the filter expression"""
+        expression = self.filter_entry.get().strip()
+        if not expression:
+            self.clear_filter()
+            return
+        if not self.data:
+            return
+        try:
+            record_filter = RecordFilter(expression)
+        except FilterError as e:
+            self.lbl_filter_status.configure(text=str(e))
+            return
+        
+        # Match against the records as edited so far; equality terms are
+        # answered from the search index when it is ready
+        self._update_memory_from_ui()
+        candidates = record_filter.candidates(self._search_index)
+        records = self.data.snapshot()
+        self._filter_run += 1
+        run = self._filter_run
+        state = {"done": 0, "total": len(records) if candidates is None else len(candidates)}
+        
+        def work():
+            try:
+                state["matches"] = record_filter.run(
+                    records, candidates,
+                    progress=lambda done, total: state.update(done=done),
+                    cancelled=lambda: run != self._filter_run)
+            except Exception as e:
+                state["error"] = e
+            state["finished"] = True
+        
+        def poll():
+            if run != self._filter_run:
+                return
+            if not state.get("finished"):
+                self.lbl_filter_status.configure(text=f"Filtering {state['done'] * 100 // max(state['total'], 1)}%")
+                self.after(100, poll)
+                return
+            if "error" in state:
+                self.lbl_filter_status.configure(text=f"Filter failed: {state['error']}")
+                return
+            matches = state["matches"]
+            self.lbl_filter_status.configure(text=f"{len(matches)} of {len(self.data)} records match")
+            if not matches:
+                # Keep navigating the whole array rather than nothing, not a previous filter's matches
+                self._filter_matches = None
+                self._refresh_status()
+                self._refresh_nav_buttons()
+                return
+            self._filter_matches = matches
+            position = bisect.bisect_left(matches, self.current_index)
+            if position == len(matches) or matches[position] != self.current_index:
+                self._go_to_index(matches[min(position, len(matches) - 1)])
+            else:
+                self._refresh_status()
+                self._refresh_nav_buttons()
+        
+        threading.Thread(target=work, daemon=True).start()
+        self.after(100, poll)
+
+    def clear_filter(self):
+        self._filter_run += 1
+        self._filter_matches = None
+        self.lbl_filter_status.configure(text="")
+        if self.data:
+            self._refresh_status()
+            self._refresh_nav_buttons()
+
+    def _step_index(self, step):
+        """Where Prev (-1) / Next (+1) leads from current_index, within the filter if one is applied; None at the end"""
+        matches = self._filter_matches
+        if matches is None:
+            index = self.current_index + step
+            return index if 0 <= index < len(self.data) else None
+        if step > 0:
+            position = bisect.bisect_right(matches, self.current_index)
+        else:
+            position = bisect.bisect_left(matches, self.current_index) - 1
+        return matches[position] if 0 <= position < len(matches) else None
+
+    def undo(self):
+        self._replay_journal(self.journal.undo, "Undo")
+
+    def redo(self):
+        self._replay_journal(self.journal.redo, "Redo")
+
+    def _replay_journal(self, step, verb):
+        if not self.data:
+            return
+        self._update_memory_from_ui()
+        entry = step()
+        if entry is None:
+            return
+        label, changes = entry
+        records = {change[0] for change in changes}
+        self._apply_changes(changes)
+        if self._edit_log is not None:
+            self._edit_log.append(changes)
+        # Bring a single edited record into view; only that record is rendered
+        if len(records) == 1 and not any(is_structural(change) for change in changes):
+            record = records.pop()
+            if record != self.displayed_index:
+                self.current_index = record
+                self.display_current_object()
+        self.lbl_status.configure(text=f"{verb}: {label}")
+        self.after(2000, self._refresh_status)
+
+    def _apply_changes(self, changes):
+        """Apply changes (see patches.py) to the records, keeping the index, prefetcher and form in step"""
+        if any(is_structural(change) for change in changes):
+            self._apply_structural_changes(changes)
+            return
+        touched = apply_changes(self.data, changes)
+        for change in changes:
+            self._index_change(*change)
+        self._prefetcher.discard(touched)
+        if self.displayed_index in touched and not self._refresh_fields_in_place(changes):
+            self._cancel_pending_sync()
+            self.display_current_object()
+
+    def _apply_structural_changes(self, changes):
+        # Inserting or deleting anywhere but the end shifts record indices,
+        # which the search index and filter are keyed by
+        count = len(self.data)
+        at_end = True
+        for record, path, old, new in changes:
+            if not path and old is ABSENT:
+                at_end = at_end and record == count
+                count += 1
+            elif not path and new is ABSENT:
+                count -= 1
+                at_end = at_end and record == count
+        apply_changes(self.data, changes)
+        if at_end:
+            for change in changes:
+                self._index_change(*change)
+        else:
+            for change in changes:
+                self._schema_change(*change)
+            self._start_search_index()
+            self.clear_filter()
+            self._shift_conflicts(changes)
+        self._prefetcher.clear()
+        self.current_index = min(self.current_index, len(self.data) - 1)
+        self._cancel_pending_sync()
+        self.display_current_object()
+
+    def _shift_conflicts(self, changes):
+        for record, path, old, new in changes:
+            if path:
                 continue
-            
-            # Handle numbers
-            if char.isdigit() or (char == '-' and i + 1 < len(json_text) and json_text[i + 1].isdigit()):
-                num_start = i
-                if char == '-':
-                    i += 1
-                    col += 1
-                while i < len(json_text) and (json_text[i].isdigit() or json_text[i] in '.eE+-'):
-                    i += 1
-                    col += 1
-                
-                start_pos = f"{line}.{col - (i - num_start)}"
-                end_pos = f"{line}.{col}"
-                self.txt_preview.tag_add("number", start_pos, end_pos)
+            if old is ABSENT:
+                self._conflicts = {i + (i >= record) for i in self._conflicts}
+            elif new is ABSENT:
+                self._conflicts = {i - (i > record) for i in self._conflicts if i != record}
+
+    def _refresh_fields_in_place(self, changes):
+        """Show new leaf values of the displayed record without rebuilding its form; False if it needs a rebuild"""
+        if self.current_obj is None or not self.data.holds(self.displayed_index, self.current_obj):
+            return False
+        paths = []
+        for record, path, old, new in changes:
+            if record != self.displayed_index:
                 continue
+            if path not in self.entry_map or any(
+                    value is ABSENT or isinstance(value, dict) for value in (old, new)):
+                return False
+            paths.append(path)
+        self._syncing_form = True
+        try:
+            for path in paths:
+                var = self.entry_map[path][0]
+                value = self.current_obj
+                for key in path:
+                    value = value[key]
+                var.set(field_text(value))
+        finally:
+            self._syncing_form = False
+        self.update_json_preview(paths)
+        return True
+
+    def delete_current_object(self):
+        if not self.data:
+            return
+        if len(self.data) == 1:
+            messagebox.showwarning("Last Object", "The array must keep at least one object.")
+            return
+        if self.current_obj is None:
+            self._decode_record(self.current_index)
+            return
+        if not messagebox.askyesno("Confirm Delete", f"Delete object {self.current_index + 1}? You can undo this with Ctrl+Z."):
+            return
+        self._update_memory_from_ui()
+        change = (self.current_index, (), self.current_obj, ABSENT)
+        self._apply_changes([change])
+        self._record_edit([change], f"Delete object {change[0] + 1}")
+
+    def open_bulk_edit(self):
+        """Set, rename, delete or transform one field across all (or the filtered) records"""
+        if not self.data:
+            messagebox.showwarning("No File", "Please load a JSON file first.")
+            return
+        
+        dialog = ctk.CTkToplevel(self)
+        dialog.title("Bulk Edit")
+        dialog.geometry("500x420")
+        dialog.transient(self)
+        dialog.grab_set()
+        dialog.resizable(False, False)
+        
+        operation = ctk.StringVar(value=OPERATIONS[0])
+        ctk.CTkSegmentedButton(dialog, values=list(OPERATIONS), variable=operation).pack(pady=(20, 10))
+        
+        ctk.CTkLabel(dialog, text="Property path (e.g. meta.retries):", font=("Segoe UI", 11)).pack(pady=(10, 5))
+        path_entry = ctk.CTkEntry(dialog, width=400)
+        path_entry.pack(pady=5)
+        
+        argument_label = ctk.CTkLabel(dialog, text="", font=("Segoe UI", 11))
+        argument_label.pack(pady=(10, 5))
+        argument_entry = ctk.CTkEntry(dialog, width=400)
+        argument_entry.pack(pady=5)
+        
+        def on_operation(choice=None):
+            argument_label.configure(text={
+                "Set": "New value:",
+                "Rename": "New property name:",
+                "Delete": "",
+                "Transform": "Python expression over value (e.g. value.strip().lower()):",
+            }[operation.get()])
+            argument_entry.configure(state="disabled" if operation.get() == "Delete" else "normal")
+        operation.trace_add("write", lambda *args: on_operation())
+        on_operation()
+        
+        filtered = self._filter_matches is not None
+        scope = ctk.StringVar(value="Filtered records" if filtered else "All records")
+        ctk.CTkSegmentedButton(dialog, values=["All records", "Filtered records"], variable=scope,
+                               state="normal" if filtered else "disabled").pack(pady=(15, 5))
+        
+        progress = ctk.CTkProgressBar(dialog, width=400)
+        progress.set(0)
+        progress.pack(pady=(10, 0))
+        lbl_result = ctk.CTkLabel(dialog, text="", font=("Segoe UI", 11))
+        lbl_result.pack(pady=5)
+        
+        run = {"cancelled": False, "active": False}
+        
+        def start():
+            if run["active"]:
+                return
+            path = tuple(key for key in path_entry.get().strip().split(".") if key)
+            indices = self._filter_matches if scope.get() == "Filtered records" else None
+            self._update_memory_from_ui()
+            records = self.data.snapshot()
+            state = {"done": 0, "total": len(records) if indices is None else len(indices)}
+            run["active"] = True
+            btn_apply.configure(state="disabled")
             
-            # Handle booleans and null
-            if json_text[i:i+4] == 'true' or json_text[i:i+5] == 'false':
-                length = 4 if json_text[i:i+4] == 'true' else 5
-                start_pos = f"{line}.{col}"
-                end_pos = f"{line}.{col + length}"
-                self.txt_preview.tag_add("boolean", start_pos, end_pos)
-                i += length
-                col += length
-                continue
+            def work():
+                try:
+                    state["result"] = plan_bulk_edit(
+                        records, operation.get(), path, argument_entry.get(), indices,
+                        progress=lambda done, total: state.update(done=done),
+                        cancelled=lambda: run["cancelled"])
+                except Exception as e:
+                    state["error"] = e
+                state["finished"] = True
             
-            if json_text[i:i+4] == 'null':
-                start_pos = f"{line}.{col}"
-                end_pos = f"{line}.{col + 4}"
-                self.txt_preview.tag_add("null", start_pos, end_pos)
-                i += 4
-                col += 4
-                continue
+            def poll():
+                if not dialog.winfo_exists():
+                    return
+                if not state.get("finished"):
+                    progress.set(state["done"] / max(state["total"], 1))
+                    dialog.after(100, poll)
+                    return
+                run["active"] = False
+                btn_apply.configure(state="normal")
+                if "error" in state:
+                    lbl_result.configure(text=str(state["error"]) if isinstance(state["error"], BulkEditError)
+                                         else f"Failed: {state['error']}")
+                    return
+                if state["result"] is None:
+                    return # Cancelled; the dialog is gone
+                changes, skipped = state["result"]
+                progress.set(1)
+                if changes:
+                    self._apply_changes(changes)
+                    self._record_edit(changes, f"{operation.get()} {'.'.join(path)} on {len(changes)} records")
+                lbl_result.configure(text=f"Changed {len(changes)} records" +
+                                     (f", skipped {skipped}" if skipped else ""))
             
-            # Move to next character
-            col += 1
-            i += 1
+            threading.Thread(target=work, daemon=True).start()
+            dialog.after(100, poll)
+        
+        def close():
+            run["cancelled"] = True
+            dialog.destroy()
+        dialog.protocol("WM_DELETE_WINDOW", close)
+        
+        btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        btn_frame.pack(pady=20, side="bottom")
+        
+        btn_apply = ctk.CTkButton(btn_frame, text="Apply", command=start, width=120, height=35,
+                                  fg_color=("#107C10", "#0F7B0F"), hover_color=("#0D5E0D", "#0E6A0E"))
+        btn_apply.pack(side="left", padx=10)
+        ctk.CTkButton(btn_frame, text="Close", command=close, width=120, height=35,
+                      fg_color=("#6B6B6B", "#4A4A4A"), hover_color=("#5A5A5A", "#5A5A5A")).pack(side="left", padx=10)
 
     def navigate_next(self):
-        if self.current_index < len(self.data) - 1:
+        index = self._step_index(1)
+        if index is not None:
             if self._update_memory_from_ui():
-                self.current_index += 1
-                self.display_current_object()
+                self.current_index = index
+                self._nav_direction = 1
+                self._request_display()
 
     def navigate_previous(self):
-        if self.current_index > 0:
+        index = self._step_index(-1)
+        if index is not None:
             if self._update_memory_from_ui():
-                self.current_index -= 1
-                self.display_current_object()
+                self.current_index = index
+                self._nav_direction = -1
+                self._request_display()
+
+    def _request_display(self):
+        """Show current_index once pending events are handled.
+
+        While an arrow key is held, the repeats that arrive during one render
+        only move current_index, so the form shows whichever record is
+        current when Tk is next idle instead of rendering every record.
+        """
+        self._refresh_status()
+        if not self._display_pending:
+            self._display_pending = True
+            self.after_idle(self._show_requested)
+
+    def _show_requested(self):
+        if self._display_pending:
+            self.display_current_object()
 
     def _update_memory_from_ui(self, silent=False):
         # Taking values from entry_map and putting them back into self.data[self.current_index]
-        obj = self.data[self.current_index]
-        
-        for path_keys, (var, original_type) in self.entry_map.items():
-            # Traverse to the parent of the leaf
-            target = obj
-            for key in path_keys[:-1]:
-                target = target[key]
-            
-            # The last key is the field to update
-            final_key = path_keys[-1]
-            raw_value = var.get()
-            
-            # Type preservation
-            try:
-                if original_type is bool:
-                    if raw_value.lower() == 'true': typed_value = True
-                    elif raw_value.lower() == 'false': typed_value = False
-                    else: typed_value = bool(raw_value)
-                elif original_type is int:
-                    try:
-                        typed_value = int(raw_value)
-                    except ValueError:
-                         typed_value = 0 if silent else int(raw_value) # Fallback during typing
-                elif original_type is float:
-                    try:
-                         typed_value = float(raw_value)
-                    except ValueError:
-                         typed_value = 0.0 if silent else float(raw_value)
-                elif original_type is list:
-                     # simplistic list eval
-                    try:
-                        typed_value = json.loads(raw_value.replace("'", '"'))
-                    except:
-                        typed_value = raw_value # Fallback
-                elif original_type is type(None):
-                    if raw_value.lower() == 'null': typed_value = None
-                    else: typed_value = raw_value
-                else:
-                    typed_value = raw_value
-                    
-                target[final_key] = typed_value
-            except ValueError:
-                # If silent (e.g. typing "12" but curr "1"), don't crash
-                # We just let it be. But wait, if we are live updating JSON,
-                # we need valid data. If invalid, maybe don't update key?
-                # For string-based logic, it is fine.
-                if not silent:
-                    # Only valid types on full save/navigation?
-                    # Actually for live preview we want to see what we type.
-                    # Implementing a hybrid: try convert, else keep string.
-                    target[final_key] = raw_value 
-                else:
-                     target[final_key] = raw_value
+        self._cancel_pending_sync()
+        changed = False
+        for path_keys in self.entry_map:
+            if self._sync_field(path_keys, silent):
+                changed = True
+
+        if changed:
+            self.data.mark_dirty(self.displayed_index, self.current_obj) # Keep the edit pinned until saved
+        return True
 
+    def _sync_field(self, path_keys, silent=False):
+        """Write one field's text back into the current object; returns True if it changed"""
+        var, original_type = self.entry_map[path_keys]
+        
+        # Parent containers are cached per object, so a keystroke doesn't
+        # re-walk the path from the root
+        parent_path = path_keys[:-1]
+        target = self._parent_refs.get(parent_path)
+        if target is None:
+            target = self.current_obj
+            for key in parent_path:
+                target = target[key]
+            self._parent_refs[parent_path] = target
+        
+        # The last key is the field to update
+        final_key = path_keys[-1]
+        schema = self._schema
+        if schema is not None:
+            # Coerced like the field's values in other records, e.g. a null
+            # here that holds integers elsewhere
+            typed_value = schema.coerce(path_keys, var.get(), original_type, silent)
+        else:
+            typed_value = coerce_value(var.get(), original_type, silent)
+        if same_value(target[final_key], typed_value):
+            return False
+        if schema is not None:
+            self._show_field_problem(path_keys, schema.check(path_keys, typed_value))
+        change = (self.displayed_index, path_keys, target[final_key], typed_value)
+        self._index_change(*change)
+        # Keystrokes in one field in quick succession undo together
+        self._record_edit([change], f"Edit {'.'.join(str(k) for k in path_keys)}",
+                          coalesce_key=change[:2])
+        target[final_key] = typed_value
         return True
 
+    def _record_edit(self, changes, label, coalesce_key=None):
+        """Put applied changes in the undo history and the crash-recovery log"""
+        self.journal.record(changes, label, coalesce_key)
+        if self._edit_log is not None:
+            self._edit_log.append(changes)
+
     def save_changes(self):
         if not self.filepath:
             return
+        if self._save_job is not None:
+            messagebox.showinfo("Save in Progress", "A save is already running.")
+            return
 
+        if file_stamp(self.filepath) != self.data.stamp:
+            self._merge_before_save()
+            return
         if messagebox.askyesno("Confirm Save", "Are you sure you want to overwrite the file?"):
             self._update_memory_from_ui() # Ensure latest
             try:
-                with open(self.filepath, 'w', encoding='utf-8') as f:
-                    json.dump(self.data, f, indent=2)
-                    f.write('\n') # Ensure trailing newline
-                messagebox.showinfo("Success", "File saved successfully!")
+                job = self.data.begin_save()
+                self._save_log_mark = self._edit_log.checkpoint()
+            except FileChangedError:
+                self._merge_before_save()
+                return
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save file: {str(e)}")
+                return
+            self._start_background_save(job)
 
-    def reload_file(self):
-        if self.filepath:
+    def _merge_before_save(self):
+        """Merge in what changed on disk rather than save over it: a save copies unchanged records from the file"""
+        name = os.path.basename(self.filepath)
+        stamp = file_stamp(self.filepath)
+        if stamp is None:
+            messagebox.showerror("Error", f"Failed to save file: {name} can no longer be found.")
+            return
+        messagebox.showwarning("File Changed on Disk",
+                               f"{name} changed on disk since it was loaded, so it can't be saved over yet.\n\n"
+                               "Its changes are merged in first, keeping your unsaved edits. Save again once they are.")
+        if self._record_hashes is not None and not self._disk_merging and self._save_job is None:
+            self._reload_changed_records(stamp)
+        # Otherwise _watch_file merges them once the records are hashed or the running merge is done
+
+    def _start_background_save(self, job):
+        """Write the snapshot on a worker thread; the UI stays usable meanwhile"""
+        self._save_job = job
+        self._save_cancel = threading.Event()
+        self._save_started = time.perf_counter()
+        state = {"written": 0, "total": max(job.total, 1), "error": None}
+
+        def on_progress(written, total):
+            state["written"], state["total"] = written, total
+
+        def work():
             try:
-                with open(self.filepath, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
-                self.display_current_object()
-                messagebox.showinfo("Reloaded", "File reloaded from disk.")
+                job.write(progress=on_progress, cancelled=self._save_cancel)
+            except BaseException as e:
+                state["error"] = e
+
+        worker = threading.Thread(target=work, daemon=True)
+        worker.start()
+        self._save_worker = (worker, state)
+
+        self.save_progress.set(0)
+        self.btn_cancel_save.configure(state="normal")
+        self.save_progress_frame.pack(side="left", padx=10, pady=12)
+
+        def poll():
+            if worker.is_alive():
+                self.save_progress.set(state["written"] / state["total"])
+                self.after(100, poll)
+                return
+            self._finish_background_save(job, state["error"])
+
+        self.after(100, poll)
+
+    def _finish_background_save(self, job, error):
+        self._save_job = self._save_worker = None
+        self.save_progress_frame.pack_forget()
+        if error is None:
+            try:
+                self.data.finish_save(job)
+                self._edit_log.rebase(self._save_log_mark) # Edits made while saving stay logged
+                if self.profiler is not None:
+                    self.profiler.record("save", time.perf_counter() - self._save_started)
+                self._store_schema()
+                self._conflicts = set() # Saving kept the unsaved side of every conflict
+                self._start_watching()
+                self._prefetcher.clear() # Record ids were renumbered
+                if self._search_backlog is not None:
+                    self._start_search_index() # The build was reading the old file
+                if self._schema_backlog is not None:
+                    self._start_schema()
             except Exception as e:
-                 messagebox.showerror("Error", f"Failed to reload: {str(e)}")
+                error = e
+        else:
+            job.discard()
+
+        if isinstance(error, FileChangedError):
+            self._merge_before_save()
+        elif isinstance(error, SaveCancelled):
+            self.lbl_status.configure(text="Save cancelled")
+            self.after(2000, self._refresh_status)
+        elif error:
+            messagebox.showerror("Error", f"Failed to save file: {str(error)}")
+        else:
+            messagebox.showinfo("Success", "File saved successfully!")
+
+    def toggle_profile_overlay(self):
+        if self.lbl_profile.winfo_ismapped():
+            self.lbl_profile.pack_forget()
+            return
+        self.lbl_profile.pack(side="left", padx=10, pady=4)
+        self._refresh_profile_overlay()
+
+    def _refresh_profile_overlay(self):
+        if not self.lbl_profile.winfo_ismapped():
+            return
+        self._update_profile_gauges()
+        lines = []
+        for phase in self.profiler.phases():
+            stats = self.profiler.percentiles(phase)
+            lines.append(f"{phase:<11}{stats['p50']:7.1f}{stats['p95']:7.1f}{stats['p99']:7.1f} ms")
+        gauges = self.profiler.gauges
+        memory = f"{gauges['memory_mb']} MB" if gauges.get("memory_mb") is not None else "memory n/a"
+        lines.append(f"{gauges['widgets']} widgets · {gauges['form_rows']} rows · {memory}")
+        self.lbl_profile.configure(text="phase        p50    p95    p99\n" + "\n".join(lines))
+        self.after(PROFILE_REFRESH_MS, self._refresh_profile_overlay)
+
+    def _update_profile_gauges(self):
+        widgets = 0
+        pending = [self]
+        while pending:
+            children = pending.pop().winfo_children()
+            widgets += len(children)
+            pending.extend(children)
+        memory = process_memory()
+        self.profiler.gauges.update(
+            widgets=widgets,
+            form_rows=len(self._form_rows) + len(self._virtual_rows),
+            memory_mb=None if memory is None else round(memory / 1e6, 1),
+            undo_mb=round(self.journal.size_bytes / 1e6, 1),
+        )
+
+    def dump_profile(self):
+        """Save the timings and gauges as JSON, e.g. to attach to a bug report"""
+        path = filedialog.asksaveasfilename(title="Save Profile", initialfile="json_editor_profile.json",
+                                            defaultextension=".json", filetypes=[("JSON files", "*.json")])
+        if not path:
+            return
+        self._update_profile_gauges()
+        try:
+            self.profiler.dump(path, file=self.filepath, records=len(self.data))
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save profile: {str(e)}")
+
+    def _start_watching(self):
+        """Note the file's stamp and hash its records on a worker thread, for _watch_file to compare with"""
+        self._hash_build += 1
+        build = self._hash_build
+        self._disk_stamp = self.data.stamp # Of the file the records were indexed from
+        self._pending_stamp = None
+        self._record_hashes = None
+        store = self.data
+        state = {}
+
+        def work():
+            try:
+                state["hashes"] = store.record_hashes(cancelled=lambda: build != self._hash_build)
+            except Exception:
+                pass # e.g. the store was saved over meanwhile, which starts another pass
+            state["finished"] = True
+
+        def poll():
+            if build != self._hash_build:
+                return
+            if not state.get("finished"):
+                self.after(200, poll)
+                return
+            self._record_hashes = state.get("hashes")
+
+        threading.Thread(target=work, daemon=True).start()
+        self.after(200, poll)
+
+    def _watch_file(self):
+        """Check the open file's size and mtime; a change that holds for two checks is merged in"""
+        self.after(WATCH_INTERVAL_MS, self._watch_file)
+        if self._record_hashes is None or self._save_job is not None or self._disk_merging:
+            return
+        stamp = file_stamp(self.filepath)
+        if stamp is None or stamp == self._disk_stamp:
+            self._pending_stamp = None
+            return
+        if stamp != self._pending_stamp:
+            self._pending_stamp = stamp # The writer may not be done yet
+            return
+        self._reload_changed_records(stamp)
+
+    def _reload_changed_records(self, stamp):
+        """Index the file as changed on disk on a worker thread, then merge in the records whose bytes changed"""
+        self._disk_merging = True
+        build = self._hash_build
+        path, lines, old_hashes = self.filepath, self.data.lines, self._record_hashes
+        state = {}
+
+        def work():
+            store = None
+            try:
+                store = RecordStore.open(path, lines=lines)
+                hashes = store.record_hashes()
+                id_map, changed = match_records(old_hashes, hashes)
+                if not len(store):
+                    raise ValueError("JSON array is empty.")
+                # Only the records whose bytes changed are decoded, to check they are objects
+                record_id = changed.find(1)
+                while record_id != -1:
+                    if not isinstance(store[record_id], dict):
+                        raise ValueError(f"Item at index {record_id} is not an object.")
+                    record_id = changed.find(1, record_id + 1)
+                state.update(store=store, hashes=hashes, id_map=id_map, changed=changed)
+            except Exception as e:
+                if store is not None:
+                    store.close()
+                state["error"] = e
+            state["finished"] = True
+
+        def poll():
+            if not state.get("finished"):
+                self.after(200, poll)
+                return
+            self._disk_merging = False
+            store = state.get("store")
+            if build != self._hash_build or self._save_job is not None or file_stamp(path) != stamp:
+                # A load or save came in between, or the file changed again: the next check retries
+                if store is not None:
+                    store.close()
+                return
+            error = state.get("error")
+            if error is not None:
+                self._disk_stamp = stamp # Not retried until the file changes again
+                reason = "it is not valid JSON" if isinstance(error, json.JSONDecodeError) else str(error)
+                self.lbl_status.configure(
+                    text=f"⚠ {os.path.basename(path)} changed on disk but can't be loaded: {reason}")
+                return
+            self._merge_disk_changes(store, state["hashes"], state["id_map"], state["changed"], stamp)
+
+        threading.Thread(target=work, daemon=True).start()
+        self.after(200, poll)
+
+    def _merge_disk_changes(self, store, hashes, id_map, changed, stamp):
+        """Switch to the file as changed on disk, keeping unsaved edits, the position and collapsed sections"""
+        self._update_memory_from_ui()
+        old = self.data
+        merge = store.carry_edits(old, id_map, changed, self.current_index)
+        # Unless records were added or removed before some of the old ones, indices still hold
+        shifted = id_map != array('q', range(len(id_map)))
+        # A file replaced by a rename keeps its old bytes in old's map; one rewritten in place
+        # only does if all that changed is records added at the end
+        replaced = stamp[2] != self._disk_stamp[2]
+        incremental = (not shifted and len(merge.updated) <= INCREMENTAL_RELOAD_LIMIT
+                       and (replaced or all(index >= len(old) for index in merge.updated)))
+        if incremental:
+            for index in merge.updated:
+                self._index_change(index, (), old[index] if index < len(old) else ABSENT, store[index])
+        old.close()
+        self.data = store
+        self._record_hashes = hashes
+        self._disk_stamp = stamp
+        self._pending_stamp = None
+        self._prefetcher.clear()
+        # Builds still running were reading the old file
+        if not incremental or self._search_backlog is not None:
+            self._start_search_index()
+        if not incremental or self._schema_backlog is not None:
+            self._start_schema()
+        if shifted:
+            self.journal.clear() # Its record indices no longer line up
+            self._conflicts = set(merge.conflicts)
+        else:
+            self._conflicts.update(merge.conflicts)
+        if shifted or merge.updated:
+            self.clear_filter()
+
+        # The unsaved edits now apply to the new file: log them against it
+        if self._edit_log is not None:
+            self._edit_log.close()
+        remove_log(self.filepath)
+        self._edit_log = EditLog(self.filepath)
+        if merge.changes:
+            self._edit_log.append(merge.changes)
+
+        self.current_index = merge.position
+        if shifted or merge.position in merge.conflicts or not self.data.holds(merge.position, self.current_obj):
+            self._cancel_pending_sync()
+            self.display_current_object()
+        if not merge.updated and not merge.conflicts:
+            self._refresh_status()
+            return
+        status = f"{os.path.basename(self.filepath)} changed on disk: {len(merge.updated)} objects reloaded"
+        if merge.conflicts:
+            shown = ", ".join(str(index + 1) for index in merge.conflicts[:5])
+            more = "…" if len(merge.conflicts) > 5 else ""
+            status += f"; your unsaved edits kept over changes to objects {shown}{more}"
+        self.lbl_status.configure(text=status)
+        self.after(5000, self._refresh_status)
+
+    def on_closing(self):
+        if self._save_job is not None:
+            if not messagebox.askyesno("Save in Progress",
+                                       "A save is still running. Cancel it and quit?\n\n"
+                                       "Unsaved edits stay in the edit log and are offered again next time."):
+                return
+            self._abort_background_save()
+        if self._edit_log is not None:
+            self._edit_log.close() # Flush the last batch of logged edits
+        self.destroy()
+
+    def _abort_background_save(self):
+        """Cancel the running save and wait for its writer, so it can remove or truncate what it wrote"""
+        job = self._save_job
+        worker, state = self._save_worker
+        self._save_cancel.set()
+        worker.join()
+        self._save_job = self._save_worker = None
+        if state["error"] is not None:
+            job.discard()
+            return
+        # Finished before it saw the cancel: keep the save, so the log doesn't replay it again
+        try:
+            self.data.finish_save(job)
+            if self._edit_log is not None:
+                self._edit_log.rebase(self._save_log_mark)
+        except Exception:
+            pass  # finish_save() removed its temp file; the log still holds the edits
+
+    def cancel_save(self):
+        if self._save_job is not None:
+            self._save_cancel.set()
+            self.btn_cancel_save.configure(state="disabled")
+
+    def reload_file(self):
+        if self.filepath:
+            self.load_specific_file(self.filepath, reload=True)
 
     def add_new_object(self):
         """Add a new object to the array"""
@@ -716,13 +2280,16 @@ class JSONEditor(ctk.CTk):
             
             # Try to parse value as JSON, otherwise treat as string
             try:
-                parsed_value = json.loads(value)
+                parsed_value = json_codec.loads(value)
             except:
                 parsed_value = value
             
             # Create new object with the property
             new_obj = {key: parsed_value}
             self.data.append(new_obj)
+            change = (len(self.data) - 1, (), ABSENT, new_obj)
+            self._index_change(*change)
+            self._record_edit([change], "Add object")
             
             # Navigate to the new object
             self.current_index = len(self.data) - 1
@@ -748,8 +2315,14 @@ class JSONEditor(ctk.CTk):
         
         # Deep copy the last object to avoid reference issues
         import copy
-        last_object = copy.deepcopy(self.data[-1])
+        last_object = self._decode_record(len(self.data) - 1)
+        if last_object is None:
+            return
+        last_object = copy.deepcopy(last_object)
         self.data.append(last_object)
+        change = (len(self.data) - 1, (), ABSENT, last_object)
+        self._index_change(*change)
+        self._record_edit([change], "Copy last object")
         
         # Navigate to the new copied object
         self.current_index = len(self.data) - 1
@@ -758,6 +2331,9 @@ class JSONEditor(ctk.CTk):
 
     def add_property_to_object(self, path_keys):
         """Add a new property to an existing object"""
+        if self.current_obj is None:
+            self._decode_record(self.displayed_index) # Says why it can't be edited
+            return
         # Create dialog
         dialog = ctk.CTkToplevel(self)
         dialog.title("Add Property")
@@ -769,6 +2345,15 @@ class JSONEditor(ctk.CTk):
         ctk.CTkLabel(dialog, text=f"Add property to: {' → '.join(str(k) for k in path_keys)}", 
                      font=("Segoe UI", 12, "bold")).pack(pady=(20, 10))
         
+        # Properties other records have here but this one doesn't
+        if self._schema is not None:
+            target = get_path(self.current_obj, tuple(path_keys))
+            missing = [key for key in self._schema.children(path_keys) if key not in target][:6]
+            if missing:
+                dialog.geometry("500x330")
+                ctk.CTkLabel(dialog, text=f"Other records also have: {', '.join(missing)}",
+                             font=("Segoe UI", 10), text_color="gray").pack()
+        
         ctk.CTkLabel(dialog, text="Property name:", font=("Segoe UI", 11)).pack(pady=(10, 5))
         key_entry = ctk.CTkEntry(dialog, width=400)
         key_entry.pack(pady=5)
@@ -778,6 +2363,17 @@ class JSONEditor(ctk.CTk):
         value_entry = ctk.CTkEntry(dialog, width=400)
         value_entry.pack(pady=5)
         
+        def schema_default():
+            """The usual value of the named property in other records, or ABSENT"""
+            if self._schema is None:
+                return ABSENT
+            return self._schema.default(tuple(path_keys) + (key_entry.get().strip(),))
+        
+        def suggest_default(event=None):
+            default = schema_default()
+            value_entry.configure(placeholder_text="" if default is ABSENT else json_codec.dumps(default))
+        key_entry.bind("<KeyRelease>", suggest_default)
+        
         def add_property():
             key = key_entry.get().strip()
             value = value_entry.get().strip()
@@ -786,8 +2382,10 @@ class JSONEditor(ctk.CTk):
                 messagebox.showwarning("Invalid Input", "Property name cannot be empty.")
                 return
             
+            # Keystrokes not synced yet go in first, so the form doesn't revert them
+            self._flush_pending_sync()
             # Navigate to the target object
-            obj = self.data[self.current_index]
+            obj = self.current_obj
             for k in path_keys:
                 obj = obj[k]
             
@@ -795,16 +2393,24 @@ class JSONEditor(ctk.CTk):
             if key in obj:
                 if not messagebox.askyesno("Confirm", f"Property '{key}' already exists. Overwrite?"):
                     return
+            old_value = obj.get(key, ABSENT)
             
-            # Parse value
-            if value.lower() == 'object':
+            # Parse value; left empty, it defaults to what other records have
+            default = schema_default() if not value else ABSENT
+            if default is not ABSENT:
+                obj[key] = default
+            elif value.lower() == 'object':
                 obj[key] = {}
             else:
                 try:
-                    obj[key] = json.loads(value)
+                    obj[key] = json_codec.loads(value)
                 except:
                     obj[key] = value
+            change = (self.displayed_index, tuple(path_keys) + (key,), old_value, obj[key])
+            self._index_change(*change)
+            self._record_edit([change], f"Add property {key}")
             
+            self.data.mark_dirty(self.displayed_index, self.current_obj)
             self.display_current_object()
             dialog.destroy()
         
@@ -816,6 +2422,12 @@ class JSONEditor(ctk.CTk):
         ctk.CTkButton(btn_frame, text="Cancel", command=dialog.destroy, width=120, height=35,
                       fg_color=("#6B6B6B", "#4A4A4A"), hover_color=("#5A5A5A", "#5A5A5A")).pack(side="left", padx=10)
 
-if __name__ == "__main__":
-    app = JSONEditor()
+def main(filename=None):
+    # Set appearance and color theme
+    ctk.set_appearance_mode("dark")  # Modes: "System" (default), "Dark", "Light"
+    ctk.set_default_color_theme("blue")  # Themes: "blue" (default), "green", "dark-blue"
+    app = JSONEditor(filename)
     app.mainloop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import re
+from collections import defaultdict
+
+import json_codec
+
+
+def dumps_with_spans(obj, indent=2):
+    """json.dumps(obj, indent=indent) plus where each leaf value ended up in the text.
+
+    Returns (text, spans). spans maps the path tuple of every non-dict value
+    (the values that get a form field) to [start_line, start_col, end_line,
+    end_col] in Tk text-index terms, i.e. 1-based lines and 0-based columns.
+    """
+    spans = {}
+    if not obj:
+        return "{}", spans
+    lines = ["{"]
+    _dump_members(obj, (), 1, indent, lines, spans)
+    lines.append("}")
+    return "\n".join(lines), spans
+
+
+def dumps_value(value, depth, indent=2):
+    """Serialize a leaf exactly as it appears nested depth levels deep in the preview"""
+    text = json_codec.dumps(value, indent=indent)
+    if "\n" in text:
+        text = text.replace("\n", "\n" + " " * (indent * depth))
+    return text
+
+
+def _dump_members(obj, path, level, indent, lines, spans):
+    pad = " " * (indent * level)
+    last = len(obj) - 1
+    for i, (key, value) in enumerate(obj.items()):
+        comma = "," if i < last else ""
+        head = f"{pad}{json_codec.dumps(key)}: "
+        if isinstance(value, dict) and value:
+            lines.append(head + "{")
+            _dump_members(value, path + (key,), level + 1, indent, lines, spans)
+            lines.append(pad + "}" + comma)
+            continue
+
+        value_lines = dumps_value(value, level, indent).split("\n")
+        start_line = len(lines) + 1
+        lines.append(head + value_lines[0])
+        lines.extend(value_lines[1:])
+        if len(value_lines) > 1:
+            end_col = len(value_lines[-1])
+        else:
+            end_col = len(head) + len(value_lines[0])
+        spans[path + (key,)] = [start_line, len(head), len(lines), end_col]
+        lines[-1] += comma
+
+
+# Tokens of json.dumps output, one regex match each. A string followed by a
+# colon is a key. Numbers follow the old highlighter: an optional minus, a
+# digit, then any of digits . e E + -
+_TOKEN_RE = re.compile(r'("[^"\\]*(?:\\.[^"\\]*)*")([ \t]*:)?|([{\[])|([}\]])|(-?\d[\d.eE+-]*)|(true|false)|(null)')
+_SIMPLE_TAGS = {1: "string", 5: "number", 6: "boolean", 7: "null"}
+
+
+def highlight_ranges(text, start_line=1, start_col=0, depth=0, levels=3):
+    """Tag ranges for VS Code-style highlighting of (a fragment of) the preview text.
+
+    text starts at start_line.start_col, inside depth open brackets. Returns
+    {tag: [index1, index2, index1, index2, ...]} so each tag can be applied
+    with a single Text.tag_add call. Brackets and keys use bracket_N/key_N
+    with N = nesting depth % levels.
+    """
+    ranges = defaultdict(list)
+    offset = start_col
+    # json.dumps escapes newlines inside strings, so every token sits on one line
+    for line_no, line in enumerate(text.split("\n"), start_line):
+        for m in _TOKEN_RE.finditer(line):
+            kind = m.lastindex
+            start, end = m.start(), m.end()
+            if kind == 3:
+                tag = f"bracket_{depth % levels}"
+                depth += 1
+            elif kind == 4:
+                depth -= 1
+                tag = f"bracket_{depth % levels}"
+            elif kind == 2:
+                tag = f"key_{depth % levels}"
+                end = m.end(1)
+            else:
+                tag = _SIMPLE_TAGS[kind]
+            ranges[tag].append(f"{line_no}.{start + offset}")
+            ranges[tag].append(f"{line_no}.{end + offset}")
+        offset = 0
+    return ranges
+
+
+def line_depths(text, indent=2):
+    """Bracket depth at the start of each line of json.dumps(..., indent=indent) output.
+
+    Read off the indentation, so highlighting can start on any line without
+    scanning everything above it. A line opening with a closing bracket is
+    still inside that bracket.
+    """
+    depths = []
+    for line in text.split("\n"):
+        stripped = line.lstrip(" ")
+        depth = (len(line) - len(stripped)) // indent
+        if stripped[:1] in ("}", "]"):
+            depth += 1
+        depths.append(depth)
+    return depths
+
+
+class HighlightedLines:
+    """Sorted, disjoint [first, last] line ranges that already carry highlight tags"""
+
+    def __init__(self):
+        self.ranges = []
+
+    def clear(self):
+        self.ranges = []
+
+    def missing(self, first, last):
+        """The parts of first..last not highlighted yet, as (first, last) pairs"""
+        gaps = []
+        for a, b in self.ranges:
+            if b < first:
+                continue
+            if a > last:
+                break
+            if a > first:
+                gaps.append((first, a - 1))
+            first = b + 1
+        if first <= last:
+            gaps.append((first, last))
+        return gaps
+
+    def add(self, first, last):
+        merged = []
+        for a, b in self.ranges:
+            if b < first - 1 or a > last + 1:
+                merged.append([a, b])
+            else:
+                first, last = min(a, first), max(b, last)
+        merged.append([first, last])
+        merged.sort()
+        self.ranges = merged
+
+    def replace(self, first, last, line_delta):
+        """Lines first..last were rewritten and shifted everything below by line_delta.
+
+        The rewritten lines are forgotten (they get re-highlighted when next
+        in view); ranges below them move with the text.
+        """
+        kept = []
+        for a, b in self.ranges:
+            if a < first:
+                kept.append([a, min(b, first - 1)])
+            if b > last:
+                kept.append([max(a, last + 1) + line_delta, b + line_delta])
+        self.ranges = kept
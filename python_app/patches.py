@@ -0,0 +1,68 @@
+# A change is (record index, path tuple, old value, new value): the value at
+# path in one record went from old to new. ABSENT as old or new means the key
+# didn't / doesn't exist; path () stands for the whole record, so (i, (),
+# ABSENT, obj) inserts a record at i and (i, (), obj, ABSENT) deletes it.
+# Swapping old and new gives the inverse change.
+
+
+class _Absent:
+    def __repr__(self):
+        return "ABSENT"
+
+
+ABSENT = _Absent()
+
+
+def get_path(obj, path):
+    """The value at path in obj, or ABSENT"""
+    for key in path:
+        if not isinstance(obj, dict) or key not in obj:
+            return ABSENT
+        obj = obj[key]
+    return obj
+
+
+def set_path(obj, path, value):
+    """Set (or with ABSENT, delete) the value at path, creating missing parent objects"""
+    for key in path[:-1]:
+        child = obj.get(key)
+        if not isinstance(child, dict):
+            if value is ABSENT:
+                return
+            child = obj[key] = {}
+        obj = child
+    if value is ABSENT:
+        obj.pop(path[-1], None)
+    else:
+        obj[path[-1]] = value
+
+
+def inverse(changes):
+    """The changes that undo changes, in the order to apply them"""
+    return [(record, path, new, old) for record, path, old, new in reversed(changes)]
+
+
+def apply_changes(data, changes):
+    """Apply changes to a RecordStore, marking records dirty; returns the set of touched record indices"""
+    touched = set()
+    for record, path, old, new in changes:
+        if path:
+            set_path(data[record], path, new)
+        elif old is ABSENT:
+            data.insert(record, new)
+        elif new is ABSENT:
+            del data[record]
+            touched.discard(record)
+            continue
+        else:
+            data[record] = new
+        touched.add(record)
+    for record in touched:
+        data.mark_dirty(record)
+    return touched
+
+
+def is_structural(change):
+    """Whether change inserts or deletes a record, shifting the indices after it"""
+    _, path, old, new = change
+    return not path and (old is ABSENT or new is ABSENT)
@@ -0,0 +1,103 @@
+import queue
+import threading
+
+import json_codec
+
+
+class PreparedRecord:
+    """Everything display_current_object needs for one record, computed ahead of time"""
+
+    __slots__ = ("index", "record_id", "obj", "collapsed", "text", "spans", "ranges", "rows")
+
+    def __init__(self, index, record_id, obj, collapsed, text, spans, ranges, rows):
+        self.index = index
+        self.record_id = record_id
+        self.obj = obj
+        self.collapsed = collapsed  # collapsed_sections the row model was built with
+        self.text = text
+        self.spans = spans
+        self.ranges = ranges  # highlight_ranges(text), or None for a lazily highlighted preview
+        self.rows = rows
+
+
+class RecordPrefetcher:
+    """Prepares records on a worker thread so navigating to them is instant.
+
+    request() is called on the UI thread with a RecordStore.peek() result;
+    the worker decodes it if needed and runs prepare(obj, collapsed), which
+    must not touch Tk and returns (text, spans, ranges, rows). The UI thread
+    collects the result with take() when it navigates there.
+    """
+
+    def __init__(self, prepare, keep=4):
+        self._prepare = prepare
+        self.keep = keep  # prepared records held at most
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._ready = {}  # index -> PreparedRecord
+        self._pending = set()
+        self._generation = 0
+        self._versions = {}  # index -> times discard() invalidated it; results from before are dropped
+        self._thread = None
+
+    def request(self, index, record_id, source, collapsed):
+        with self._lock:
+            if index in self._pending:
+                return
+            prepared = self._ready.get(index)
+            if prepared is not None and prepared.record_id == record_id and prepared.collapsed == collapsed:
+                return
+            self._pending.add(index)
+            job = (self._generation, self._versions.get(index, 0), index, record_id, source, collapsed)
+        self._queue.put(job)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work, daemon=True)
+            self._thread.start()
+
+    def take(self, index):
+        """The prepared record for index, if one is ready; check its record_id before use"""
+        with self._lock:
+            return self._ready.pop(index, None)
+
+    def retain(self, indices):
+        """Drop prepared records for anything outside indices"""
+        with self._lock:
+            for index in [i for i in self._ready if i not in indices]:
+                del self._ready[index]
+
+    def discard(self, indices):
+        """Drop prepared records for indices, e.g. because they were edited, including any being prepared"""
+        with self._lock:
+            for index in indices:
+                self._ready.pop(index, None)
+                self._pending.discard(index)
+                self._versions[index] = self._versions.get(index, 0) + 1
+
+    def clear(self):
+        """Forget everything prepared or queued, e.g. after record ids changed"""
+        with self._lock:
+            self._generation += 1
+            self._ready.clear()
+            self._pending.clear()
+            self._versions.clear()
+
+    def _work(self):
+        while True:
+            generation, version, index, record_id, source, collapsed = self._queue.get()
+            if generation != self._generation:
+                continue
+            try:
+                obj = json_codec.loads(source) if isinstance(source, bytes) else source
+                prepared = PreparedRecord(index, record_id, obj, collapsed, *self._prepare(obj, collapsed))
+            except Exception:
+                # e.g. the object was edited while being serialized; it is
+                # simply prepared on demand instead
+                prepared = None
+            with self._lock:
+                if generation != self._generation or version != self._versions.get(index, 0):
+                    continue
+                self._pending.discard(index)
+                if prepared is not None:
+                    self._ready[index] = prepared
+                    while len(self._ready) > self.keep:
+                        del self._ready[next(iter(self._ready))]
@@ -0,0 +1,208 @@
+import ast
+import operator
+from array import array
+
+from search_index import index_key
+
+_MISSING = object()
+_LITERAL_NAMES = {"true": True, "false": False, "null": None}
+
+
+def _equals(a, b):
+    # true is not 1 and false is not 0, as in same_value()
+    if (a.__class__ is bool) != (b.__class__ is bool):
+        return False
+    return a == b
+
+
+_COMPARISONS = {
+    ast.Eq: _equals,
+    ast.NotEq: lambda a, b: not _equals(a, b),
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+_CHUNK = 5000  # records between cancellation checks and progress reports
+
+
+class FilterError(ValueError):
+    pass
+
+
+class RecordFilter:
+    """A filter expression compiled once into a predicate over record objects.
+
+    Expressions use Python syntax over dotted paths and JSON literals:
+    ``status == "active" and meta.retries > 3``, ``not (tags == [])``,
+    ``"x" in tags``, ``name["first key"] != null``. A comparison whose path
+    is missing, or whose operands can't be compared, is simply false.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as e:
+            raise FilterError(f"Invalid filter: {e.msg}") from None
+        self.equalities = []  # (path, value) that every match must have, for index lookups
+        self._collect_equalities(tree.body)
+        self.predicate = self._compile(tree.body)
+
+    def candidates(self, search_index):
+        """Sorted record indices that can possibly match, or None if every record must be checked"""
+        if search_index is None or not self.equalities:
+            return None
+        result = None
+        for path, value in self.equalities:
+            hits = search_index.lookup(index_key(value), ".".join(str(k) for k in path))
+            result = hits if result is None else sorted(set(result).intersection(hits))
+            if not result:
+                break
+        return result
+
+    def run(self, records, candidates=None, progress=None, cancelled=None):
+        """Indices of matching records as array('q'), or None if cancelled.
+
+        records must support len() and, when candidates is given, indexing;
+        safe to call from a worker thread.
+        """
+        predicate = self.predicate
+        matches = array('q')
+        if candidates is None:
+            items = enumerate(records)
+            total = len(records)
+        else:
+            items = ((i, records[i]) for i in candidates)
+            total = len(candidates)
+        done = 0
+        for i, obj in items:
+            if predicate(obj):
+                matches.append(i)
+            done += 1
+            if done % _CHUNK == 0:
+                if cancelled is not None and cancelled():
+                    return None
+                if progress is not None:
+                    progress(done, total)
+        return matches
+
+    def _collect_equalities(self, node):
+        # Only plain `path == literal` terms of a top-level `and` (or the whole
+        # expression) narrow the candidates. Numbers are left out because the
+        # index keys 3 and 3.0 differently while == treats them as equal, and
+        # so are paths that may step into a list, which the index doesn't.
+        if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+            for value in node.values:
+                self._collect_equalities(value)
+        elif isinstance(node, ast.Compare) and len(node.ops) == 1 and isinstance(node.ops[0], ast.Eq):
+            for path_node, literal_node in ((node.left, node.comparators[0]), (node.comparators[0], node.left)):
+                path, literal = self._path(path_node), self._literal(literal_node)
+                if path is not None and literal is not _MISSING and (
+                        literal is None or isinstance(literal, (str, bool))) and not any(
+                        key.lstrip("-").isdigit() for key in path):
+                    self.equalities.append((path, literal))
+                    return
+
+    def _compile(self, node):
+        if isinstance(node, ast.BoolOp):
+            parts = [self._compile(value) for value in node.values]
+            if isinstance(node.op, ast.And):
+                def predicate(obj):
+                    for part in parts:
+                        if not part(obj):
+                            return False
+                    return True
+            else:
+                def predicate(obj):
+                    for part in parts:
+                        if part(obj):
+                            return True
+                    return False
+            return predicate
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            inner = self._compile(node.operand)
+            return lambda obj: not inner(obj)
+        if isinstance(node, ast.Compare):
+            if len(node.ops) != 1:
+                raise FilterError("Invalid filter: chain comparisons with 'and'")
+            compare = _COMPARISONS.get(type(node.ops[0]))
+            if compare is None:
+                raise FilterError(f"Invalid filter: unsupported operator {type(node.ops[0]).__name__}")
+            left = self._operand(node.left)
+            right = self._operand(node.comparators[0])
+
+            def predicate(obj):
+                a, b = left(obj), right(obj)
+                if a is _MISSING or b is _MISSING:
+                    return False
+                try:
+                    return bool(compare(a, b))
+                except TypeError:
+                    return False
+            return predicate
+        operand = self._operand(node)
+
+        def predicate(obj):
+            value = operand(obj)
+            return value is not _MISSING and bool(value)
+        return predicate
+
+    def _operand(self, node):
+        literal = self._literal(node)
+        if literal is not _MISSING:
+            return lambda obj: literal
+        path = self._path(node)
+        if path is None:
+            raise FilterError(f"Invalid filter: unexpected {ast.unparse(node)!r}")
+
+        def get(obj):
+            for key in path:
+                if isinstance(obj, dict):
+                    obj = obj.get(key, _MISSING)
+                elif isinstance(obj, list) and key.lstrip("-").isdigit() and -len(obj) <= int(key) < len(obj):
+                    obj = obj[int(key)]
+                else:
+                    return _MISSING
+                if obj is _MISSING:
+                    return _MISSING
+            return obj
+        return get
+
+    def _literal(self, node):
+        """The JSON value node stands for, or _MISSING if it isn't a literal"""
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (bytes, complex, type(...))):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in _LITERAL_NAMES:
+            return _LITERAL_NAMES[node.id]
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            value = self._literal(node.operand)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return -value
+        if isinstance(node, (ast.List, ast.Tuple)):
+            items = [self._literal(item) for item in node.elts]
+            if _MISSING not in items:
+                return items
+        if isinstance(node, ast.Dict) and None not in node.keys:
+            keys = [self._literal(key) for key in node.keys]
+            values = [self._literal(value) for value in node.values]
+            if all(isinstance(key, str) for key in keys) and _MISSING not in values:
+                return dict(zip(keys, values))
+        return _MISSING
+
+    def _path(self, node):
+        """Key tuple for a.b.c / a["b c"] / a[0], or None if node isn't a path"""
+        if isinstance(node, ast.Name):
+            return None if node.id in _LITERAL_NAMES else (node.id,)
+        if isinstance(node, ast.Attribute):
+            base = self._path(node.value)
+            return None if base is None else base + (node.attr,)
+        if isinstance(node, ast.Subscript):
+            base = self._path(node.value)
+            key = self._literal(node.slice)
+            if base is None or not isinstance(key, (str, int)) or isinstance(key, bool):
+                return None
+            return base + (str(key),)
+        return None
@@ -0,0 +1,994 @@
+import copy
+import difflib
+import json
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import MutableSequence
+
+import json_codec
+from patches import ABSENT
+
+# Files at least this large are indexed and decoded lazily instead of json.load-ed
+LAZY_LOAD_THRESHOLD = 32 * 1024 * 1024
+
+# Default bounds for the cache of decoded objects kept by a RecordStore
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+_COPY_CHUNK = 8 * 1024 * 1024  # bytes copied per write when splicing untouched records
+_READ_BLOCK = 1 << 20  # bytes read at once when going through records in file order
+
+# Each match runs up to and including the next bracket outside a string literal,
+# so the Python loop below only sees brackets and never the string contents
+_BRACKET_RE = re.compile(rb'[^"{}\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\[\]]*)*([{}\[\]])')
+_OPENERS = frozenset(b'{[')
+_WHITESPACE = b' \t\r\n'
+_PROGRESS_EVERY = 1 << 16  # brackets (or lines) between progress callbacks
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+_HASH_CHUNK = 1 << 16  # records hashed between checks for cancellation
+_COMPARE_CHUNK = 4096  # hashes compared at once before looking at single records
+_DIFF_LIMIT = 20000  # differing middles longer than this are paired by position instead of diffed
+
+
+def _syntax_error(msg, pos):
+    return json.JSONDecodeError(msg, "", pos)
+
+
+def scan_array_offsets(buf, progress=None):
+    """Scan a top-level JSON array once and return (starts, ends) byte offsets of its elements.
+
+    Only the array structure is checked here; the contents of each element are
+    validated when it is decoded. Raises ValueError with the same messages as
+    JSONEditor.validate_json, or json.JSONDecodeError for broken structure.
+    """
+    total = len(buf)
+    pos = 0
+    while pos < total and buf[pos] in _WHITESPACE:
+        pos += 1
+    if pos >= total:
+        raise _syntax_error("Expecting value", pos)
+    if buf[pos] != ord('['):
+        raise ValueError("Root element must be an array (list) of objects.")
+
+    starts = array('q')
+    ends = array('q')
+    depth = 0
+    prev_end = pos + 1  # end of the last element (or of the opening bracket)
+    tokens = 0
+
+    scanned = pos
+    for m in _BRACKET_RE.finditer(buf, pos):
+        if m.start() != scanned:  # the regex skipped ahead over an unterminated string
+            raise _syntax_error("Unterminated string", scanned)
+        scanned = m.end()
+        bracket_pos = scanned - 1
+        if buf[bracket_pos] in _OPENERS:
+            if depth == 1:
+                index = len(starts)
+                gap = bytes(buf[prev_end:bracket_pos]).strip(_WHITESPACE)
+                if gap != (b',' if index else b''):
+                    if gap.strip(b',' + _WHITESPACE):
+                        raise ValueError(f"Item at index {index} is not an object.")
+                    raise _syntax_error("Expecting ',' delimiter", bracket_pos)
+                if buf[bracket_pos] != ord('{'):
+                    raise ValueError(f"Item at index {index} is not an object.")
+                starts.append(bracket_pos)
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 1:
+                ends.append(m.end())
+                prev_end = m.end()
+            elif depth == 0:
+                gap = bytes(buf[prev_end:bracket_pos]).strip(_WHITESPACE)
+                if gap:
+                    raise ValueError(f"Item at index {len(starts)} is not an object.")
+                if bytes(buf[m.end():]).strip(_WHITESPACE):
+                    raise _syntax_error("Extra data", m.end())
+                break
+            elif depth < 0:
+                raise _syntax_error("Unbalanced brackets", bracket_pos)
+
+        tokens += 1
+        if progress and tokens % _PROGRESS_EVERY == 0:
+            progress(bracket_pos, total)
+    else:
+        raise _syntax_error("Unexpected end of file", total)
+
+    if not starts:
+        raise ValueError("JSON array is empty.")
+    if progress:
+        progress(total, total)
+    return starts, ends
+
+
+def is_json_lines(path, buf):
+    """Whether a file holds one JSON object per line rather than a single array"""
+    if os.path.splitext(path)[1].lower() in JSON_LINES_EXTENSIONS:
+        return True
+    pos = 0
+    while pos < len(buf) and buf[pos] in _WHITESPACE:
+        pos += 1
+    if pos >= len(buf) or buf[pos] != ord('{'):
+        return False
+    # A pretty-printed lone object is not JSON Lines: its first line isn't complete JSON
+    end = buf.find(b'\n', pos)
+    try:
+        return isinstance(json_codec.loads(buf[pos:end if end != -1 else len(buf)]), dict)
+    except ValueError:
+        return False
+
+
+def scan_line_offsets(buf, progress=None):
+    """Index a JSON Lines file in one pass: (starts, ends) byte offsets of its non-empty lines.
+
+    Lines are only decoded (and checked to be objects) when accessed. A
+    trailing \r is left out of the range, so the gaps between records hold
+    the file's line endings and a save writes new lines with the same.
+    """
+    starts = array('q')
+    ends = array('q')
+    add_start, add_end = starts.append, ends.append
+    find = buf.find
+    total = len(buf)
+    pos = 0
+    lines = 0
+    end = find(b'\n')
+    while end != -1:
+        stop = end - 1 if end != pos and buf[end - 1] == 13 else end  # 13 is \r
+        if stop != pos:
+            add_start(pos)
+            add_end(stop)
+        pos = end + 1
+        lines += 1
+        if progress and lines % _PROGRESS_EVERY == 0:
+            progress(pos, total)
+        end = find(b'\n', pos)
+    if bytes(buf[pos:]).strip(_WHITESPACE):  # last line without a newline
+        add_start(pos)
+        add_end(total)
+    if not starts:
+        raise _syntax_error("Expecting value", total)
+    if progress:
+        progress(total, total)
+    return starts, ends
+
+
+def validate_records(data):
+    """Why data can't be edited as an array of objects, or None if it can"""
+    if not isinstance(data, (list, RecordStore)):
+        return "Root element must be an array (list) of objects."
+    if not data:
+        return "JSON array is empty."
+    for idx, item in enumerate(data):
+        if not isinstance(item, dict):
+            if getattr(data, "lines", False):
+                return f"Record {idx + 1} is not an object."
+            return f"Item at index {idx} is not an object."
+    return None
+
+
+def file_stamp(path):
+    """(size, mtime_ns, inode) of the file at path, or None if it can't be read"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def _fd_stamp(fd):
+    st = os.fstat(fd)
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class FileChangedError(OSError):
+    """The file changed on disk since it was indexed, so its record offsets no longer hold"""
+
+    def __init__(self, path):
+        super().__init__(f"{path} changed on disk since it was loaded")
+        self.path = path
+
+
+class _FileReader:
+    """Byte ranges of a file, read from an open descriptor as they are sliced.
+
+    Used instead of a memory map: touching a mapped page past the end of a
+    file another program truncated kills the process with SIGBUS, whereas a
+    read just comes back short. Reads raise FileChangedError once the file
+    no longer has the stamp its offsets were indexed against (it was
+    rewritten in place); a file replaced by a rename keeps being read.
+    """
+
+    def __init__(self, path, stamp=None):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.stamp = stamp if stamp is not None else _fd_stamp(self._file.fileno())
+        self._lock = threading.Lock()  # a read never races close() for the descriptor
+
+    def __len__(self):
+        return self.stamp[0]
+
+    def __getitem__(self, key):
+        start, stop, _ = key.indices(self.stamp[0])
+        return self.read(start, stop - start)
+
+    def read(self, offset, size):
+        if size <= 0:
+            return b''
+        with self._lock:
+            if self._file is None:
+                raise ValueError("read of a closed file")
+            fd = self._file.fileno()
+            if _fd_stamp(fd) != self.stamp:
+                raise FileChangedError(self.path)
+            if hasattr(os, 'pread'):
+                data = os.pread(fd, size, offset)
+            else:
+                self._file.seek(offset)
+                data = self._file.read(size)
+        if len(data) != size:
+            raise FileChangedError(self.path)
+        return data
+
+    def sequential(self):
+        """A function (start, end) -> bytes reading a block at a time, for ranges taken in file order"""
+        block, block_start = None, 0
+
+        def read(start, end):
+            nonlocal block, block_start
+            block_end = block_start + len(block) if block is not None else 0
+            if block is None or start < block_start or end > block_end:
+                # Read ahead only while ranges follow on from the block; a jump reads just the range
+                ahead = block is None or block_start <= start <= block_end
+                stop = min(max(end, start + _READ_BLOCK), len(self)) if ahead else end
+                block, block_start = self.read(start, stop - start), start
+            return block[start - block_start:end - block_start]
+        return read
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _differences(old, new, start, stop, shift=0):
+    """Indices i in [start, stop) where old[i] != new[i + shift], for arrays of hashes"""
+    for chunk in range(start, stop, _COMPARE_CHUNK):
+        end = min(chunk + _COMPARE_CHUNK, stop)
+        if old[chunk:end] != new[chunk + shift:end + shift]:
+            yield from (i for i in range(chunk, end) if old[i] != new[i + shift])
+
+
+def _common_head(old, new, limit):
+    for i in _differences(old, new, 0, limit):
+        return i
+    return limit
+
+
+def _common_tail(old, new, limit):
+    n, m = len(old), len(new)
+    pos = 0
+    while pos < limit:
+        end = min(pos + _COMPARE_CHUNK, limit)
+        if old[n - end:n - pos] != new[m - end:m - pos]:
+            while old[n - 1 - pos] == new[m - 1 - pos]:
+                pos += 1
+            return pos
+        pos = end
+    return limit
+
+
+def _pair_by_position(id_map, changed, old, new, old_start, old_stop, new_start, new_stop):
+    """Pair old[old_start:old_stop] with new[new_start:new_stop] index by index"""
+    paired = min(old_stop - old_start, new_stop - new_start)
+    shift = new_start - old_start
+    id_map[old_start:old_start + paired] = array('q', range(new_start, new_start + paired))
+    for i in _differences(old, new, old_start, old_start + paired, shift):
+        changed[i + shift] = 1
+    changed[new_start + paired:new_stop] = b'\x01' * (new_stop - new_start - paired)
+
+
+def match_records(old, new):
+    """Pair up the records of two versions of a file by their record_hashes().
+
+    The common head and tail are paired first. What differs in between is
+    diffed when it is short enough, else paired by position; a run of
+    records replaced by as many others is paired by position too. Returns (id_map, changed):
+    id_map[old id] is the new id paired with it or -1 if it is gone, and
+    changed[new id] is 1 unless that record has the same bytes as its pair.
+    """
+    n, m = len(old), len(new)
+    changed = bytearray(m)
+    id_map = array('q', [-1]) * n
+    head = _common_head(old, new, min(n, m))
+    tail = _common_tail(old, new, min(n, m) - head)
+    id_map[:head] = array('q', range(head))
+    id_map[n - tail:] = array('q', range(m - tail, m))
+    old_stop, new_stop = n - tail, m - tail
+    if max(old_stop, new_stop) - head > _DIFF_LIMIT:
+        _pair_by_position(id_map, changed, old, new, head, old_stop, head, new_stop)
+        return id_map, changed
+    matcher = difflib.SequenceMatcher(None, old[head:old_stop], new[head:new_stop], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'replace' and i2 - i1 != j2 - j1:
+            i2 = i1  # no telling which replaced which: the old records are gone, the new ones added
+        _pair_by_position(id_map, changed, old, new, head + i1, head + i2, head + j1, head + j2)
+    return id_map, changed
+
+
+class RecordStore(MutableSequence):
+    """Objects of a JSON array file, read and decoded from it only when accessed.
+
+    Behaves like the list json.load would return (len(), indexing, iteration,
+    append(), insert(), del), so the editor can keep using it as self.data.
+    Decoded objects live in a bounded LRU cache; objects that were edited
+    (see mark_dirty) or added are pinned in memory until the next save.
+
+    Internally every record has an id: ids below len(self._starts) are the
+    elements of the file on disk, higher ids are records added since. The
+    position -> id mapping (self._order) is only materialized once records are
+    inserted or deleted.
+
+    JSON Lines files (lines=True) work the same way with one record per
+    line; saves splice lines, and only append when all that changed is
+    records added at the end.
+    """
+
+    def __init__(self, path, starts, ends, cache_size=DEFAULT_CACHE_SIZE,
+                 cache_bytes=DEFAULT_CACHE_BYTES, lines=False, stamp=None):
+        self.path = path
+        self.lines = lines  # one object per line instead of a top-level array
+        self.stamp = stamp  # file_stamp() of the file starts and ends index
+        self.cache_size = cache_size  # max decoded objects kept for re-display
+        self.cache_bytes = cache_bytes  # max source bytes those objects may span
+        self._buf = None
+        self._reset(starts, ends)
+        self._map()
+
+    def _reset(self, starts, ends):
+        self._starts = starts
+        self._ends = ends
+        self._order = None  # position -> id, or None while it is the identity
+        self._next_id = len(starts)
+        self._cache = OrderedDict()  # id -> decoded object, least recent first
+        self._cached_bytes = 0
+        self._pinned = {}  # id -> edited or added object, kept until saved
+        self._pin_serial = {}  # id -> edit counter value when it was last pinned
+        self._edits = 0
+        self._structure_version = 0  # bumped by every insert or delete
+
+    @classmethod
+    def open(cls, path, progress=None, lines=None, **cache_options):
+        """Index the file at path; lines=None tells JSON Lines from an array by extension and content"""
+        with open(path, 'rb') as f:
+            stamp = _fd_stamp(f.fileno())
+            if stamp[0] == 0:
+                raise _syntax_error("Expecting value", 0)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                if lines is None:
+                    lines = is_json_lines(path, buf)
+                if lines:
+                    starts, ends = scan_line_offsets(buf, progress)
+                else:
+                    starts, ends = scan_array_offsets(buf, progress)
+        return cls(path, starts, ends, lines=lines, stamp=stamp, **cache_options)
+
+    def _map(self):
+        self._buf = _FileReader(self.path, self.stamp)
+        self.stamp = self._buf.stamp
+
+    def check_unchanged(self):
+        """Raise FileChangedError if the file isn't the one the records were indexed from"""
+        if file_stamp(self.path) != self.stamp:
+            raise FileChangedError(self.path)
+
+    def close(self):
+        """Close the file (needed before it can be replaced on Windows)"""
+        if self._buf is not None:
+            self._buf.close()
+            self._buf = None
+
+    def __len__(self):
+        return len(self._starts) if self._order is None else len(self._order)
+
+    def _id_at(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        return index if self._order is None else self._order[index]
+
+    def _ordered_ids(self):
+        self._structure_version += 1
+        if self._order is None:
+            self._order = array('q', range(len(self._starts)))
+        return self._order
+
+    def _pin(self, record_id, obj):
+        self._uncache(record_id)
+        self._edits += 1
+        self._pinned[record_id] = obj
+        self._pin_serial[record_id] = self._edits
+
+    def _read(self, record_id):
+        return json_codec.loads(self._buf[self._starts[record_id]:self._ends[record_id]])
+
+    def _get(self, record_id):
+        obj = self._pinned.get(record_id)
+        if obj is not None:
+            return obj
+        obj = self._cache.get(record_id)
+        if obj is not None:
+            self._cache.move_to_end(record_id)
+            return obj
+        obj = self._read(record_id)
+        self._cache_put(record_id, obj)
+        return obj
+
+    def _cache_put(self, record_id, obj):
+        self._cache[record_id] = obj
+        self._cached_bytes += self._ends[record_id] - self._starts[record_id]
+        self._evict()
+
+    def _evict(self):
+        # The newest entry always stays, even if it alone exceeds the budget
+        while len(self._cache) > 1 and (len(self._cache) > self.cache_size
+                               or self._cached_bytes > self.cache_bytes):
+            record_id, _ = self._cache.popitem(last=False)
+            self._cached_bytes -= self._ends[record_id] - self._starts[record_id]
+
+    def _uncache(self, record_id):
+        if self._cache.pop(record_id, None) is not None:
+            self._cached_bytes -= self._ends[record_id] - self._starts[record_id]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._get(self._id_at(index))
+
+    def __setitem__(self, index, obj):
+        self._pin(self._id_at(index), obj)
+
+    def __delitem__(self, index):
+        record_id = self._id_at(index)
+        if index < 0:
+            index += len(self)
+        del self._ordered_ids()[index]
+        self._uncache(record_id)
+        self._pinned.pop(record_id, None)
+        self._pin_serial.pop(record_id, None)
+
+    def insert(self, index, obj):
+        order = self._ordered_ids()
+        record_id = self._next_id
+        self._next_id += 1
+        order.insert(index, record_id)
+        self._pin(record_id, obj)
+
+    def __iter__(self):
+        # Decode without caching so a full pass (e.g. validation) doesn't flush the cache
+        ids = range(len(self._starts)) if self._order is None else self._order
+        read = self._buf.sequential()
+        for record_id in ids:
+            obj = self._pinned.get(record_id)
+            if obj is None:
+                obj = self._cache.get(record_id)
+            yield obj if obj is not None else json_codec.loads(read(self._starts[record_id], self._ends[record_id]))
+
+    def mark_dirty(self, index, obj=None):
+        """Pin an edited object so eviction can't drop the change before it is saved.
+
+        Pass the object that was edited if it may have been evicted meanwhile.
+        """
+        record_id = self._id_at(index)
+        self._pin(record_id, obj if obj is not None else self._get(record_id))
+
+    @property
+    def dirty(self):
+        return bool(self._pinned) or self._order is not None
+
+    def snapshot(self):
+        """A RecordSnapshot of the current records, for reading them all off the UI thread"""
+        return RecordSnapshot(self)
+
+    def begin_save(self):
+        """Snapshot the current records for a SaveJob that can be written off the UI thread.
+
+        Raises FileChangedError if the file changed on disk: clean records
+        are copied from it by their offsets, which would no longer hold.
+        """
+        self.check_unchanged()
+        return SaveJob(self)
+
+    def finish_save(self, job):
+        """Move a written SaveJob's file over the original and re-point the index at it.
+
+        Must run on the thread that uses the store. Edits made while the job
+        was being written stay pinned and are mapped onto the new file's ids.
+        """
+        if job.tmp_path is not None:
+            try:
+                self.check_unchanged()  # changed while the job was being written
+                self.close()
+                os.replace(job.tmp_path, self.path)
+            except BaseException:
+                job.discard()
+                if self._buf is None:
+                    self._map()
+                raise
+        else:
+            self.close()
+        self.stamp = job.new_stamp
+
+        def new_id(record_id):
+            if record_id >= job.next_id:
+                return fresh[record_id]  # added while the job was being written
+            return record_id if job.id_map is None else job.id_map[record_id]
+
+        order, cached, pinned, pin_serial = self._order, self._cache, self._pinned, self._pin_serial
+        edits, structure_version = self._edits, self._structure_version
+        self._reset(job.starts, job.ends)
+        self._map()
+        self._edits, self._structure_version = edits, structure_version
+
+        fresh = {}
+        if structure_version != job.structure_version:
+            # Records were inserted or deleted during the save: carry that over
+            for record_id in order:
+                if record_id >= job.next_id:
+                    fresh[record_id] = self._next_id
+                    self._next_id += 1
+            self._order = array('q', (new_id(i) for i in order))
+        for record_id, obj in pinned.items():
+            target = new_id(record_id)
+            if pin_serial[record_id] == job.pin_serial.get(record_id):
+                self._cache[target] = obj  # saved as-is, no longer dirty
+                self._cached_bytes += self._ends[target] - self._starts[target]
+            else:
+                self._pinned[target] = obj
+                self._pin_serial[target] = pin_serial[record_id]
+        for record_id, obj in cached.items():
+            target = new_id(record_id)
+            if target >= 0 and target not in self._pinned:
+                self._cache[target] = obj
+                self._cached_bytes += self._ends[target] - self._starts[target]
+        self._evict()
+
+    def save(self, progress=None, cancelled=None):
+        """Save by splicing: only edited, added or deleted records cost serialization work.
+
+        The new file is written next to the original and atomically renamed
+        over it, so a crash mid-save leaves the original untouched.
+        """
+        job = self.begin_save()
+        try:
+            job.write(progress, cancelled)
+        except BaseException:
+            job.discard()
+            raise
+        self.finish_save(job)
+
+    def peek(self, index):
+        """(record_id, source) for decoding index off the UI thread.
+
+        source is the object itself when it is already decoded, otherwise a
+        copy of its raw bytes; hand the decoded object back with adopt().
+        Raises FileChangedError if those bytes can't be read any more.
+        """
+        record_id = self._id_at(index)
+        obj = self._pinned.get(record_id)
+        if obj is None:
+            obj = self._cache.get(record_id)
+        if obj is None:
+            return record_id, self._buf[self._starts[record_id]:self._ends[record_id]]
+        return record_id, obj
+
+    def source_offset(self, index):
+        """Where the record at index starts in the file, or None if it was added since"""
+        record_id = self._id_at(index)
+        return self._starts[record_id] if record_id < len(self._starts) else None
+
+    def holds(self, index, obj):
+        """Whether obj is the decoded object at index, without reading the file"""
+        record_id = self._id_at(index)
+        current = self._pinned.get(record_id)
+        if current is None:
+            current = self._cache.get(record_id)
+        return current is obj
+
+    def adopt(self, index, record_id, obj):
+        """Cache obj, decoded elsewhere from peek(index), and return the object now at index.
+
+        Returns None if the record at index is no longer record_id. If the
+        record got decoded or edited meanwhile, that object wins over obj.
+        """
+        if not 0 <= index < len(self) or self._id_at(index) != record_id:
+            return None
+        current = self._pinned.get(record_id)
+        if current is None:
+            current = self._cache.get(record_id)
+        if current is None:
+            self._cache_put(record_id, obj)
+            return obj
+        return current
+
+    def record_hashes(self, cancelled=None):
+        """hash() of the bytes of each record in the file, by record id, or None if cancelled.
+
+        Comparing them with match_records() tells which records a rewrite of
+        the file touched. Python's hash is salted per process, so hashes are
+        only ever compared within one. Records that can't be read because the
+        file was rewritten in place meanwhile get -1, which hash() never
+        returns, so they match nothing.
+        """
+        starts, ends = self._starts, self._ends
+        read = self._buf.sequential()
+        hashes = array('q')
+        for chunk in range(0, len(starts), _HASH_CHUNK):
+            if cancelled is not None and cancelled():
+                return None
+            end = chunk + _HASH_CHUNK
+            try:
+                hashes.extend(map(hash, map(read, starts[chunk:end], ends[chunk:end])))
+            except FileChangedError:
+                return hashes + array('q', [-1]) * (len(starts) - len(hashes))
+        return hashes
+
+    def carry_edits(self, old, id_map, changed, position=0):
+        """Take over the unsaved edits of old, a store of an earlier version of this file.
+
+        id_map and changed pair old's records with these (see match_records).
+        An edited record whose bytes also changed here is a conflict, and
+        keeps the edit; edited records that are gone here stay as added
+        records. Decoded records that didn't change are carried over so they
+        aren't decoded again. position is a record index in old.
+        """
+        merge = DiskMerge()
+        original = len(old._starts)
+        pinned = old._pinned
+        for record_id, obj in old._cache.items():
+            if record_id < original and id_map[record_id] >= 0 and not changed[id_map[record_id]]:
+                self._cache_put(id_map[record_id], obj)
+
+        if old._order is None and all(id_map[record_id] >= 0 for record_id in pinned):
+            # Only values were edited: records stay where the file has them
+            for record_id, obj in pinned.items():
+                target = id_map[record_id]
+                if changed[target]:
+                    merge.conflicts.append(target)
+                base = self._read(target)
+                self._pin(target, obj)
+                merge.changes.append((target, (), base, obj))
+            target = id_map[position] if position < original else -1
+            merge.position = target if target >= 0 else min(position, len(self) - 1)
+            record_id = changed.find(1)
+            while record_id != -1:
+                if record_id not in self._pinned:
+                    merge.updated.append(record_id)
+                record_id = changed.find(1, record_id + 1)
+            merge.conflicts.sort()
+            merge.changes.sort(key=lambda change: change[0])
+            return merge
+
+        # Records were added or deleted here: walk old's order, placing the
+        # records added to the file next to the ones around them
+        claimed = bytearray(len(self._starts))  # records paired with one of old's
+        for target in id_map:
+            if target >= 0:
+                claimed[target] = 1
+        order = array('q')
+        deleted = []  # records of this file deleted in old
+        edited = []  # (position, record id) of records carried over edited
+        next_record = 0
+
+        def take_until(stop):
+            nonlocal next_record
+            for record_id in range(next_record, stop):
+                if claimed[record_id]:
+                    deleted.append(record_id)
+                    continue
+                if changed[record_id]:
+                    merge.updated.append(len(order))
+                order.append(record_id)
+            next_record = max(next_record, stop)
+
+        old_ids = range(original) if old._order is None else old._order
+        for old_position, record_id in enumerate(old_ids):
+            target = id_map[record_id] if record_id < original else -1
+            if target >= 0:
+                take_until(target)
+                next_record = target + 1
+            if old_position == position:
+                merge.position = len(order)
+            obj = pinned.get(record_id)
+            if target < 0 and obj is None:
+                continue  # deleted from the file, unedited
+            if target < 0:
+                if record_id < original:
+                    merge.conflicts.append(len(order))
+                target = self._next_id
+                self._next_id += 1
+                self._pin(target, obj)
+                edited.append((len(order), target))
+            elif obj is not None:
+                if changed[target]:
+                    merge.conflicts.append(len(order))
+                self._pin(target, obj)
+                edited.append((len(order), target))
+            elif changed[target]:
+                merge.updated.append(len(order))
+            order.append(target)
+        take_until(len(self._starts))
+        if len(order) != len(self._starts) or order != array('q', range(len(self._starts))):
+            self._order = order
+            self._structure_version += 1
+        merge.position = min(merge.position, len(self) - 1)
+
+        # Deletions first (from the end, so indices hold), then additions, then edits
+        for record_id in reversed(deleted):
+            merge.changes.append((record_id, (), self._read(record_id), ABSENT))
+        original = len(self._starts)
+        for index, record_id in edited:
+            if record_id >= original:
+                merge.changes.append((index, (), ABSENT, self._pinned[record_id]))
+        for index, record_id in edited:
+            if record_id < original:
+                merge.changes.append((index, (), self._read(record_id), self._pinned[record_id]))
+        return merge
+
+
+class DiskMerge:
+    """What RecordStore.carry_edits did, with positions as record indices in the merged store"""
+
+    def __init__(self):
+        self.conflicts = []  # edited records that also changed on disk; the edits were kept
+        self.updated = []  # records now showing what changed on disk
+        self.changes = []  # from the file's records to the merged ones (see patches.py)
+        self.position = 0  # where the record at carry_edits' position is now
+
+
+class RecordSnapshot:
+    """The records of a RecordStore as of one moment, iterable from a worker thread.
+
+    Like SaveJob, only the record order and the edited objects are copied;
+    everything else is decoded from the file as it is iterated. Iteration
+    fails once the store has been closed or saved over, and with
+    FileChangedError once the file was rewritten in place.
+    """
+
+    def __init__(self, store):
+        self._buf = store._buf
+        self._starts = store._starts
+        self._ends = store._ends
+        self._order = None if store._order is None else array('q', store._order)
+        self._pinned = copy.deepcopy(store._pinned)
+        self._total = len(store)
+
+    def __len__(self):
+        return self._total
+
+    def __getitem__(self, index):
+        return self._decode(index if self._order is None else self._order[index])
+
+    def __iter__(self):
+        ids = range(self._total) if self._order is None else self._order
+        read = self._buf.sequential()
+        for record_id in ids:
+            yield self._decode(record_id, read)
+
+    def _decode(self, record_id, read=None):
+        obj = self._pinned.get(record_id)
+        if obj is not None:
+            return obj
+        if read is None:
+            return json_codec.loads(self._buf[self._starts[record_id]:self._ends[record_id]])
+        return json_codec.loads(read(self._starts[record_id], self._ends[record_id]))
+
+
+class SaveCancelled(Exception):
+    pass
+
+
+class SaveJob:
+    """A snapshot of a RecordStore's records, written to a temp file by write().
+
+    Taking the snapshot only copies the record order and the edited objects,
+    so it is cheap on the UI thread; write() does the serialization and I/O
+    and is safe to run on a worker thread while the store keeps being used.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.path = store.path
+        self.lines = store.lines
+        self._buf = store._buf
+        self._starts = store._starts
+        self._ends = store._ends
+        self._order = None if store._order is None else array('q', store._order)
+        self._pinned = copy.deepcopy(store._pinned)
+        self.pin_serial = dict(store._pin_serial)
+        self.next_id = store._next_id
+        self.structure_version = store._structure_version
+        self.stamp = store.stamp  # of the file the offsets index
+        self.new_stamp = None  # of the file as written, set by write()
+        self.tmp_path = None
+        self.starts = self.ends = None  # offsets in the new file, set by write()
+        self.id_map = None  # old id -> new id, or None when ids are unchanged
+        self.total = len(self._buf)  # estimate of the bytes to write, for progress
+
+    def _appended_ids(self):
+        """For JSON Lines: the ids of records added after all others, if nothing else changed; else None"""
+        original = len(self._starts)
+        order = self._order
+        if not self.lines or order is None or len(order) <= original:
+            return None
+        if any(record_id < original for record_id in self._pinned):
+            return None
+        if order[:original] != array('q', range(original)):
+            return None  # records were deleted or moved
+        return order[original:]
+
+    def _element_style(self):
+        """Separator and indentation used between elements in the original file"""
+        buf = self._buf
+        if self.lines:
+            # One compact object per line, ending like the file's first line
+            crlf = buf[self._ends[0]:self._ends[0] + 2] == b'\r\n'
+            return (b'\r\n' if crlf else b'\n'), None
+        if len(self._starts) > 1:
+            separator = buf[self._ends[0]:self._starts[1]]
+        else:
+            prefix = buf[:self._starts[0]]
+            separator = b',\n' + prefix.rpartition(b'\n')[2] if b'\n' in prefix else b', '
+        if b'\n' not in separator:
+            return separator, None
+        return separator, separator.rpartition(b'\n')[2].decode('ascii', 'replace')
+
+    def write(self, progress=None, cancelled=None):
+        """Write the temp file; progress(written, total) is called as bytes go out.
+
+        Raises SaveCancelled once the cancelled event is set, and
+        FileChangedError if the file no longer is the one the store indexed.
+        """
+        if file_stamp(self.path) != self.stamp:
+            raise FileChangedError(self.path)
+        appended = self._appended_ids()
+        if appended is not None:
+            self._write_appended(appended, progress, cancelled)
+            return
+        directory, name = os.path.split(os.path.abspath(self.path))
+        fd, self.tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+        with os.fdopen(fd, 'wb') as f:
+            self._write_spliced(f, progress, cancelled)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(self.path, self.tmp_path)
+        self.new_stamp = file_stamp(self.tmp_path)  # os.replace keeps it
+
+    def _write_appended(self, appended, progress, cancelled):
+        """Add the new records as lines at the end of the file itself, without a temp file.
+
+        If this fails or is cancelled the file is truncated back to its
+        original length.
+        """
+        original = len(self._buf)
+        ending, _ = self._element_style()
+        lines = [json_codec.dumps(self._pinned[record_id]).encode('utf-8') + ending for record_id in appended]
+        self.total = sum(len(line) for line in lines)
+        self.starts, self.ends = array('q', self._starts), array('q', self._ends)
+        self.id_map = array('q', range(len(self._starts))) + array('q', [-1]) * (self.next_id - len(self._starts))
+        with open(self.path, 'r+b') as f:
+            try:
+                if _fd_stamp(f.fileno()) != self.stamp:
+                    raise FileChangedError(self.path)
+                pos = f.seek(0, os.SEEK_END)
+                last = self._buf[max(original - 1, 0):original]
+                if last and last != b'\n':
+                    end_line = b'\n' if last == b'\r' else ending
+                    f.write(end_line)
+                    pos += len(end_line)
+                for record_id, line in zip(appended, lines):
+                    if cancelled is not None and cancelled.is_set():
+                        raise SaveCancelled()
+                    f.write(line)
+                    self.id_map[record_id] = len(self.starts)
+                    self.starts.append(pos)
+                    self.ends.append(pos + len(line) - len(ending))
+                    pos += len(line)
+                    if progress:
+                        progress(pos - original, self.total)
+                f.flush()
+                os.fsync(f.fileno())
+                self.new_stamp = _fd_stamp(f.fileno())
+            except FileChangedError:
+                raise  # nothing written, and the file isn't ours to truncate
+            except BaseException:
+                f.truncate(original)
+                raise
+
+    def discard(self):
+        if self.tmp_path and os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def _write_spliced(self, f, progress, cancelled):
+        """Write the records to f, copying clean records' bytes from the old file.
+
+        Runs of untouched records that are still adjacent are copied as one
+        byte range (including the original whitespace between them); only
+        edited or added records are re-serialized.
+        """
+        buf = self._buf
+        original = len(self._starts)
+        separator, indent = self._element_style()
+        newline = '\n' + indent if indent is not None else None
+        starts, ends = array('q'), array('q')
+        self.starts, self.ends = starts, ends
+        ids = range(original) if self._order is None else self._order
+        if self._order is not None:
+            self.id_map = array('q', [-1]) * self.next_id
+        if not len(ids):
+            f.write(b'' if self.lines else b'[]\n')
+            return
+
+        pos = 0
+        run_start = run_end = None  # pending byte range [run_start, run_end) of clean records
+        prev = None
+
+        def check(written):
+            if cancelled is not None and cancelled.is_set():
+                raise SaveCancelled()
+            if progress:
+                progress(written, max(self.total, written))
+
+        def flush_run():
+            nonlocal pos
+            for chunk_start in range(run_start, run_end, _COPY_CHUNK):
+                chunk_end = min(chunk_start + _COPY_CHUNK, run_end)
+                f.write(buf[chunk_start:chunk_end])
+                check(pos + chunk_end - run_start)
+            pos += run_end - run_start
+
+        f.write(buf[:self._starts[0]])
+        pos = self._starts[0]
+        for record_id in ids:
+            obj = self._pinned.get(record_id)
+            adjacent = prev is not None and prev + 1 == record_id < original
+            if obj is None and adjacent and run_start is not None:
+                # Extend the pending copy over the gap and this record
+                run_end = self._ends[record_id]
+                starts.append(pos + self._starts[record_id] - run_start)
+                ends.append(pos + run_end - run_start)
+            else:
+                if run_start is not None:
+                    flush_run()
+                    run_start = None
+                if prev is not None:
+                    gap = buf[self._ends[prev]:self._starts[record_id]] if adjacent else separator
+                    f.write(gap)
+                    pos += len(gap)
+                starts.append(pos)
+                if obj is None:
+                    run_start, run_end = self._starts[record_id], self._ends[record_id]
+                    ends.append(pos + run_end - run_start)
+                else:
+                    text = json_codec.dumps(obj, indent=2 if newline else None)
+                    data = (text.replace('\n', newline) if newline else text).encode('utf-8')
+                    f.write(data)
+                    pos += len(data)
+                    ends.append(pos)
+                    check(pos)
+            if self.id_map is not None:
+                self.id_map[record_id] = len(starts) - 1
+            prev = record_id
+        if run_start is not None:
+            flush_run()
+        f.write(buf[self._ends[original - 1]:])
+        check(pos)
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from coercion import coerce_value
+from patches import ABSENT
+
+SCHEMA_VERSION = 1
+SAMPLE_RECORDS = 100000  # larger files are inferred from this many evenly spaced records
+ENUM_LIMIT = 20  # distinct strings a field may have and still be offered as a choice
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "json_editor")
+
+_TYPE_NAMES = {str: "string", int: "integer", float: "number", bool: "boolean",
+               type(None): "null", list: "array", dict: "object"}
+_PYTHON_TYPES = {"string": str, "integer": int, "number": float, "boolean": bool, "array": list}
+_DEFAULTS = {"string": "", "integer": 0, "number": 0.0, "boolean": False, "array": [], "object": {}}
+
+
+def type_name(value):
+    """JSON type name of a value"""
+    return _TYPE_NAMES.get(value.__class__, "string")
+
+
+class FieldStats:
+    """What one path holds across the records: type counts and, while few, its distinct strings"""
+
+    __slots__ = ("types", "values")
+
+    def __init__(self, types=None, values=None):
+        self.types = types if types is not None else {}  # type name -> records with that type here
+        self.values = values if values is not None else {}  # string -> count, None once past ENUM_LIMIT
+
+    @property
+    def count(self):
+        return sum(self.types.values())
+
+    @property
+    def nullable(self):
+        return self.types.get("null", 0) > 0
+
+    @property
+    def main_type(self):
+        """The most common type other than null, or None if only nulls were seen"""
+        seen = [(count, name) for name, count in self.types.items() if name != "null" and count > 0]
+        return max(seen)[1] if seen else None
+
+    @property
+    def enum(self):
+        """Sorted distinct strings if the field looks like a fixed set of choices, else None"""
+        strings = self.types.get("string", 0)
+        if not self.values or strings < 2 * len(self.values) or strings < self.count - self.types.get("null", 0):
+            return None
+        return sorted(value for value, count in self.values.items() if count > 0)
+
+    def add(self, value):
+        name = type_name(value)
+        self.types[name] = self.types.get(name, 0) + 1
+        if name == "string" and self.values is not None:
+            self.values[value] = self.values.get(value, 0) + 1
+            if len(self.values) > ENUM_LIMIT:
+                self.values = None
+
+    def remove(self, value):
+        name = type_name(value)
+        if self.types.get(name, 0) > 0:  # a sampled schema never saw most values
+            self.types[name] -= 1
+        if name == "string" and self.values and self.values.get(value, 0) > 0:
+            self.values[value] -= 1
+            if not self.values[value]:
+                del self.values[value]
+
+
+class Schema:
+    """Inferred shape of the records: key path -> FieldStats, kept current as records are edited.
+
+    Paths are key tuples like the form's entry_map keys; objects are counted
+    at their own path as well as for each member. Inferred once per file
+    content (see load_cached/store_cached), then updated change by change.
+    """
+
+    def __init__(self, sampled=False):
+        self.sampled = sampled
+        self._fields = {}  # path tuple -> FieldStats
+
+    @classmethod
+    def build(cls, records, sample=SAMPLE_RECORDS, progress=None, cancelled=None):
+        """Infer from records (supporting len() and indexing); progress(done, total) every 10000"""
+        total = len(records)
+        step = max(total // sample, 1) if sample else 1
+        schema = cls(sampled=step > 1)
+        for done, i in enumerate(range(0, total, step)):
+            schema.add(records[i])
+            if done % 10000 == 0:
+                if cancelled is not None and cancelled():
+                    return None
+                if progress is not None:
+                    progress(i, total)
+        return schema
+
+    def field(self, path):
+        return self._fields.get(tuple(path))
+
+    def children(self, path):
+        """Keys seen directly under the object at path, most common first"""
+        path = tuple(path)
+        found = [(stats.count, p[-1]) for p, stats in self._fields.items()
+                 if len(p) == len(path) + 1 and p[:-1] == path]
+        return [key for count, key in sorted(found, key=lambda item: -item[0]) if count > 0]
+
+    def add(self, value, path=()):
+        """Count value, which sits at path in a record, and everything inside it"""
+        if path:
+            stats = self._fields.get(path)
+            if stats is None:
+                stats = self._fields[path] = FieldStats()
+            stats.add(value)
+        if isinstance(value, dict):
+            for key, child in value.items():
+                self.add(child, path + (key,))
+
+    def remove(self, value, path=()):
+        """Undo add(value, path)"""
+        if path:
+            stats = self._fields.get(path)
+            if stats is not None:
+                stats.remove(value)
+        if isinstance(value, dict):
+            for key, child in value.items():
+                self.remove(child, path + (key,))
+
+    def apply_change(self, record, path, old, new):
+        """Keep counts in step with a change (see patches.py); the record index doesn't matter"""
+        path = tuple(path)
+        if old is not ABSENT:
+            self.remove(old, path)
+        if new is not ABSENT:
+            self.add(new, path)
+
+    def field_type(self, path, current_type):
+        """The type to coerce a field's text to: the field's own, unless it is null here and set elsewhere"""
+        if current_type is type(None):
+            stats = self._fields.get(tuple(path))
+            if stats is not None and stats.main_type in _PYTHON_TYPES:
+                return _PYTHON_TYPES[stats.main_type]
+        return current_type
+
+    def coerce(self, path, raw_value, original_type, silent=False):
+        """coerce_value() that also knows which types the field has in other records"""
+        stats = self._fields.get(tuple(path))
+        if stats is None:
+            return coerce_value(raw_value, original_type, silent)
+        if original_type is type(None) and raw_value.strip().lower() in ("null", "none"):
+            return None  # a string field keeps "null" as typed, even if it is null elsewhere
+        if original_type is int and stats.types.get("number"):
+            # An integer here, but other records have fractions
+            for number in (int, float):
+                try:
+                    return number(raw_value)
+                except ValueError:
+                    pass
+        return coerce_value(raw_value, self.field_type(path, original_type), silent)
+
+    def default(self, path):
+        """A starting value for a new property at path, or ABSENT if nothing is known about it"""
+        stats = self._fields.get(tuple(path))
+        if stats is None or not stats.count:
+            return ABSENT
+        choices = stats.enum
+        if choices:
+            return max(choices, key=lambda value: stats.values[value])
+        main = stats.main_type
+        if main is None:
+            return None
+        default = _DEFAULTS[main]
+        return default.copy() if isinstance(default, (list, dict)) else default
+
+    def check(self, path, value):
+        """A short description of how value doesn't fit the field, or None"""
+        stats = self._fields.get(tuple(path))
+        if stats is None or value is None and stats.nullable:
+            return None
+        name = type_name(value)
+        main = stats.main_type
+        # A type is fine if it is the usual one or at least not rare (5%) here
+        if (main is not None and name != main and {name, main} != {"integer", "number"}
+                and stats.types.get(name, 0) * 20 < stats.count):
+            return f"expected {main}, got {name}"
+        choices = stats.enum
+        if choices and name == "string" and value not in choices:
+            return f"not one of {', '.join(choices)}"
+        return None
+
+    def to_json(self):
+        return {"version": SCHEMA_VERSION, "sampled": self.sampled,
+                "fields": [[list(path), stats.types, stats.values] for path, stats in self._fields.items()]}
+
+    @classmethod
+    def from_json(cls, data):
+        if data.get("version") != SCHEMA_VERSION:
+            raise ValueError("Unsupported schema cache version")
+        schema = cls(data["sampled"])
+        for path, types, values in data["fields"]:
+            schema._fields[tuple(path)] = FieldStats(types, values)
+        return schema
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Hex digest of a file's content, the key of its cached schema"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(digest):
+    return os.path.join(CACHE_DIR, f"schema-{digest}.json")
+
+
+def load_cached(digest):
+    """The schema cached for a file digest, or None"""
+    try:
+        with open(_cache_path(digest), 'r', encoding='utf-8') as f:
+            return Schema.from_json(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def store_cached(digest, data):
+    """Write Schema.to_json() output to the cache; errors are ignored, the cache is only a shortcut"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".schema-", suffix=".tmp", dir=CACHE_DIR)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, _cache_path(digest))
+    except OSError:
+        pass
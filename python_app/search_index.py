@@ -0,0 +1,193 @@
+import bisect
+from array import array
+
+import json_codec
+
+
+_CONSTANTS = {True: "true", False: "false", None: "null"}
+
+
+def index_key(value):
+    """The text a leaf value is indexed and searched by: strings as-is, anything else as JSON"""
+    cls = value.__class__
+    if cls is str:
+        return value
+    if cls is int:
+        return str(value)
+    if cls is bool or value is None:
+        return _CONSTANTS[value]
+    return json_codec.dumps(value)
+
+
+def iter_leaves(value, path=()):
+    """(path string, leaf value) for every non-dict value under value, path joined with '.'"""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from iter_leaves(child, path + (key,))
+    elif path:
+        yield ".".join(str(p) for p in path), value
+
+
+class SearchIndex:
+    """Inverted index over all records: path -> value text -> record indices.
+
+    Paths are dotted like collapsed_sections ("meta.retries"). A value seen
+    in one record only is stored as a bare int; the rest as array('q') in
+    ascending order while records are added in order. Prefix and substring
+    lookups are case-insensitive and use per-path caches built on first use
+    and dropped when the path's set of values changes.
+    """
+
+    def __init__(self):
+        self._paths = {}  # path -> {value text: int | array('q')}
+        self._sorted = {}  # path -> sorted [(lowered text, text)] for prefix lookups
+        self._blobs = {}  # path -> (lowered texts joined by "\0", start offsets, texts)
+
+    @classmethod
+    def build(cls, records, progress=None, cancelled=None):
+        """Index an iterable of records; progress(done) is called every 10000 records"""
+        index = cls()
+        for i, obj in enumerate(records):
+            index.add(i, obj)
+            if i % 10000 == 0:
+                if cancelled is not None and cancelled():
+                    return None
+                if progress is not None:
+                    progress(i)
+        return index
+
+    def __len__(self):
+        return len(self._paths)
+
+    def paths(self):
+        return sorted(self._paths)
+
+    def add(self, record, value, path=()):
+        """Index every leaf of value, which sits at path (a key tuple) in record"""
+        if isinstance(value, dict):
+            self._add_members(record, value, ".".join(str(p) for p in path) + "." if path else "")
+        elif path:
+            self._add_leaf(record, ".".join(str(p) for p in path), value)
+
+    def _add_members(self, record, obj, prefix):
+        # The hot loop of build(): plain recursion and string concatenation
+        # rather than iter_leaves()
+        for key, value in obj.items():
+            if isinstance(value, dict):
+                self._add_members(record, value, f"{prefix}{key}.")
+            else:
+                self._add_leaf(record, f"{prefix}{key}", value)
+
+    def _add_leaf(self, record, path_str, value):
+        values = self._paths.get(path_str)
+        if values is None:
+            values = self._paths[path_str] = {}
+        key = index_key(value)
+        hits = values.get(key)
+        if hits is None:
+            values[key] = record
+            if path_str in self._sorted or path_str in self._blobs:
+                self._forget(path_str)
+        elif hits.__class__ is int:
+            if hits != record:
+                values[key] = array('q', sorted((hits, record)))
+        elif record > hits[-1]:
+            hits.append(record)
+        else:
+            i = bisect.bisect_left(hits, record)
+            if hits[i] != record:
+                hits.insert(i, record)
+
+    def remove(self, record, value, path=()):
+        """Undo add(record, value, path)"""
+        for path_str, leaf in iter_leaves(value, tuple(path)):
+            values = self._paths.get(path_str)
+            if values is None:
+                continue
+            key = index_key(leaf)
+            hits = values.get(key)
+            if hits is None:
+                continue
+            if isinstance(hits, int):
+                if hits == record:
+                    del values[key]
+                    self._forget(path_str)
+                    if not values:
+                        del self._paths[path_str]
+                continue
+            i = bisect.bisect_left(hits, record)
+            if i < len(hits) and hits[i] == record:
+                del hits[i]
+                if len(hits) == 1:
+                    values[key] = hits[0]
+
+    def update(self, record, path, old, new):
+        """The value at path (a key tuple) in record changed from old to new"""
+        self.remove(record, old, path)
+        self.add(record, new, path)
+
+    def lookup(self, text, path=None, mode="exact"):
+        """Sorted record indices whose value at path (any path if None) matches text.
+
+        mode is "exact", "prefix" or "contains".
+        """
+        paths = [path] if path else list(self._paths)
+        found = set()
+        for path_str in paths:
+            values = self._paths.get(path_str)
+            if not values:
+                continue
+            if mode == "exact":
+                keys = [text] if text in values else []
+            elif mode == "prefix":
+                keys = self._prefix_keys(path_str, text.lower())
+            else:
+                keys = self._substring_keys(path_str, text.lower())
+            for key in keys:
+                hits = values[key]
+                if isinstance(hits, int):
+                    found.add(hits)
+                else:
+                    found.update(hits)
+        return sorted(found)
+
+    def _forget(self, path_str):
+        self._sorted.pop(path_str, None)
+        self._blobs.pop(path_str, None)
+
+    def _prefix_keys(self, path_str, prefix):
+        entries = self._sorted.get(path_str)
+        if entries is None:
+            entries = self._sorted[path_str] = sorted((key.lower(), key) for key in self._paths[path_str])
+        keys = []
+        for i in range(bisect.bisect_left(entries, (prefix,)), len(entries)):
+            lowered, key = entries[i]
+            if not lowered.startswith(prefix):
+                break
+            keys.append(key)
+        return keys
+
+    def _substring_keys(self, path_str, needle):
+        # One str.find pass over all of the path's values joined together,
+        # instead of a Python-level test per value
+        blob = self._blobs.get(path_str)
+        if blob is None:
+            texts = list(self._paths[path_str])
+            starts = array('q')
+            pos = 0
+            for key in texts:
+                starts.append(pos)
+                pos += len(key) + 1
+            blob = self._blobs[path_str] = ("\0".join(key.lower() for key in texts), starts, texts)
+        joined, starts, texts = blob
+        keys = []
+        last = -1
+        pos = joined.find(needle) if needle else -1
+        while pos != -1:
+            i = bisect.bisect_right(starts, pos) - 1
+            if i != last:
+                keys.append(texts[i])
+                last = i
+            # Continue after this value; one hit per value is enough
+            pos = joined.find(needle, starts[i + 1] if i + 1 < len(starts) else len(joined))
+        return keys
@@ -0,0 +1,16 @@
+import json
+import os
+import sys
+
+import pytest
+
+# The modules sit flat in python_app/ and import each other without a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from files import RECORDS  # noqa: E402
+
+
+@pytest.fixture
+def records():
+    """A fresh copy of RECORDS for a test to edit"""
+    return json.loads(json.dumps(RECORDS))
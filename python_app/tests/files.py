@@ -0,0 +1,83 @@
+"""Test files and edits shared by the RecordStore tests"""
+import json
+import os
+
+RECORDS = [
+    {"id": 1, "name": "alpha", "tags": ["a", "b"], "meta": {"score": 1.5, "ok": True}},
+    {"id": 2, "name": "béta", "tags": [], "meta": {}},
+    {"id": 3, "name": "gamma", "tags": ["c"], "meta": {"score": None, "nested": {"deep": [1, [2, 3]]}}},
+    {"id": 4, "name": "delta ☃", "tags": ["d", "e"], "meta": {"big": 12345678901234567890}},
+]
+STYLES = ("pretty", "compact", "lines", "crlf_lines")
+
+
+def render(records, style):
+    """The file json.dumps writes for records in style; saves must produce exactly this"""
+    if style == "pretty":
+        return json.dumps(records, indent=2).encode('utf-8')
+    if style == "compact":
+        return json.dumps(records).encode('utf-8')
+    ending = "\r\n" if style == "crlf_lines" else "\n"
+    return "".join(json.dumps(record) + ending for record in records).encode('utf-8')
+
+
+def write(tmp_path, records, style, name="data"):
+    path = os.path.join(tmp_path, f"{name}.jsonl" if style.endswith("lines") else f"{name}.json")
+    with open(path, 'wb') as f:
+        f.write(render(records, style))
+    return path
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def edit(store, records):
+    obj = store[1]
+    obj["name"] = "edited"
+    obj["meta"]["added"] = {"x": [1, 2]}
+    store.mark_dirty(1, obj)
+    records[1] = obj
+
+
+def replace(store, records):
+    store[2] = records[2] = {"replaced": True}
+
+
+def insert(store, records):
+    store.insert(1, {"id": 9, "inserted": "ü"})
+    records.insert(1, {"id": 9, "inserted": "ü"})
+
+
+def delete(store, records):
+    del store[2]
+    del records[2]
+
+
+def append(store, records):
+    store.append({"id": 5, "appended": [None, False]})
+    records.append({"id": 5, "appended": [None, False]})
+
+
+def delete_first_and_last(store, records):
+    del store[len(store) - 1]
+    del store[0]
+    records[:] = records[1:-1]
+
+
+OPERATIONS = [edit, replace, insert, delete, append, delete_first_and_last]
+
+
+def rewrite(path, records, style):
+    """Replace the file the way another program saving it would, leaving open maps on the old one"""
+    tmp_path = path + ".new"
+    with open(tmp_path, 'wb') as f:
+        f.write(render(records, style))
+    os.replace(tmp_path, path)
+
+
+def rewrite_in_place(path, records, style):
+    """Overwrite the file through the same inode, as json.dump(records, open(path, 'w')) does"""
+    with open(path, 'wb') as f:
+        f.write(render(records, style))
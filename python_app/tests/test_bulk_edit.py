@@ -0,0 +1,91 @@
+import copy
+import json
+
+import pytest
+
+from bulk_edit import BulkEditError, plan_bulk_edit
+from patches import apply_changes, inverse
+
+RECORDS = [
+    {"id": 1, "name": "a", "meta": {"retries": 3, "tags": ["x"]}},
+    {"id": 2, "name": "b", "meta": {"retries": 0.5}},
+    {"id": 3, "meta": "not an object"},
+    {"id": 4, "name": "d"},
+]
+
+
+class Records(list):
+    """A list standing in for a RecordStore in apply_changes()"""
+
+    def mark_dirty(self, index, obj=None):
+        pass
+
+
+def run(operation, path, argument="", indices=None):
+    """Plan on a copy, check the plan leaves it alone, apply it and check undo restores it"""
+    records = Records(copy.deepcopy(RECORDS))
+    changes, skipped = plan_bulk_edit(records, operation, path, argument, indices=indices)
+    assert records == RECORDS
+    apply_changes(records, changes)
+    edited = copy.deepcopy(records)
+    apply_changes(records, inverse(changes))
+    assert json.dumps(records) == json.dumps(RECORDS)  # key order included
+    return edited, skipped
+
+
+def test_set_coerces_to_each_records_type_and_creates_parents():
+    edited, skipped = run("Set", ("meta", "retries"), "2")
+    assert [record.get("meta") for record in edited] == [
+        {"retries": 2, "tags": ["x"]}, {"retries": 2.0}, "not an object", {"retries": 2}]
+    assert skipped == 1  # meta is a string in record 3
+
+
+def test_set_parses_new_properties_as_json():
+    edited, _ = run("Set", ("extra",), '{"k": [1, null]}')
+    assert all(record["extra"] == {"k": [1, None]} for record in edited)
+    edited, _ = run("Set", ("extra",), "plain text")
+    assert all(record["extra"] == "plain text" for record in edited)
+
+
+def test_rename_keeps_position_and_never_overwrites():
+    edited, skipped = run("Rename", ("name",), "title")
+    assert list(edited[0]) == ["id", "title", "meta"]
+    assert "name" not in edited[3] and edited[3]["title"] == "d"
+    _, skipped = run("Rename", ("name",), "id")
+    assert skipped == 3
+
+
+def test_delete_only_touches_records_that_have_the_field():
+    records = copy.deepcopy(RECORDS)
+    changes, _ = plan_bulk_edit(records, "Delete", ("meta", "retries"), "")
+    assert [change[0] for change in changes] == [0, 1]
+    edited, _ = run("Delete", ("meta", "retries"))
+    assert edited[0]["meta"] == {"tags": ["x"]} and edited[1]["meta"] == {}
+
+
+def test_transform_skips_values_it_cant_handle():
+    edited, skipped = run("Transform", ("name",), "value.upper()")
+    assert [record.get("name") for record in edited] == ["A", "B", None, "D"]
+    assert skipped == 0
+    edited, skipped = run("Transform", ("meta", "retries"), "value * 2 if value > 1 else open('x')")
+    assert edited[0]["meta"]["retries"] == 6
+    assert skipped == 1  # open isn't available to expressions
+    _, skipped = run("Transform", ("meta",), "value")
+    assert skipped == 2  # sections aren't values
+
+
+def test_indices_limit_the_records_visited():
+    edited, _ = run("Set", ("name",), "z", indices=[1, 3])
+    assert [record.get("name") for record in edited] == ["a", "z", None, "z"]
+
+
+@pytest.mark.parametrize("operation, path, argument", [
+    ("Set", (), "1"), ("Rename", ("name",), ""), ("Transform", ("name",), "value +")])
+def test_invalid_edits_raise(operation, path, argument):
+    with pytest.raises(BulkEditError):
+        plan_bulk_edit(RECORDS, operation, path, argument)
+
+
+def test_cancel():
+    records = [{"n": i} for i in range(6000)]
+    assert plan_bulk_edit(records, "Set", ("n",), "1", cancelled=lambda: True) is None
@@ -0,0 +1,137 @@
+import json
+from array import array
+
+import pytest
+
+from files import RECORDS, STYLES, delete, edit, insert, read, render, rewrite, rewrite_in_place, write
+from record_store import RecordStore, match_records
+
+
+def hashes(values):
+    return array('q', values)
+
+
+def test_match_records_pairs_inserted_record():
+    id_map, changed = match_records(hashes([1, 2, 3, 4]), hashes([1, 2, 9, 3, 4]))
+    assert list(id_map) == [0, 1, 3, 4]
+    assert list(changed) == [0, 0, 1, 0, 0]
+
+
+def test_match_records_pairs_deleted_record():
+    id_map, changed = match_records(hashes([1, 2, 3, 4]), hashes([1, 3, 4]))
+    assert list(id_map) == [0, -1, 1, 2]
+    assert list(changed) == [0, 0, 0]
+
+
+def test_match_records_pairs_replacement_in_place():
+    id_map, changed = match_records(hashes([1, 2, 3]), hashes([1, 5, 3]))
+    assert list(id_map) == [0, 1, 2]
+    assert list(changed) == [0, 1, 0]
+
+
+def test_match_records_doesnt_pair_unequal_replacement():
+    id_map, changed = match_records(hashes([1, 2, 3, 4]), hashes([1, 7, 8, 9, 4]))
+    assert list(id_map) == [0, -1, -1, 4]
+    assert list(changed) == [0, 1, 1, 1, 0]
+
+
+def test_match_records_finds_shifted_records():
+    id_map, changed = match_records(hashes([1, 2, 3, 4, 5]), hashes([0, 1, 2, 3, 5, 6]))
+    assert list(id_map) == [1, 2, 3, -1, 4]
+    assert list(changed) == [1, 0, 0, 0, 0, 1]
+
+
+def merge_from_disk(old_hashes, path):
+    new = RecordStore.open(path)
+    id_map, changed = match_records(old_hashes, new.record_hashes())
+    return new, id_map, changed
+
+
+# The editor hashes the records when it loads a file: one rewritten in place
+# keeps no old bytes to hash by the time the change is noticed
+REWRITES = pytest.mark.parametrize("rewrite_file", [rewrite, rewrite_in_place], ids=["renamed", "in_place"])
+
+
+@REWRITES
+@pytest.mark.parametrize("style", STYLES)
+def test_carry_edits_onto_shifted_file(tmp_path, records, style, rewrite_file):
+    path = write(tmp_path, records, style)
+    old = RecordStore.open(path)
+    old_hashes = old.record_hashes()
+    new = None
+    try:
+        edit(old, records)
+        on_disk = json.loads(json.dumps(RECORDS))
+        on_disk.insert(0, {"id": 0, "new": "on disk"})
+        on_disk[3]["name"] = "changed on disk"
+        rewrite_file(path, on_disk, style)
+
+        new, id_map, changed = merge_from_disk(old_hashes, path)
+        merge = new.carry_edits(old, id_map, changed, position=1)
+        expected = on_disk[:2] + [records[1]] + on_disk[3:]
+        assert list(new) == expected
+        assert merge.position == 2
+        assert merge.conflicts == []
+        assert 3 in merge.updated
+        assert merge.changes == [(2, (), on_disk[2], records[1])]
+
+        new.save()
+        assert read(path) == render(expected, style)
+    finally:
+        old.close()
+        if new is not None:
+            new.close()
+
+
+@REWRITES
+@pytest.mark.parametrize("style", STYLES)
+def test_carry_edits_keeps_conflicting_edit(tmp_path, records, style, rewrite_file):
+    path = write(tmp_path, records, style)
+    old = RecordStore.open(path)
+    old_hashes = old.record_hashes()
+    new = None
+    try:
+        edit(old, records)
+        on_disk = json.loads(json.dumps(RECORDS))
+        on_disk[1]["name"] = "changed on disk too"
+        rewrite_file(path, on_disk, style)
+
+        new, id_map, changed = merge_from_disk(old_hashes, path)
+        merge = new.carry_edits(old, id_map, changed, position=1)
+        assert merge.conflicts == [1]
+        assert merge.position == 1
+        assert new[1] == records[1]
+        assert list(new)[2:] == on_disk[2:]
+    finally:
+        old.close()
+        if new is not None:
+            new.close()
+
+
+@REWRITES
+@pytest.mark.parametrize("style", STYLES)
+def test_carry_edits_with_local_inserts_and_deletes(tmp_path, records, style, rewrite_file):
+    path = write(tmp_path, records, style)
+    old = RecordStore.open(path)
+    old_hashes = old.record_hashes()
+    new = None
+    try:
+        insert(old, records)  # [1, 9, 2, 3, 4]
+        delete(old, records)  # [1, 9, 3, 4]
+        on_disk = json.loads(json.dumps(RECORDS))
+        on_disk.append({"id": 6, "new": "at the end"})
+        rewrite_file(path, on_disk, style)
+
+        new, id_map, changed = merge_from_disk(old_hashes, path)
+        merge = new.carry_edits(old, id_map, changed, position=2)
+        assert list(new) == records + [on_disk[-1]]
+        assert merge.position == 2
+        assert merge.conflicts == []
+        assert merge.updated == [len(records)]
+
+        new.save()
+        assert read(path) == render(records + [on_disk[-1]], style)
+    finally:
+        old.close()
+        if new is not None:
+            new.close()
@@ -0,0 +1,86 @@
+import types
+
+import pytest
+
+import edit_journal
+from edit_journal import EditJournal, approx_size
+from patches import ABSENT
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Seconds on the journal's monotonic clock, set by the test"""
+    now = [100.0]
+    monkeypatch.setattr(edit_journal, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def keystroke(journal, old, new, key=(0, ("name",))):
+    journal.record([(0, ("name",), old, new)], "Edit name", coalesce_key=key)
+
+
+def test_quick_keystrokes_are_one_step(clock):
+    journal = EditJournal()
+    for old, new in [("a", "ab"), ("ab", "abc"), ("abc", "abcd")]:
+        keystroke(journal, old, new)
+        clock[0] += 0.5  # each keystroke extends the step's window
+    assert journal.undo() == ("Edit name", [(0, ("name",), "abcd", "a")])
+    assert journal.undo() is None
+    assert journal.redo() == ("Edit name", [(0, ("name",), "a", "abcd")])
+
+
+def test_pauses_and_other_fields_start_new_steps(clock):
+    journal = EditJournal()
+    keystroke(journal, "a", "ab")
+    clock[0] += edit_journal.COALESCE_SECONDS
+    keystroke(journal, "ab", "abc")
+    keystroke(journal, 1, 2, key=(0, ("id",)))
+    keystroke(journal, "abc", "abcd")
+    steps = []
+    while (step := journal.undo()) is not None:
+        steps.append(step[1][0][2:])
+    assert steps == [("abcd", "abc"), (2, 1), ("abc", "ab"), ("ab", "a")]
+
+
+def test_undone_steps_are_never_extended(clock):
+    journal = EditJournal()
+    keystroke(journal, "a", "ab")
+    journal.undo()
+    journal.redo()
+    keystroke(journal, "ab", "abc")
+    assert journal.undo()[1] == [(0, ("name",), "abc", "ab")]
+    assert journal.undo()[1] == [(0, ("name",), "ab", "a")]
+
+
+def test_memory_cap_forgets_oldest_steps(clock):
+    value = "x" * 1000
+    step_size = 2 * approx_size(value) + 100
+    journal = EditJournal(max_bytes=5 * step_size)
+    for i in range(20):
+        journal.record([(i, ("v",), value, value)], f"step {i}")
+        assert journal.size_bytes <= journal.max_bytes
+    labels = []
+    while (step := journal.undo()) is not None:
+        labels.append(step[0])
+    assert labels == [f"step {i}" for i in range(19, 14, -1)]
+    assert journal.size_bytes == 5 * step_size  # all of it now redo steps
+
+
+def test_oversized_step_is_kept_alone(clock):
+    journal = EditJournal(max_bytes=100)
+    journal.record([(0, (), ABSENT, {"k": "v"})], "Small")
+    journal.record([(1, (), ABSENT, {"k": "x" * 1000})], "Big")
+    assert journal.undo()[0] == "Big"
+    assert journal.undo() is None
+
+
+def test_new_edit_drops_redo_steps(clock):
+    journal = EditJournal()
+    journal.record([(0, ("a",), 1, 2)], "One")
+    journal.record([(0, ("a",), 2, 3)], "Two")
+    journal.undo()
+    journal.record([(0, ("a",), 2, 4)], "Three")
+    assert journal.redo() is None
+    assert journal.size_bytes == sum(approx_size(old) + approx_size(new) + 100 for old, new in [(1, 2), (2, 4)])
+    journal.clear()
+    assert journal.size_bytes == 0 and journal.undo() is None
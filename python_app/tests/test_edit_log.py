@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+
+from edit_log import EditLog, matches_base, read_log, replay, to_operation
+from patches import ABSENT
+from record_store import RecordStore
+
+RECORDS = [
+    {"id": 1, "meta": {"tags": [1, 2], "r": 3}},
+    {"id": 2, "meta": {"tags": []}},
+    {"id": 3},
+]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = os.path.join(tmp_path, "data.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(RECORDS, f, indent=2)
+    return path
+
+
+@pytest.fixture
+def data(path):
+    store = RecordStore.open(path)
+    yield store
+    store.close()
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_replay_applies_and_returns_changes(data):
+    operations = [
+        ("replace", 0, ("id",), 10),
+        ("add", 1, ("meta", "new"), {"x": 1}),
+        ("remove", 2, ("id",), ABSENT),
+        ("add", 3, (), {"id": 4}),
+        ("remove", 1, (), ABSENT),
+    ]
+    changes = replay(data, operations)
+    assert list(data) == [
+        {"id": 10, "meta": {"tags": [1, 2], "r": 3}},
+        {},
+        {"id": 4},
+    ]
+    assert changes[0] == (0, ("id",), 1, 10)
+    assert changes[2] == (2, ("id",), 3, ABSENT)
+    assert changes[3] == (3, (), ABSENT, {"id": 4})
+
+
+def test_replay_rolls_back_on_error(data):
+    operations = [
+        ("replace", 0, ("id",), 10),
+        ("add", 1, (), {"id": 9}),
+        ("replace", 99, ("id",), 0),
+    ]
+    with pytest.raises(IndexError):
+        replay(data, operations)
+    assert list(data) == RECORDS
+
+
+def test_replay_of_logged_changes_saves_like_json_dumps(path, data):
+    log = EditLog(path)
+    changes = [(0, ("meta", "r"), 3, 4), (3, (), ABSENT, {"id": 4}), (1, ("id",), 2, ABSENT)]
+    log.append(changes)
+    log.close()
+
+    header, operations = read_log(path)
+    assert matches_base(header, path)
+    replay(data, operations)
+    data.save()
+    expected = json.loads(json.dumps(RECORDS))
+    expected[0]["meta"]["r"] = 4
+    expected.append({"id": 4})
+    del expected[1]["id"]
+    assert read(path) == json.dumps(expected, indent=2).encode('utf-8')
+
+
+def test_to_operation_escapes_keys():
+    assert to_operation((0, ("a/b", "c~d"), ABSENT, 1)) == {"op": "add", "path": "/0/a~1b/c~0d", "value": 1}
+    assert to_operation((2, (), {"id": 1}, ABSENT)) == {"op": "remove", "path": "/2"}
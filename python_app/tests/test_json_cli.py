@@ -0,0 +1,118 @@
+import json
+import os
+
+import pytest
+
+from edit_log import PatchError, apply_patch
+from json_cli import main
+from record_store import RecordStore
+
+RECORDS = [
+    {"id": 1, "meta": {"tags": [1, 2], "r": 3}},
+    {"id": 2, "meta": {"tags": []}},
+    {"id": 3},
+]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = os.path.join(tmp_path, "data.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(RECORDS, f, indent=2)
+    return path
+
+
+@pytest.fixture
+def data(path):
+    store = RecordStore.open(path)
+    yield store
+    store.close()
+
+
+def write_bytes(tmp_path, name, data):
+    path = os.path.join(tmp_path, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def error_of(argv, capsys):
+    assert main(argv) == 1
+    return capsys.readouterr().err
+
+
+def test_apply_patch_handles_arrays_and_records(data):
+    changes = apply_patch(data, [
+        {"op": "replace", "path": "/0/meta/tags/0", "value": 5},
+        {"op": "add", "path": "/0/meta/tags/-", "value": 9},
+        {"op": "add", "path": "/0/meta/tags/0", "value": 0},
+        {"op": "remove", "path": "/1/meta/tags"},
+        {"op": "add", "path": "/-", "value": {"id": 4}},
+        {"op": "remove", "path": "/2"},
+        {"op": "add", "path": "/0/a~1b", "value": None},
+    ])
+    assert list(data) == [
+        {"id": 1, "meta": {"tags": [0, 5, 2, 9], "r": 3}, "a/b": None},
+        {"id": 2, "meta": {}},
+        {"id": 4},
+    ]
+    assert {change[0] for change in changes} == {0, 1, 2, 3}
+
+
+@pytest.mark.parametrize("operation", [
+    {"op": "replace", "path": "/0/meta/tags/2", "value": 5},  # past the end
+    {"op": "replace", "path": "/0/meta/tags/-", "value": 5},  # '-' only for add
+    {"op": "add", "path": "/0/meta/tags/x", "value": 5},  # not an index
+    {"op": "add", "path": "/0/meta/tags/01", "value": 5},  # leading zero
+    {"op": "replace", "path": "/0/meta/r/x", "value": 1},  # inside an integer
+    {"op": "remove", "path": "/0/missing"},
+    {"op": "replace", "path": "/0/missing", "value": 1},
+    {"op": "add", "path": "/0/missing/x", "value": 1},  # no parent
+    {"op": "remove", "path": "/3"},
+    {"op": "add", "path": "/5", "value": {}},
+    {"op": "add", "path": "/1", "value": 1},  # records are objects
+    {"op": "add", "path": "/-/x", "value": 1},
+    {"op": "add", "path": "/0/x"},  # no value
+    {"op": "move", "from": "/0", "path": "/1"},
+    {"op": "remove", "path": ""},
+    {"op": "remove", "path": "0/id"},
+    {"path": "/0"},
+])
+def test_apply_patch_rejects_what_doesnt_fit(data, operation):
+    valid = {"op": "replace", "path": "/0/id", "value": 10}
+    with pytest.raises(PatchError):
+        apply_patch(data, [valid, operation])
+    assert list(data) == RECORDS
+
+
+def test_patch_saves_like_json_dumps(tmp_path, path):
+    patch = write_bytes(tmp_path, "patch.jsonl",
+                        b'{"op": "replace", "path": "/0/id", "value": 10}\r\n{"op": "remove", "path": "/2"}\r\n')
+    assert main(["patch", path, patch]) == 0
+    with open(path, 'rb') as f:
+        assert f.read() == json.dumps([dict(RECORDS[0], id=10), RECORDS[1]], indent=2).encode('utf-8')
+
+
+@pytest.mark.parametrize("content, where", [
+    (b'[{"id": 1},\n {"id": 2,}]', "record 2 is not valid JSON (Expecting property name enclosed in "
+                                   "double quotes at byte 22)"),
+    ('{"id": "é"}\n{"id": "é" 2}\n'.encode('utf-8'), "record 2 is not valid JSON (Expecting ',' delimiter "
+                                                    "at byte 25)"),
+])
+def test_invalid_record_names_record_and_byte(tmp_path, capsys, content, where):
+    name = "data.jsonl" if content.startswith(b'{') else "data.json"
+    path = write_bytes(tmp_path, name, content)
+    assert error_of(["validate", path], capsys) == f"error: {path}: {where}\n"
+
+
+@pytest.mark.parametrize("content, where", [
+    (b'{"op": "remove", "path": "/2"}\r\n{"op": "remove" "path": "/1"}\n',
+     "line 2 is not valid JSON (Expecting ',' delimiter at byte 48)"),
+    (b'[{"op": "remove", "path": "/2"},\n {"op": "remove",}]',
+     "not valid JSON (Expecting property name enclosed in double quotes at byte 50)"),
+])
+def test_invalid_patch_names_line_and_byte(tmp_path, capsys, path, content, where):
+    patch = write_bytes(tmp_path, "patch.json", content)
+    assert error_of(["patch", path, patch], capsys) == f"error: {patch}: {where}\n"
+    with open(path, 'rb') as f:
+        assert f.read() == json.dumps(RECORDS, indent=2).encode('utf-8')
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+import json_codec
+from files import RECORDS
+
+VALUES = RECORDS + [
+    [], {}, "", 0, -0.0, 1.5, 1e-5, 1e-4, 1e16, 1.0e300, -2.5e-310, float("nan"), float("inf"), -float("inf"),
+    2 ** 63, -2 ** 63 - 1, 2 ** 64 + 1, 10 ** 30, True, None,
+    "ascii", "é ☃ \x7f \x00 \t\n\"\\/", "\U0001f600 astral", "\ud800 lone surrogate",
+    {"nested": [[], {}, [{}], {"a": [1, [2.5, {"b": None}]]}], "é": "ü", "": ""},
+    [1, 1.0, "1", True, None, [1e20, 0.1]],
+]
+DOCUMENTS = [b'{"a": 1}', b'[1, 2.5, "x"]', b'\xef\xbb\xbf{"bom": true}', b'NaN', b'[Infinity, -Infinity]',
+             b'18446744073709551617', b'[9223372036854775808, -9223372036854775809]', b'1e400',
+             '{"é": "\\u00e9\\ud83d\\ude00"}'.encode('utf-8'), '{"x": "ü"}', b' \r\n{"a":\r\n1}\r\n']
+MALFORMED = [b'', b'{', b'{"a": 1,}', b'[1 2]', b'{"a" 1}', b'"\\x"', b'\xff', '{"é": ]', b'[1]x']
+
+
+@pytest.fixture(params=json_codec.available())
+def backend(request):
+    previous = json_codec.backend
+    json_codec.select(request.param)
+    yield request.param
+    json_codec.select(previous)
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_dumps_matches_json(backend, indent, ensure_ascii):
+    for value in VALUES:
+        expected = json.dumps(value, indent=indent, ensure_ascii=ensure_ascii)
+        assert json_codec.dumps(value, indent=indent, ensure_ascii=ensure_ascii) == expected, repr(value)
+        assert json_codec.dumps([value, {"k": value}], indent=indent, ensure_ascii=ensure_ascii) == json.dumps(
+            [value, {"k": value}], indent=indent, ensure_ascii=ensure_ascii), repr(value)
+
+
+def test_loads_matches_json(backend):
+    for document in DOCUMENTS + [json.dumps(value).encode('utf-8') for value in VALUES]:
+        # repr() so NaN compares equal to itself and 1 and 1.0 differ
+        assert repr(json_codec.loads(document)) == repr(json.loads(document)), document
+
+
+def test_errors_match_json(backend):
+    for document in MALFORMED:
+        with pytest.raises(ValueError) as expected:
+            json.loads(document)
+        with pytest.raises(type(expected.value)) as error:
+            json_codec.loads(document)
+        assert str(error.value) == str(expected.value)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        json_codec.select("simplejson")
+    assert json_codec.backend in json_codec.BACKENDS
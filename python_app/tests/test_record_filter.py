@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from record_filter import FilterError, RecordFilter
+from search_index import SearchIndex
+
+EXPRESSIONS = [
+    'status == "open"',
+    '"open" == status',
+    'status == "open" and meta.flag == true',
+    'status == "open" or meta.flag == true',
+    'meta.flag == false and meta.note == null',
+    'not (status == "closed")',
+    'meta.count == 2',
+    'meta.count == 2.0',
+    'meta.count > 1 and status != "held"',
+    'meta["a.b"] == "x"',
+    'a.b == "x"',
+    'tags == "t1"',
+    '"t1" in tags',
+    'tags[0] == "t2"',
+    'tags == []',
+    'meta.note',
+    'missing == null',
+    'status == 1',
+    'meta.flag == 1',
+]
+
+
+def dataset(n=300, seed=7):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(n):
+        record = {"status": rng.choice(["open", "closed", "held", 1, None, True])}
+        meta = {}
+        for key, choices in [("flag", [True, False, None, 1, 0, "true"]), ("count", [1, 2, 2.0, "2", 3]),
+                             ("note", [None, "", "n", 0]), ("a.b", ["x", "y"])]:
+            if rng.random() < 0.7:
+                meta[key] = rng.choice(choices)
+        if rng.random() < 0.8:
+            record["meta"] = meta
+        if rng.random() < 0.5:
+            record["tags"] = rng.sample(["t1", "t2", "t3"], rng.randint(0, 2))
+        if rng.random() < 0.2:
+            record["a"] = {"b": rng.choice(["x", "z"])}
+        records.append(record)
+    return records
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+def test_candidates_include_every_match(expression):
+    records = dataset()
+    index = SearchIndex.build(records)
+    record_filter = RecordFilter(expression)
+    matches = list(record_filter.run(records))
+    candidates = record_filter.candidates(index)
+    if candidates is not None:
+        assert set(matches) <= set(candidates)
+        assert list(record_filter.run(records, candidates)) == matches
+    assert matches == [i for i, record in enumerate(records) if record_filter.predicate(record)]
+
+
+def test_equalities_only_narrow_by_strings_booleans_and_null():
+    assert RecordFilter('status == "open" and meta.flag == true').equalities == [
+        (("status",), "open"), (("meta", "flag"), True)]
+    assert RecordFilter('meta.count == 2 and tags[0] == "t1"').equalities == []
+    assert RecordFilter('status == "open" or meta.flag == true').equalities == []
+    assert RecordFilter('status == "open"').candidates(None) is None
+
+
+@pytest.mark.parametrize("expression, record, expected", [
+    ('flag == true', {"flag": 1}, False),
+    ('flag == 1', {"flag": True}, False),
+    ('count == 2', {"count": 2.0}, True),
+    ('count > 1', {"count": "2"}, False),  # not comparable: false rather than an error
+    ('missing != 1', {}, False),
+    ('name["first key"] == "a"', {"name": {"first key": "a"}}, True),
+    ('tags[-1] == "z"', {"tags": ["a", "z"]}, True),
+    ('tags == ["a", -1]', {"tags": ["a", -1]}, True),
+    ('meta == {"k": null}', {"meta": {"k": None}}, True),
+    ('meta', {"meta": {}}, False),
+])
+def test_predicate(expression, record, expected):
+    assert RecordFilter(expression).predicate(record) is expected
+
+
+@pytest.mark.parametrize("expression", ['status ==', '1 < count < 3', 'count + 1 == 2', 'count is null', 'f(x)'])
+def test_invalid_expressions(expression):
+    with pytest.raises(FilterError):
+        RecordFilter(expression)
+
+
+def test_run_reports_progress_and_cancels():
+    records = [{"n": i} for i in range(12000)]
+    seen = []
+    assert len(RecordFilter('n >= 0').run(records, progress=lambda done, total: seen.append((done, total)))) == 12000
+    assert seen == [(5000, 12000), (10000, 12000)]
+    assert RecordFilter('n >= 0').run(records, cancelled=lambda: True) is None
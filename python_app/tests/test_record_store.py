@@ -0,0 +1,223 @@
+import json
+import os
+import threading
+
+import pytest
+
+from files import (OPERATIONS, RECORDS, STYLES, append, delete, edit, insert, read, render, rewrite,
+                   rewrite_in_place, write)
+from record_store import FileChangedError, RecordStore, SaveCancelled
+
+
+@pytest.mark.parametrize("style", STYLES)
+@pytest.mark.parametrize("operation", OPERATIONS, ids=lambda operation: operation.__name__)
+def test_save_matches_json_dumps(tmp_path, records, style, operation):
+    path = write(tmp_path, records, style)
+    store = RecordStore.open(path)
+    try:
+        operation(store, records)
+        store.save()
+        assert read(path) == render(records, style)
+        assert list(store) == records
+    finally:
+        store.close()
+    reopened = RecordStore.open(path)
+    try:
+        assert list(reopened) == records
+    finally:
+        reopened.close()
+
+
+@pytest.mark.parametrize("style", STYLES)
+def test_successive_saves_match_json_dumps(tmp_path, records, style):
+    path = write(tmp_path, records, style)
+    store = RecordStore.open(path)
+    try:
+        for operation in OPERATIONS:
+            operation(store, records)
+            store.save()
+            assert read(path) == render(records, style), operation.__name__
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("style", STYLES)
+def test_unchanged_save_keeps_bytes(tmp_path, records, style):
+    path = write(tmp_path, records, style)
+    store = RecordStore.open(path)
+    try:
+        store.mark_dirty(0, store[0])
+        store.save()
+    finally:
+        store.close()
+    assert read(path) == render(records, style)
+
+
+@pytest.mark.parametrize("style", STYLES)
+def test_edits_during_save_stay_unsaved(tmp_path, records, style):
+    path = write(tmp_path, records, style)
+    store = RecordStore.open(path)
+    try:
+        append(store, records)
+        edit(store, records)
+        saved = json.loads(json.dumps(records))
+        job = store.begin_save()
+
+        # While the job is being written: edit a saved record again, add and remove some
+        obj = store[1]
+        obj["name"] = "after"
+        store.mark_dirty(1, obj)
+        records[1] = obj
+        insert(store, records)
+        delete(store, records)
+
+        job.write()
+        store.finish_save(job)
+        assert read(path) == render(saved, style)
+        assert list(store) == records
+        assert store.dirty
+
+        store.save()
+        assert read(path) == render(records, style)
+        assert list(store) == records
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("style", STYLES)
+def test_discarded_job_leaves_file(tmp_path, records, style):
+    path = write(tmp_path, records, style)
+    store = RecordStore.open(path)
+    try:
+        edit(store, records)
+        job = store.begin_save()
+        job.write()
+        job.discard()
+        assert os.listdir(tmp_path) == [os.path.basename(path)]
+        assert read(path) == render(RECORDS, style)
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("style", STYLES)
+@pytest.mark.parametrize("operation", [edit, append], ids=lambda operation: operation.__name__)
+def test_cancelled_save_leaves_file(tmp_path, records, style, operation):
+    path = write(tmp_path, records, style)
+    store = RecordStore.open(path)
+    cancelled = threading.Event()
+    cancelled.set()
+    try:
+        operation(store, records)
+        job = store.begin_save()
+        with pytest.raises(SaveCancelled):
+            job.write(cancelled=cancelled)
+        job.discard()
+        assert os.listdir(tmp_path) == [os.path.basename(path)]
+        assert read(path) == render(RECORDS, style)
+    finally:
+        store.close()
+
+
+
+@pytest.mark.parametrize("style", STYLES)
+@pytest.mark.parametrize("operation", [edit, append], ids=lambda operation: operation.__name__)
+def test_save_refuses_file_changed_in_place(tmp_path, records, style, operation):
+    path = write(tmp_path, records, style)
+    store = RecordStore.open(path)
+    try:
+        operation(store, records)
+        on_disk = [{"id": i, "name": f"other-{i}"} for i in range(3)]
+        rewrite_in_place(path, on_disk, style)
+        with pytest.raises(FileChangedError):
+            store.save()
+        assert read(path) == render(on_disk, style)
+        assert os.listdir(tmp_path) == [os.path.basename(path)]
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("style", STYLES)
+@pytest.mark.parametrize("operation", [edit, append], ids=lambda operation: operation.__name__)
+def test_save_refuses_file_changed_during_save(tmp_path, records, style, operation):
+    path = write(tmp_path, records, style)
+    store = RecordStore.open(path)
+    try:
+        operation(store, records)
+        job = store.begin_save()
+        rewrite_in_place(path, RECORDS[:2], style)
+        with pytest.raises(FileChangedError):
+            job.write()
+        job.discard()
+        assert read(path) == render(RECORDS[:2], style)
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("style", STYLES)
+def test_save_refuses_file_replaced_while_writing(tmp_path, records, style):
+    path = write(tmp_path, records, style)
+    store = RecordStore.open(path)
+    try:
+        edit(store, records)
+        job = store.begin_save()
+        job.write()
+        rewrite(path, RECORDS[:2], style)
+        with pytest.raises(FileChangedError):
+            store.finish_save(job)
+        assert read(path) == render(RECORDS[:2], style)
+        assert os.listdir(tmp_path) == [os.path.basename(path)]
+        assert store[1] == records[1]  # the edit is still there to save again
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("style", STYLES)
+def test_reads_of_truncated_file_raise(tmp_path, records, style):
+    path = write(tmp_path, records, style)
+    store = RecordStore.open(path)
+    try:
+        snapshot = store.snapshot()
+        assert store[0] == records[0]
+        with open(path, 'r+b') as f:
+            f.truncate(5)  # a mapped file truncated like this used to kill the process with SIGBUS
+        assert store[0] == records[0]  # still cached
+        with pytest.raises(FileChangedError):
+            store[len(records) - 1]
+        with pytest.raises(FileChangedError):
+            store.peek(len(records) - 1)
+        with pytest.raises(FileChangedError):
+            list(snapshot)
+        assert list(store.record_hashes()) == [-1] * len(records)
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("style", STYLES)
+def test_file_replaced_by_rename_still_reads(tmp_path, records, style):
+    path = write(tmp_path, records, style)
+    store = RecordStore.open(path)
+    try:
+        rewrite(path, RECORDS[:2], style)
+        assert list(store) == records
+        assert list(store.snapshot()) == records
+    finally:
+        store.close()
+
+
+def test_crlf_lines_keep_their_ending(tmp_path):
+    path = os.path.join(tmp_path, "data.jsonl")
+    with open(path, 'wb') as f:
+        f.write(b'{"a":1}\r\n{"b":2}\r\n\r\n{"c":3}')
+    store = RecordStore.open(path)
+    try:
+        assert list(store) == [{"a": 1}, {"b": 2}, {"c": 3}]
+        store[0] = {"a": 10}
+        store.append({"d": 4})
+        store.save()
+        assert read(path) == b'{"a": 10}\r\n{"b":2}\r\n\r\n{"c":3}\r\n{"d": 4}'
+        store.append({"e": 5})
+        store.save()  # appended in place
+        assert read(path) == b'{"a": 10}\r\n{"b":2}\r\n\r\n{"c":3}\r\n{"d": 4}\r\n{"e": 5}\r\n'
+        assert list(store) == [{"a": 10}, {"b": 2}, {"c": 3}, {"d": 4}, {"e": 5}]
+    finally:
+        store.close()
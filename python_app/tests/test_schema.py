@@ -0,0 +1,71 @@
+import pytest
+
+import schema
+from files import RECORDS
+from patches import ABSENT
+from schema import Schema, file_digest, load_cached, store_cached
+
+STATUSES = [{"status": status, "count": count, "note": note}
+            for status, count, note in [("open", 1, None), ("closed", 2, "x"), ("open", 3, None),
+                                        ("open", 4.5, "y"), ("closed", 5, None)]]
+
+
+def test_string_field_keeps_null_text():
+    fields = Schema.build([{"name": "None"}, {"name": None}])
+    assert fields.coerce(("name",), "None", str) == "None"
+    assert fields.coerce(("name",), "null", str) == "null"
+    assert fields.coerce(("name",), "null", type(None)) is None
+
+
+def test_null_field_takes_type_from_other_records():
+    fields = Schema.build(STATUSES)
+    assert fields.coerce(("note",), "z", type(None)) == "z"
+    assert fields.coerce(("count",), "2.5", int) == 2.5  # other records have fractions
+    assert Schema.build([{"n": 1}, {"n": None}]).coerce(("n",), "7", type(None)) == 7
+
+
+def test_enum_default_and_check():
+    assert Schema.build(STATUSES[:3]).field(("status",)).enum is None  # too few records per choice
+    fields = Schema.build(STATUSES)
+    assert fields.field(("status",)).enum == ["closed", "open"]
+    assert fields.default(("status",)) == "open"
+    assert fields.check(("status",), "pending") == "not one of closed, open"
+    assert fields.check(("count",), 3) is None
+    assert fields.check(("note",), None) is None
+    assert fields.check(("count",), "three") == "expected integer, got string"
+    assert fields.default(("missing",)) is ABSENT
+
+
+def test_changes_keep_counts_as_a_rebuild_would(records):
+    fields = Schema.build(records)
+    fields.apply_change(0, ("name",), records[0]["name"], 5)
+    records[0]["name"] = 5
+    fields.apply_change(1, (), ABSENT, {"id": 9, "extra": True})
+    records.insert(1, {"id": 9, "extra": True})
+    fields.apply_change(3, (), records[3], ABSENT)
+    del records[3]
+    rebuilt = Schema.build(records)
+    for path, stats in rebuilt._fields.items():
+        assert {name: count for name, count in fields.field(path).types.items() if count} == stats.types
+    assert fields.children(()) == rebuilt.children(())
+
+
+def test_build_samples_evenly():
+    fields = Schema.build([{"i": i} for i in range(100)], sample=10)
+    assert fields.sampled
+    assert fields.field(("i",)).count == 10
+    assert Schema.build(RECORDS, cancelled=lambda: True) is None
+
+
+def test_cache_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(schema, "CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "data.json"
+    path.write_text("[]")
+    digest = file_digest(str(path))
+    assert load_cached(digest) is None
+    fields = Schema.build(STATUSES)
+    store_cached(digest, fields.to_json())
+    cached = load_cached(digest)
+    assert cached.to_json() == fields.to_json()
+    with pytest.raises(ValueError):
+        Schema.from_json(dict(fields.to_json(), version=0))
@@ -0,0 +1,70 @@
+import copy
+
+import pytest
+
+from files import RECORDS
+from search_index import SearchIndex, index_key, iter_leaves
+
+QUERIES = [("alpha", None), ("a", None), ("A", "name"), ("b", "tags"), ("1", "meta.score"), ("true", None),
+           ("null", "meta.score"), ("[2, 3]", "meta.nested.deep"), ("", "name"), ("zzz", None)]
+
+
+def brute_force(records, text, path, mode):
+    """What lookup() should return, found by looking at every leaf"""
+    found = []
+    for i, record in enumerate(records):
+        for leaf_path, value in iter_leaves(record):
+            key = index_key(value)
+            if path and leaf_path != path:
+                continue
+            if (mode == "exact" and key == text or mode == "prefix" and key.lower().startswith(text.lower())
+                    or mode == "contains" and text and text.lower() in key.lower()):
+                found.append(i)
+                break
+    return found
+
+
+def check(index, records):
+    for mode in ("exact", "prefix", "contains"):
+        for text, path in QUERIES:
+            assert index.lookup(text, path, mode) == brute_force(records, text, path, mode), (text, path, mode)
+
+
+def test_lookup_matches_brute_force(records):
+    check(SearchIndex.build(records), records)
+
+
+def test_updates_keep_lookups_current(records):
+    index = SearchIndex.build(records)
+    check(index, records)  # fills the prefix and substring caches
+    index.update(0, ("name",), records[0]["name"], "Alphabet")
+    records[0]["name"] = "Alphabet"
+    index.update(2, ("meta", "score"), None, 1.25)
+    records[2]["meta"]["score"] = 1.25
+    index.remove(3, records[3]["tags"], ("tags",))
+    del records[3]["tags"]
+    index.add(1, {"x": 1}, ("meta", "new"))
+    records[1]["meta"]["new"] = {"x": 1}
+    check(index, records)
+    assert "meta.new.x" in index.paths()
+
+
+def test_values_shared_by_many_records():
+    records = [{"status": "open" if i % 3 else "closed", "n": i % 2} for i in range(50)]
+    index = SearchIndex.build(records)
+    check(index, records)
+    for i in range(0, 50, 7):
+        index.update(i, ("status",), records[i]["status"], "held")
+        records[i]["status"] = "held"
+    check(index, records)
+    assert index.lookup("held", "status") == list(range(0, 50, 7))
+
+
+@pytest.mark.parametrize("value, key", [("x", "x"), (3, "3"), (1.5, "1.5"), (True, "true"), (None, "null"),
+                                        ([1, "a"], '[1, "a"]')])
+def test_index_key(value, key):
+    assert index_key(value) == key
+
+
+def test_build_can_be_cancelled():
+    assert SearchIndex.build(copy.deepcopy(RECORDS), cancelled=lambda: True) is None